@@ -0,0 +1,220 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from db.database import get_db_session
+from datetime import datetime
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Campaigns keep being refreshed for this many days after their end date,
+# since late reviews, posts and sales for the window can still be loaded
+SETTLE_DAYS = int(os.getenv("CAMPAIGN_SETTLE_DAYS", "7"))
+REFRESH_MINUTES = int(os.getenv("CAMPAIGN_REFRESH_MINUTES", "30"))
+
+# Arbitrary key so only one worker refreshes at a time
+REFRESH_LOCK_KEY = 26001
+
+# Every campaign window [start_date, end_date] is compared against a baseline
+# window of the same length that ends the day before start_date. Each source
+# table is range-joined once over [baseline_start, end_date] and split with
+# FILTER, so the heavy scans only touch the dates around each campaign.
+REFRESH_SQL = text("""
+    WITH stale AS (
+        SELECT c.campaign_id
+        FROM campaign c
+        LEFT JOIN campaign_performance cp ON cp.campaign_id = c.campaign_id
+        WHERE c.start_date IS NOT NULL
+          AND c.end_date IS NOT NULL
+          AND (
+              :full_refresh
+              OR cp.campaign_id IS NULL
+              OR cp.refreshed_at::date <= c.end_date + :settle_days
+              OR cp.budget IS DISTINCT FROM c.budget
+              OR cp.reach IS DISTINCT FROM c.reach
+              OR cp.target_engagement IS DISTINCT FROM c.target_engagement
+              OR cp.start_date IS DISTINCT FROM c.start_date
+              OR cp.end_date IS DISTINCT FROM c.end_date
+          )
+    ),
+    windows AS (
+        SELECT
+            c.campaign_id, c.name_campaign, c.product_id, p.brand,
+            c.platform, c.category, c.format_type,
+            c.start_date, c.end_date,
+            (c.end_date - c.start_date + 1) AS window_days,
+            c.start_date - (c.end_date - c.start_date + 1) AS baseline_start,
+            c.budget, c.reach, c.target_engagement
+        FROM campaign c
+        JOIN stale s ON s.campaign_id = c.campaign_id
+        LEFT JOIN product_catalog p ON p.product_id = c.product_id
+    ),
+    review_stats AS (
+        SELECT
+            w.campaign_id,
+            count(*) FILTER (WHERE r.review_date < w.start_date) AS reviews_before,
+            count(*) FILTER (WHERE r.review_date >= w.start_date) AS reviews_during,
+            avg(r.sentiment_score) FILTER (WHERE r.review_date < w.start_date) AS review_sentiment_before,
+            avg(r.sentiment_score) FILTER (WHERE r.review_date >= w.start_date) AS review_sentiment_during
+        FROM windows w
+        JOIN reviewed_product r
+          ON r.product_id = w.product_id
+         AND r.review_date BETWEEN w.baseline_start AND w.end_date
+        GROUP BY w.campaign_id
+    ),
+    social_stats AS (
+        SELECT
+            w.campaign_id,
+            count(*) FILTER (WHERE sm.post_date < w.start_date) AS posts_before,
+            count(*) FILTER (WHERE sm.post_date >= w.start_date) AS posts_during,
+            sum(ssm.total_likes + ssm.total_replies) FILTER (WHERE sm.post_date < w.start_date) AS social_engagement_before,
+            sum(ssm.total_likes + ssm.total_replies) FILTER (WHERE sm.post_date >= w.start_date) AS social_engagement_during,
+            avg(ssm.sentiment_score) FILTER (WHERE sm.post_date < w.start_date) AS social_sentiment_before,
+            avg(ssm.sentiment_score) FILTER (WHERE sm.post_date >= w.start_date) AS social_sentiment_during
+        FROM windows w
+        JOIN social_media sm
+          ON sm.brand = w.brand
+         AND sm.post_date BETWEEN w.baseline_start AND w.end_date
+        LEFT JOIN sentiment_social_media ssm ON ssm.id_post = sm.social_media_post_id
+        GROUP BY w.campaign_id
+    ),
+    sales_stats AS (
+        SELECT
+            w.campaign_id,
+            count(DISTINCT s.transaction_id) FILTER (WHERE s.purchase_date < w.start_date) AS transactions_before,
+            count(DISTINCT s.transaction_id) FILTER (WHERE s.purchase_date >= w.start_date) AS transactions_during,
+            sum(s.order_value) FILTER (WHERE s.purchase_date < w.start_date) AS sales_value_before,
+            sum(s.order_value) FILTER (WHERE s.purchase_date >= w.start_date) AS sales_value_during
+        FROM windows w
+        JOIN sale_product sp ON sp.product_id = w.product_id
+        JOIN sales s
+          ON s.transaction_id = sp.transaction_id
+         AND s.purchase_date BETWEEN w.baseline_start AND w.end_date
+        GROUP BY w.campaign_id
+    )
+    INSERT INTO campaign_performance (
+        campaign_id, name_campaign, brand, product_id, platform, category, format_type,
+        start_date, end_date, window_days, budget, reach, target_engagement,
+        reach_vs_target, cost_per_reach, campaign_sentiment,
+        reviews_before, reviews_during, review_sentiment_before, review_sentiment_during, review_sentiment_delta,
+        posts_before, posts_during, social_engagement_before, social_engagement_during,
+        social_sentiment_before, social_sentiment_during, social_sentiment_delta,
+        transactions_before, transactions_during, sales_value_before, sales_value_during,
+        sales_value_delta, sales_lift_per_budget, refreshed_at
+    )
+    SELECT
+        w.campaign_id, w.name_campaign, w.brand, w.product_id, w.platform, w.category, w.format_type,
+        w.start_date, w.end_date, w.window_days, w.budget, w.reach, w.target_engagement,
+        w.reach::float / NULLIF(w.target_engagement, 0),
+        w.budget::float / NULLIF(w.reach, 0),
+        sc.sentiment_score::float,
+        coalesce(rs.reviews_before, 0), coalesce(rs.reviews_during, 0),
+        rs.review_sentiment_before::float, rs.review_sentiment_during::float,
+        (rs.review_sentiment_during - rs.review_sentiment_before)::float,
+        coalesce(ss.posts_before, 0), coalesce(ss.posts_during, 0),
+        coalesce(ss.social_engagement_before, 0), coalesce(ss.social_engagement_during, 0),
+        ss.social_sentiment_before::float, ss.social_sentiment_during::float,
+        (ss.social_sentiment_during - ss.social_sentiment_before)::float,
+        coalesce(sa.transactions_before, 0), coalesce(sa.transactions_during, 0),
+        coalesce(sa.sales_value_before, 0), coalesce(sa.sales_value_during, 0),
+        coalesce(sa.sales_value_during, 0) - coalesce(sa.sales_value_before, 0),
+        (coalesce(sa.sales_value_during, 0) - coalesce(sa.sales_value_before, 0)) / NULLIF(w.budget, 0)::float,
+        now()
+    FROM windows w
+    LEFT JOIN sentiment_campaign sc ON sc.id_campaign = w.campaign_id
+    LEFT JOIN review_stats rs ON rs.campaign_id = w.campaign_id
+    LEFT JOIN social_stats ss ON ss.campaign_id = w.campaign_id
+    LEFT JOIN sales_stats sa ON sa.campaign_id = w.campaign_id
+    ON CONFLICT (campaign_id) DO UPDATE SET
+        name_campaign = EXCLUDED.name_campaign,
+        brand = EXCLUDED.brand,
+        product_id = EXCLUDED.product_id,
+        platform = EXCLUDED.platform,
+        category = EXCLUDED.category,
+        format_type = EXCLUDED.format_type,
+        start_date = EXCLUDED.start_date,
+        end_date = EXCLUDED.end_date,
+        window_days = EXCLUDED.window_days,
+        budget = EXCLUDED.budget,
+        reach = EXCLUDED.reach,
+        target_engagement = EXCLUDED.target_engagement,
+        reach_vs_target = EXCLUDED.reach_vs_target,
+        cost_per_reach = EXCLUDED.cost_per_reach,
+        campaign_sentiment = EXCLUDED.campaign_sentiment,
+        reviews_before = EXCLUDED.reviews_before,
+        reviews_during = EXCLUDED.reviews_during,
+        review_sentiment_before = EXCLUDED.review_sentiment_before,
+        review_sentiment_during = EXCLUDED.review_sentiment_during,
+        review_sentiment_delta = EXCLUDED.review_sentiment_delta,
+        posts_before = EXCLUDED.posts_before,
+        posts_during = EXCLUDED.posts_during,
+        social_engagement_before = EXCLUDED.social_engagement_before,
+        social_engagement_during = EXCLUDED.social_engagement_during,
+        social_sentiment_before = EXCLUDED.social_sentiment_before,
+        social_sentiment_during = EXCLUDED.social_sentiment_during,
+        social_sentiment_delta = EXCLUDED.social_sentiment_delta,
+        transactions_before = EXCLUDED.transactions_before,
+        transactions_during = EXCLUDED.transactions_during,
+        sales_value_before = EXCLUDED.sales_value_before,
+        sales_value_during = EXCLUDED.sales_value_during,
+        sales_value_delta = EXCLUDED.sales_value_delta,
+        sales_lift_per_budget = EXCLUDED.sales_lift_per_budget,
+        refreshed_at = EXCLUDED.refreshed_at
+    RETURNING campaign_id
+""")
+
+DELETE_ORPHANS_SQL = text("""
+    DELETE FROM campaign_performance cp
+    WHERE NOT EXISTS (SELECT 1 FROM campaign c WHERE c.campaign_id = cp.campaign_id)
+""")
+
+def refresh_campaign_performance(db: Session, full: bool = False):
+    """
+    Recompute campaign_performance rows that may have changed
+
+    Args:
+        db: Database session, committed by this function
+        full (bool): Recompute every campaign instead of only stale ones
+
+    Returns:
+        dict with the number of refreshed and removed campaigns, or None when
+        another worker is already refreshing
+    """
+    locked = db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY}
+    ).scalar()
+    if not locked:
+        db.rollback()
+        return None
+
+    refreshed = db.execute(
+        REFRESH_SQL, {"full_refresh": full, "settle_days": SETTLE_DAYS}
+    ).fetchall()
+    removed = db.execute(DELETE_ORPHANS_SQL).rowcount
+    db.commit()
+
+    return {"refreshed": len(refreshed), "removed": removed}
+
+def refresh_campaign_performance_job():
+    """Scheduler entry point for the incremental refresh"""
+    db = get_db_session()
+    try:
+        result = refresh_campaign_performance(db)
+        if result:
+            logger.info(f"Campaign performance refreshed: {result}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error refreshing campaign performance: {str(e)}")
+    finally:
+        db.close()
+
+def schedule_campaign_performance_refresh(scheduler):
+    """Register the periodic incremental refresh on the shared scheduler"""
+    scheduler.add_job(
+        refresh_campaign_performance_job,
+        "interval",
+        minutes=REFRESH_MINUTES,
+        id="campaign_performance_refresh",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
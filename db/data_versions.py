@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from db.database import engine
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker reuses the versions it read, so requests in between run no SQL
+VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+
+_versions = {}
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+def get_data_versions():
+    """
+    Get the data version of every tracked table
+
+    The versions are read at most once per VERSION_TTL seconds per worker.
+    If they cannot be read (e.g. migration 0005 is not applied) the last
+    known versions are returned.
+
+    Returns:
+        dict of table name to version
+    """
+    global _versions, _loaded_at
+    if time.monotonic() - _loaded_at < VERSION_TTL:
+        return _versions
+
+    with _lock:
+        if time.monotonic() - _loaded_at < VERSION_TTL:
+            return _versions
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(text("SELECT table_name, version FROM data_versions")).all()
+            _versions = {table_name: version for table_name, version in rows}
+        except Exception as e:
+            logger.error(f"Could not read data versions: {str(e)}")
+        _loaded_at = time.monotonic()
+    return _versions
+
+def versions_key(tables):
+    """Compact `table:version` string of the given tables, for cache keys and ETags"""
+    versions = get_data_versions()
+    return ",".join(f"{table}:{versions.get(table, 0)}" for table in tables)
+
+def expire_data_versions():
+    """Force the next get_data_versions call to read the database"""
+    global _loaded_at
+    _loaded_at = 0.0
@@ -1,9 +1,19 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from anyio import to_thread
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from db.pool import InstrumentedQueuePool
+from db.replicas import ReplicaRouter
+from tools.single_flight import single_flight
+import asyncio
 import os
+import logging
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
@@ -17,8 +27,61 @@ DB_NAME = os.getenv("DB_NAME")
 # Construct database URL
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Connection pool per worker process. Size it so that
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below Postgres max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Reopen connections older than this, before firewalls or PgBouncer drop them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Threads for sync endpoints; by default one per connection the pool can open,
+# so requests queue for a thread instead of timing out waiting for a connection
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+# Comma-separated URLs of read replicas that analytics reads are spread over
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+# Replicas further behind the primary than this many seconds get no reads
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "30"))
+DB_REPLICA_HEALTH_INTERVAL = int(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "10"))
+
+# Statement timeout of read-only endpoint queries, in milliseconds
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
+# Budgets of endpoints that need more or less than the default, keyed by route path
+STATEMENT_TIMEOUTS_MS = {
+    "/api/social-media-sentiment/keywords": 30000,
+    "/api/social-media-sentiment/trending-hashtags": 30000,
+    "/api/sales/demographics": 30000,
+    "/api/product-reviews/top-keywords": 30000,
+    "/api/product-reviews/aspect-sentiment": 30000,
+    "/api/product-reviews/filter-categories": 2000,
+    "/api/campaigns/performance/{campaign_id}": 2000,
+}
+# Seconds between checks whether the client of a running request went away
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def create_pooled_engine(url: str, **kwargs):
+    """Create an engine with the configured, instrumented connection pool"""
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        **kwargs
+    )
+
 # Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+engine = create_pooled_engine(DATABASE_URL)
+
+# Replicas fail fast so a dead one costs little before it leaves the rotation
+replica_engines = [
+    create_pooled_engine(url, connect_args={"connect_timeout": 3})
+    for url in DB_REPLICA_URLS
+]
+read_router = ReplicaRouter(replica_engines, fallback=engine, max_lag=DB_REPLICA_MAX_LAG)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -37,3 +100,78 @@ def get_db():
 # Function to get a new database session
 def get_db_session():
     return SessionLocal()
+
+def get_read_engine():
+    """Engine for read-only queries: the next healthy replica, or the primary"""
+    return read_router.get_engine()
+
+@event.listens_for(SessionLocal, "after_begin")
+def apply_statement_timeout(session, transaction, connection):
+    """Set the session's statement timeout on each transaction it begins, and remember its connection"""
+    timeout = session.info.get("statement_timeout")
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+        session.info["dbapi_connection"] = connection.connection.dbapi_connection
+
+def statement_timeout_for(request: Request):
+    """Statement timeout budget of the route that handles the request"""
+    route = request.scope.get("route")
+    return STATEMENT_TIMEOUTS_MS.get(getattr(route, "path", request.url.path), DB_STATEMENT_TIMEOUT_MS)
+
+async def cancel_on_disconnect(request: Request, db):
+    """
+    Cancel the session's running query once the client disconnects
+
+    The cancel is skipped while other requests coalesced onto this one wait
+    for its result (see tools.single_flight).
+    """
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+    dbapi_connection = db.info.get("dbapi_connection")
+    key = db.info.get("single_flight_key")
+    if dbapi_connection is None or (key and single_flight.has_waiters(key)):
+        return
+    # Same as pg_cancel_backend on the connection's backend; it opens a
+    # separate connection, so keep it off the event loop
+    await asyncio.to_thread(dbapi_connection.cancel)
+    logger.error(f"Cancelled the query of {request.url.path} after the client disconnected")
+
+# Read-only database dependency, routed to a replica when there is one.
+# Queries get the route's statement timeout and are cancelled when the client goes away.
+async def get_read_db(request: Request):
+    db = SessionLocal(bind=get_read_engine())
+    db.info["statement_timeout"] = statement_timeout_for(request)
+    watcher = asyncio.create_task(cancel_on_disconnect(request, db))
+    try:
+        yield db
+    finally:
+        watcher.cancel()
+        await run_in_threadpool(db.close)
+
+def schedule_replica_health_checks(scheduler):
+    """Register the replica health check on the shared scheduler; every worker keeps its own view"""
+    if not replica_engines:
+        return
+    scheduler.add_job(
+        read_router.check_health,
+        "interval",
+        seconds=DB_REPLICA_HEALTH_INTERVAL,
+        id="replica_health_check",
+        replace_existing=True
+    )
+
+def configure_threadpool():
+    """Limit the threads FastAPI runs sync endpoints on; call from the event loop at startup"""
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+def pool_metrics():
+    """Connection pool occupancy, settings and checkout waits of this worker"""
+    return {
+        **engine.pool.metrics(),
+        "timeout": DB_POOL_TIMEOUT,
+        "recycle": DB_POOL_RECYCLE,
+        "prePing": DB_POOL_PRE_PING,
+        "threadpoolSize": THREADPOOL_SIZE,
+        "readRouting": read_router.stats()
+    }
@@ -0,0 +1,297 @@
+from sqlalchemy import text
+from db.database import engine
+from datetime import datetime, timedelta
+import json
+import os
+
+# Limits of every benchmark transaction, so the benchmark gives way to live traffic
+STATEMENT_TIMEOUT = os.getenv("EXPLAIN_BENCHMARK_STATEMENT_TIMEOUT", "60s")
+LOCK_TIMEOUT = os.getenv("EXPLAIN_BENCHMARK_LOCK_TIMEOUT", "2s")
+
+# Planner settings of the "before" plan, unless the index is dropped instead
+DISABLE_INDEX_PATHS = ("enable_indexscan", "enable_indexonlyscan", "enable_bitmapscan")
+
+# One representative dashboard query per index. Each is explained without
+# index scans (or with the index dropped inside a rolled-back transaction)
+# and with the index in place.
+BENCHMARKS = [
+    {
+        "index": "ix_reviewed_product_brand_review_date",
+        "endpoint": "/api/product-reviews/metrics",
+        "sql": """
+            SELECT count(*), avg(rating) FROM reviewed_product
+            WHERE brand = :brand AND review_date BETWEEN :start AND :end
+        """
+    },
+    {
+        "index": "ix_social_media_brand_post_date",
+        "endpoint": "/api/social-media/timeseries",
+        "sql": """
+            SELECT sm.post_date, sum(ssm.total_likes + ssm.total_replies), sum(sm.reach_count)
+            FROM social_media sm
+            JOIN sentiment_social_media ssm ON sm.social_media_post_id = ssm.id_post
+            WHERE sm.brand = :brand AND sm.post_date BETWEEN :start AND :end
+            GROUP BY sm.post_date ORDER BY sm.post_date
+        """
+    },
+    {
+        "index": "ix_campaign_performance_brand_start_date",
+        "endpoint": "/api/campaigns/performance",
+        "sql": """
+            SELECT * FROM campaign_performance
+            WHERE brand = :brand AND start_date <= :end AND end_date >= :start
+        """
+    },
+    {
+        "index": "ix_sustainability_mention_brand_document_date",
+        "endpoint": "/api/sustainability/metrics",
+        "sql": """
+            SELECT source, count(*), sum(hit_count) FROM sustainability_mention
+            WHERE brand = :brand AND document_date BETWEEN :start AND :end
+            GROUP BY source
+        """
+    },
+    {
+        "index": "ix_sales_purchase_date",
+        "endpoint": "/api/sales/daily-sales",
+        "sql": """
+            SELECT s.purchase_date, sum(s.order_value)
+            FROM sales s
+            JOIN sale_product sp ON s.transaction_id = sp.transaction_id
+            JOIN product_catalog p ON sp.product_id = p.product_id
+            WHERE p.brand = :brand AND s.purchase_date BETWEEN :start AND :end
+            GROUP BY s.purchase_date
+        """
+    },
+    {
+        "index": "ix_product_catalog_brand",
+        "endpoint": "/api/product-reviews/review-sentiment-by-upper-material",
+        "sql": "SELECT DISTINCT upper_material FROM product_catalog WHERE brand = :brand"
+    },
+    {
+        "index": "ix_reviewed_product_product_id_review_date",
+        "endpoint": "/api/product-reviews/products-review-sentiment/{product_id}",
+        "sql": """
+            SELECT aspect_sentiments FROM reviewed_product
+            WHERE product_id = :product_id AND review_date BETWEEN :start AND :end
+        """
+    },
+    {
+        "index": "ix_reviewed_product_customer_id",
+        "endpoint": "agent SQL over reviews per customer",
+        "sql": "SELECT count(*) FROM reviewed_product WHERE customer_id = :customer_id"
+    },
+    {
+        "index": "ix_sale_product_transaction_id",
+        "endpoint": "/api/sales/customer-locations",
+        "sql": """
+            SELECT c.location, count(DISTINCT c.customer_id)
+            FROM customer_demographics c
+            JOIN sales s ON c.customer_id = s.customer_id
+            JOIN sale_product sp ON s.transaction_id = sp.transaction_id
+            WHERE s.purchase_date BETWEEN :start AND :end
+            GROUP BY c.location
+        """
+    },
+    {
+        "index": "ix_sale_product_product_id_transaction_id",
+        "endpoint": "/api/sales/product-categories",
+        "sql": """
+            SELECT count(DISTINCT sp.transaction_id) FROM sale_product sp
+            WHERE sp.product_id = :product_id
+        """
+    },
+    {
+        "index": "ix_sales_customer_id",
+        "endpoint": "/api/sales/demographics",
+        "sql": "SELECT count(*) FROM sales WHERE customer_id = :customer_id"
+    },
+    {
+        "index": "ix_campaign_product_id",
+        "endpoint": "campaign_performance refresh",
+        "sql": "SELECT * FROM campaign WHERE product_id = :product_id"
+    },
+    {
+        "index": "ix_social_media_hashtags",
+        "endpoint": "hashtag search (agent SQL)",
+        "sql": "SELECT count(*) FROM social_media WHERE hashtags @> ARRAY[CAST(:hashtag AS varchar)]"
+    },
+    {
+        "index": "ix_reviewed_product_keyword_tags",
+        "endpoint": "keyword search (agent SQL)",
+        "sql": "SELECT count(*) FROM reviewed_product WHERE keyword_tags @> ARRAY[CAST(:keyword AS varchar)]"
+    },
+    {
+        "index": "ix_reviewed_product_aspect_sentiments",
+        "endpoint": "aspect search (agent SQL)",
+        "sql": "SELECT count(*) FROM reviewed_product WHERE aspect_sentiments ? 'comfort'"
+    },
+]
+
+def sample_params(conn):
+    """Pick realistic parameter values from the data: the busiest brand, its last 30 days, etc."""
+    brand = conn.execute(text(
+        "SELECT brand FROM reviewed_product GROUP BY brand ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    end = conn.execute(text("SELECT max(review_date) FROM reviewed_product")).scalar()
+    product_id = conn.execute(text(
+        "SELECT product_id FROM reviewed_product GROUP BY product_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    customer_id = conn.execute(text("SELECT min(customer_id) FROM customer_demographics")).scalar()
+    hashtag = conn.execute(text(
+        "SELECT tag FROM social_media, unnest(hashtags) AS tag GROUP BY tag ORDER BY count(*) LIMIT 1"
+    )).scalar()
+    keyword = conn.execute(text(
+        "SELECT tag FROM reviewed_product, unnest(keyword_tags) AS tag GROUP BY tag ORDER BY count(*) LIMIT 1"
+    )).scalar()
+    start = end - timedelta(days=30) if end else None
+    return {
+        "brand": brand, "start": start, "end": end, "product_id": product_id,
+        "customer_id": customer_id, "hashtag": hashtag, "keyword": keyword
+    }
+
+def explain(conn, sql, params):
+    """Run EXPLAIN ANALYZE and return (execution ms, shared buffers hit+read, top plan nodes)"""
+    plan = conn.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"),
+        {k: v for k, v in params.items() if f":{k}" in sql}
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    plan = plan[0]
+    root = plan["Plan"]
+
+    nodes = []
+    def walk(node):
+        label = node["Node Type"]
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        elif node.get("Relation Name"):
+            label += f" on {node['Relation Name']}"
+        nodes.append(label)
+        for child in node.get("Plans", []):
+            walk(child)
+    walk(root)
+
+    buffers = root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+    return plan["Execution Time"], buffers, nodes
+
+def begin(conn):
+    """Start a benchmark transaction with its timeouts"""
+    trans = conn.begin()
+    conn.execute(text(f"SET LOCAL statement_timeout = '{STATEMENT_TIMEOUT}'"))
+    conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    return trans
+
+def run_benchmark(indexes=None, drop_index=False):
+    """
+    Explain every benchmark query without and with its index
+
+    The query is run once beforehand and its result discarded, so both
+    plans are measured with the same warm cache.
+
+    Args:
+        indexes: Optional list of index names to limit the report to
+        drop_index (bool): Get the "before" plan by dropping the index inside a
+            rolled-back transaction instead of disabling index scans. The drop
+            holds an ACCESS EXCLUSIVE lock on the table (and all its partitions)
+            during EXPLAIN ANALYZE, so only use it against a copy of the database.
+
+    Returns:
+        tuple of (one result dict per benchmarked index, sample parameters used)
+    """
+    results = []
+    with engine.connect() as conn:
+        params = sample_params(conn)
+        conn.rollback()
+        existing = {row[0] for row in conn.execute(text("SELECT indexname FROM pg_indexes"))}
+        conn.rollback()
+
+        for bench in BENCHMARKS:
+            if indexes and bench["index"] not in indexes:
+                continue
+            if bench["index"] not in existing:
+                results.append({**bench, "skipped": "index does not exist, apply migrations first"})
+                continue
+
+            trans = begin(conn)
+            try:
+                # Warm-up run, discarded
+                explain(conn, bench["sql"], params)
+                after = explain(conn, bench["sql"], params)
+            finally:
+                trans.rollback()
+
+            trans = begin(conn)
+            try:
+                if drop_index:
+                    conn.execute(text(f'DROP INDEX "{bench["index"]}"'))
+                else:
+                    for setting in DISABLE_INDEX_PATHS:
+                        conn.execute(text(f"SET LOCAL {setting} = off"))
+                before = explain(conn, bench["sql"], params)
+            finally:
+                trans.rollback()
+
+            results.append({**bench, "before": before, "after": after})
+    return results, params
+
+def format_report(results, params, drop_index=False):
+    """Render the benchmark results as a Markdown report"""
+    lines = [
+        "# Index benchmark report",
+        "",
+        f"Generated {datetime.now():%Y-%m-%d %H:%M} against `{engine.url.database}`.",
+        f"Parameters: brand `{params['brand']}`, {params['start']} to {params['end']}.",
+        "Before: " + ("index dropped." if drop_index else "index scans disabled, so other indexes are not used either."),
+        "",
+        "| Index | Endpoint | Before (ms) | After (ms) | Buffers before | Buffers after |",
+        "|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        if "skipped" in r:
+            lines.append(f"| `{r['index']}` | {r['endpoint']} | - | - | - | {r['skipped']} |")
+            continue
+        lines.append(
+            f"| `{r['index']}` | {r['endpoint']} | {r['before'][0]:.2f} | {r['after'][0]:.2f} "
+            f"| {r['before'][1]} | {r['after'][1]} |"
+        )
+
+    for r in results:
+        if "skipped" in r:
+            continue
+        lines += [
+            "",
+            f"## {r['index']}",
+            "",
+            "```sql",
+            " ".join(r["sql"].split()),
+            "```",
+            "",
+            f"- Before: {' > '.join(r['before'][2])}",
+            f"- After: {' > '.join(r['after'][2])}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Before/after EXPLAIN benchmark for the analytics indexes")
+    parser.add_argument("--index", action="append", help="only benchmark this index (repeatable)")
+    parser.add_argument("--output", help="write the Markdown report to this file instead of stdout")
+    parser.add_argument(
+        "--drop-index",
+        action="store_true",
+        help="drop each index in a rolled-back transaction instead of disabling index scans; locks the table, use a copy"
+    )
+    args = parser.parse_args()
+
+    results, params = run_benchmark(args.index, args.drop_index)
+    report = format_report(results, params, args.drop_index)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"+ Report written to {args.output}")
+    else:
+        print(report)
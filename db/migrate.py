@@ -0,0 +1,101 @@
+from sqlalchemy import text
+from db.database import engine
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Arbitrary key so concurrent deploys apply migrations one at a time
+MIGRATION_LOCK_KEY = 28001
+
+def list_migrations():
+    """Get (version, name, path) of every migration file, in version order"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not filename.endswith(".sql"):
+            continue
+        version, _, name = filename[:-4].partition("_")
+        migrations.append((version, name, os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+def ensure_migrations_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(20) PRIMARY KEY,
+            name VARCHAR(255),
+            applied_at TIMESTAMP DEFAULT now()
+        )
+    """))
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+def pending_migrations():
+    """Get the migrations that have not been applied to the database yet"""
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        applied = applied_versions(conn)
+    return [m for m in list_migrations() if m[0] not in applied]
+
+def run_migrations():
+    """
+    Apply every pending migration, each one in its own transaction
+
+    Returns:
+        list of applied migration versions
+    """
+    applied_now = []
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            with engine.begin() as conn:
+                ensure_migrations_table(conn)
+                applied = applied_versions(conn)
+
+            for version, name, path in list_migrations():
+                if version in applied:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    sql = f.read()
+
+                print(f"* Applying migration {version} {name}")
+                with engine.begin() as conn:
+                    # Raw cursor without parameters, so `%` in plpgsql format() strings is left alone
+                    conn.connection.cursor().execute(sql)
+                    conn.execute(
+                        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                        {"version": version, "name": name}
+                    )
+                applied_now.append(version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return applied_now
+
+def warn_pending_migrations():
+    """Log an error at startup when the schema is behind the code"""
+    try:
+        pending = pending_migrations()
+        if pending:
+            logger.error(
+                f"{len(pending)} pending migrations ({', '.join(v for v, _, _ in pending)}). "
+                "Run `python -m db.migrate` to apply them."
+            )
+    except Exception as e:
+        logger.error(f"Could not check migrations: {str(e)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--list", action="store_true", help="only list pending migrations")
+    args = parser.parse_args()
+
+    if args.list:
+        for version, name, _ in pending_migrations():
+            print(f"{version} {name}")
+    else:
+        applied = run_migrations()
+        print(f"+ Applied {len(applied)} migrations" if applied else "+ Database is up to date")
@@ -0,0 +1,58 @@
+-- Tables owned by the backend itself (the source tables are loaded upstream).
+-- IF NOT EXISTS so databases that already created them at startup are adopted.
+
+CREATE TABLE IF NOT EXISTS campaign_performance (
+    campaign_id INTEGER PRIMARY KEY REFERENCES campaign (campaign_id),
+    name_campaign VARCHAR(255),
+    brand VARCHAR(100),
+    product_id INTEGER,
+    platform VARCHAR(100),
+    category VARCHAR(100),
+    format_type VARCHAR(100),
+    start_date DATE,
+    end_date DATE,
+    window_days INTEGER,
+    budget NUMERIC,
+    reach INTEGER,
+    target_engagement INTEGER,
+    reach_vs_target DOUBLE PRECISION,
+    cost_per_reach DOUBLE PRECISION,
+    campaign_sentiment DOUBLE PRECISION,
+    reviews_before INTEGER,
+    reviews_during INTEGER,
+    review_sentiment_before DOUBLE PRECISION,
+    review_sentiment_during DOUBLE PRECISION,
+    review_sentiment_delta DOUBLE PRECISION,
+    posts_before INTEGER,
+    posts_during INTEGER,
+    social_engagement_before DOUBLE PRECISION,
+    social_engagement_during DOUBLE PRECISION,
+    social_sentiment_before DOUBLE PRECISION,
+    social_sentiment_during DOUBLE PRECISION,
+    social_sentiment_delta DOUBLE PRECISION,
+    transactions_before INTEGER,
+    transactions_during INTEGER,
+    sales_value_before DOUBLE PRECISION,
+    sales_value_during DOUBLE PRECISION,
+    sales_value_delta DOUBLE PRECISION,
+    sales_lift_per_budget DOUBLE PRECISION,
+    refreshed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS sustainability_mention (
+    source VARCHAR(20) NOT NULL,
+    document_id INTEGER NOT NULL,
+    brand VARCHAR(100),
+    document_date DATE,
+    sentiment_score NUMERIC,
+    hit_count INTEGER,
+    keyword_hits JSONB,
+    PRIMARY KEY (source, document_id)
+);
+
+CREATE TABLE IF NOT EXISTS sustainability_scan_state (
+    source VARCHAR(20) PRIMARY KEY,
+    last_document_id INTEGER,
+    keywords_hash VARCHAR(64),
+    scanned_at TIMESTAMP
+);
@@ -0,0 +1,25 @@
+-- Indexes for the dashboard's filter, join and sort patterns.
+-- Run `python -m db.explain_benchmark` for the before/after EXPLAIN report of each one.
+
+-- Composite (brand, date) indexes: every endpoint filters on brand plus a date BETWEEN
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_brand_review_date ON reviewed_product (brand, review_date);
+CREATE INDEX IF NOT EXISTS ix_social_media_brand_post_date ON social_media (brand, post_date);
+CREATE INDEX IF NOT EXISTS ix_campaign_performance_brand_start_date ON campaign_performance (brand, start_date);
+CREATE INDEX IF NOT EXISTS ix_sustainability_mention_brand_document_date ON sustainability_mention (brand, document_date);
+
+-- sales has no brand column; brand comes from product_catalog through sale_product
+CREATE INDEX IF NOT EXISTS ix_sales_purchase_date ON sales (purchase_date);
+CREATE INDEX IF NOT EXISTS ix_product_catalog_brand ON product_catalog (brand);
+
+-- Foreign keys used in joins
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_product_id_review_date ON reviewed_product (product_id, review_date);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_customer_id ON reviewed_product (customer_id);
+CREATE INDEX IF NOT EXISTS ix_sale_product_transaction_id ON sale_product (transaction_id);
+CREATE INDEX IF NOT EXISTS ix_sale_product_product_id_transaction_id ON sale_product (product_id, transaction_id);
+CREATE INDEX IF NOT EXISTS ix_sales_customer_id ON sales (customer_id);
+CREATE INDEX IF NOT EXISTS ix_campaign_product_id ON campaign (product_id);
+
+-- GIN indexes for containment / key-existence filters on arrays and JSONB
+CREATE INDEX IF NOT EXISTS ix_social_media_hashtags ON social_media USING gin (hashtags);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_keyword_tags ON reviewed_product USING gin (keyword_tags);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_aspect_sentiments ON reviewed_product USING gin (aspect_sentiments);
@@ -0,0 +1,126 @@
+-- Declarative monthly range partitioning of the tables that grow by date.
+-- Every dashboard query carries a date range, so the planner only touches the
+-- partitions for the requested months. db/partitions.py creates upcoming months.
+--
+-- Primary keys become (id, date) because unique constraints on a partitioned
+-- table must include the partition key. For the same reason the foreign keys
+-- sentiment_social_media.id_post -> social_media and
+-- sale_product.transaction_id -> sales are dropped (PostgreSQL cannot reference
+-- a partitioned table by a column that is not unique on its own).
+
+-- Create the partition of `parent` holding `month`, moving any rows that had
+-- landed in the default partition for that month into it.
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent text, date_column text, month date)
+RETURNS boolean AS $$
+DECLARE
+    start_date date := date_trunc('month', month)::date;
+    end_date date := (date_trunc('month', month) + interval '1 month')::date;
+    partition_name text := parent || '_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent);
+    IF to_regclass(parent || '_default') IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+            parent || '_default', date_column, start_date, date_column, end_date, partition_name
+        );
+    END IF;
+    EXECUTE format(
+        'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        parent, partition_name, start_date, end_date
+    );
+    RETURN true;
+END
+$$ LANGUAGE plpgsql;
+
+-- Rebuild `parent` as a table partitioned by month on `date_column`, keeping
+-- its columns, defaults, serial sequence, data and outgoing foreign keys.
+CREATE OR REPLACE FUNCTION partition_table_by_month(parent text, id_column text, date_column text, months_ahead int)
+RETURNS void AS $$
+DECLARE
+    legacy text := parent || '_legacy';
+    serial_sequence text;
+    null_dates bigint;
+    foreign_keys text[];
+    foreign_key text;
+    referencing record;
+    first_month date;
+    last_month date;
+    month date;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = parent::regclass) THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format('SELECT count(*) FROM %I WHERE %I IS NULL', parent, date_column) INTO null_dates;
+    IF null_dates > 0 THEN
+        RAISE EXCEPTION '% rows in % have no %, fix them before partitioning', null_dates, parent, date_column;
+    END IF;
+
+    -- Foreign keys pointing at this table cannot survive partitioning
+    FOR referencing IN
+        SELECT conrelid::regclass AS table_name, conname
+        FROM pg_constraint
+        WHERE confrelid = parent::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', referencing.table_name, referencing.conname);
+    END LOOP;
+
+    SELECT array_agg(pg_get_constraintdef(oid)) INTO foreign_keys
+    FROM pg_constraint
+    WHERE conrelid = parent::regclass AND contype = 'f';
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', parent, legacy);
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (%I)',
+        parent, legacy, date_column
+    );
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+
+    EXECUTE format(
+        'SELECT date_trunc(''month'', min(%I))::date, date_trunc(''month'', greatest(max(%I), current_date))::date FROM %I',
+        date_column, date_column, legacy
+    ) INTO first_month, last_month;
+    month := coalesce(first_month, date_trunc('month', current_date)::date);
+    WHILE month <= last_month + make_interval(months => months_ahead) LOOP
+        PERFORM create_monthly_partition(parent, date_column, month);
+        month := (month + interval '1 month')::date;
+    END LOOP;
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', parent, legacy);
+
+    serial_sequence := pg_get_serial_sequence(legacy, id_column);
+    IF serial_sequence IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', serial_sequence, parent, id_column);
+    END IF;
+    EXECUTE format('DROP TABLE %I', legacy);
+
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I PRIMARY KEY (%I, %I)', parent, parent || '_pkey', id_column, date_column);
+    FOREACH foreign_key IN ARRAY coalesce(foreign_keys, '{}') LOOP
+        EXECUTE format('ALTER TABLE %I ADD %s', parent, foreign_key);
+    END LOOP;
+END
+$$ LANGUAGE plpgsql;
+
+SELECT partition_table_by_month('reviewed_product', 'customer_review_id', 'review_date', 3);
+SELECT partition_table_by_month('social_media', 'social_media_post_id', 'post_date', 3);
+SELECT partition_table_by_month('sales', 'transaction_id', 'purchase_date', 3);
+
+-- Indexes from 0002 were dropped with the legacy tables; recreate them on the
+-- partitioned parents so every partition gets them.
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_brand_review_date ON reviewed_product (brand, review_date);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_product_id_review_date ON reviewed_product (product_id, review_date);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_customer_id ON reviewed_product (customer_id);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_keyword_tags ON reviewed_product USING gin (keyword_tags);
+CREATE INDEX IF NOT EXISTS ix_reviewed_product_aspect_sentiments ON reviewed_product USING gin (aspect_sentiments);
+CREATE INDEX IF NOT EXISTS ix_social_media_brand_post_date ON social_media (brand, post_date);
+CREATE INDEX IF NOT EXISTS ix_social_media_hashtags ON social_media USING gin (hashtags);
+CREATE INDEX IF NOT EXISTS ix_sales_purchase_date ON sales (purchase_date);
+CREATE INDEX IF NOT EXISTS ix_sales_customer_id ON sales (customer_id);
+
+ANALYZE reviewed_product;
+ANALYZE social_media;
+ANALYZE sales;
@@ -0,0 +1,41 @@
+-- reviewed_product.brand duplicates product_catalog.brand so the reviews
+-- endpoints can filter by brand without joining the catalog. These triggers
+-- keep the copy in sync; db/review_queries.py has a check that repairs drift.
+
+CREATE OR REPLACE FUNCTION reviewed_product_copy_brand()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.product_id IS NOT NULL THEN
+        SELECT brand INTO NEW.brand FROM product_catalog WHERE product_id = NEW.product_id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reviewed_product_copy_brand ON reviewed_product;
+CREATE TRIGGER reviewed_product_copy_brand
+    BEFORE INSERT OR UPDATE OF product_id, brand ON reviewed_product
+    FOR EACH ROW EXECUTE FUNCTION reviewed_product_copy_brand();
+
+CREATE OR REPLACE FUNCTION product_catalog_propagate_brand()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE reviewed_product
+    SET brand = NEW.brand
+    WHERE product_id = NEW.product_id AND brand IS DISTINCT FROM NEW.brand;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_catalog_propagate_brand ON product_catalog;
+CREATE TRIGGER product_catalog_propagate_brand
+    AFTER UPDATE OF brand ON product_catalog
+    FOR EACH ROW WHEN (OLD.brand IS DISTINCT FROM NEW.brand)
+    EXECUTE FUNCTION product_catalog_propagate_brand();
+
+-- Repair rows written before the triggers existed
+UPDATE reviewed_product r
+SET brand = p.brand
+FROM product_catalog p
+WHERE p.product_id = r.product_id
+  AND r.brand IS DISTINCT FROM p.brand;
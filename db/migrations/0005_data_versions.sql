@@ -0,0 +1,44 @@
+-- Per-table data version, bumped once per statement that writes the table.
+-- The agent's SQL-result cache and the chat answer cache key their entries
+-- on these versions, so any ingestion makes them miss. The HTTP response
+-- cache does not read them; it is invalidated by NOTIFY (0006) and its TTL.
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO data_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, now())
+    ON CONFLICT (table_name) DO UPDATE
+    SET version = data_versions.version + 1, updated_at = now();
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_data_version(table_name text)
+RETURNS void AS $$
+BEGIN
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', table_name || '_data_version', table_name);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+        'FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()',
+        table_name || '_data_version', table_name
+    );
+    INSERT INTO data_versions (table_name) VALUES (table_name) ON CONFLICT DO NOTHING;
+END
+$$ LANGUAGE plpgsql;
+
+SELECT track_data_version('reviewed_product');
+SELECT track_data_version('product_catalog');
+SELECT track_data_version('social_media');
+SELECT track_data_version('sentiment_social_media');
+SELECT track_data_version('sales');
+SELECT track_data_version('sale_product');
+SELECT track_data_version('customer_demographics');
+SELECT track_data_version('campaign_performance');
+SELECT track_data_version('sustainability_mention');
@@ -0,0 +1,107 @@
+-- NOTIFY data_changed with the brand and date range touched by each write,
+-- so every worker can evict exactly the cached responses that cover it.
+-- Payload: {"table": ..., "brand": ..., "start": "YYYY-MM-DD", "end": "YYYY-MM-DD"}.
+-- A null brand or date means "any": the change could not be narrowed down.
+
+-- TG_ARGV[0] selects (brand, day) from the transition table changed_rows.
+-- Changes are grouped per brand and month to keep notifications few but precise.
+CREATE OR REPLACE FUNCTION notify_data_changed()
+RETURNS trigger AS $$
+DECLARE
+    change record;
+BEGIN
+    FOR change IN EXECUTE format(
+        'SELECT brand, min(day) AS start_date, max(day) AS end_date '
+        'FROM (%s) changes GROUP BY brand, date_trunc(''month'', day)',
+        TG_ARGV[0]
+    ) LOOP
+        PERFORM pg_notify('data_changed', json_build_object(
+            'table', TG_TABLE_NAME,
+            'brand', change.brand,
+            'start', change.start_date,
+            'end', change.end_date
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- For tables without a usable brand/date, and for TRUNCATE
+CREATE OR REPLACE FUNCTION notify_table_changed()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('data_changed', json_build_object('table', TG_TABLE_NAME)::text);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_changes_on(table_name text, changes_sql text)
+RETURNS void AS $$
+DECLARE
+    trigger_name text;
+BEGIN
+    FOREACH trigger_name IN ARRAY ARRAY['insert', 'update_old', 'update_new', 'delete', 'truncate'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', table_name || '_notify_' || trigger_name, table_name);
+    END LOOP;
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS changed_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION notify_data_changed(%L)',
+        table_name || '_notify_insert', table_name, changes_sql
+    );
+    -- An update can move a row between brands or dates, so both sides are notified
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS changed_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION notify_data_changed(%L)',
+        table_name || '_notify_update_old', table_name, changes_sql
+    );
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS changed_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION notify_data_changed(%L)',
+        table_name || '_notify_update_new', table_name, changes_sql
+    );
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS changed_rows '
+        'FOR EACH STATEMENT EXECUTE FUNCTION notify_data_changed(%L)',
+        table_name || '_notify_delete', table_name, changes_sql
+    );
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER TRUNCATE ON %I FOR EACH STATEMENT EXECUTE FUNCTION notify_table_changed()',
+        table_name || '_notify_truncate', table_name
+    );
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_table_changes_on(table_name text)
+RETURNS void AS $$
+BEGIN
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', table_name || '_notify_changes', table_name);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+        'FOR EACH STATEMENT EXECUTE FUNCTION notify_table_changed()',
+        table_name || '_notify_changes', table_name
+    );
+END
+$$ LANGUAGE plpgsql;
+
+SELECT notify_changes_on('reviewed_product',
+    'SELECT brand, review_date AS day FROM changed_rows');
+SELECT notify_changes_on('social_media',
+    'SELECT brand, post_date AS day FROM changed_rows');
+SELECT notify_changes_on('sentiment_social_media',
+    'SELECT s.brand, s.post_date AS day FROM changed_rows c '
+    'LEFT JOIN social_media s ON s.social_media_post_id = c.id_post');
+-- Sales rows are usually loaded before their sale_product rows, in which case
+-- the brand is unknown and the change covers every brand on those dates
+SELECT notify_changes_on('sales',
+    'SELECT p.brand, c.purchase_date AS day FROM changed_rows c '
+    'LEFT JOIN sale_product sp ON sp.transaction_id = c.transaction_id '
+    'LEFT JOIN product_catalog p ON p.product_id = sp.product_id');
+SELECT notify_changes_on('sale_product',
+    'SELECT p.brand, s.purchase_date AS day FROM changed_rows c '
+    'LEFT JOIN sales s ON s.transaction_id = c.transaction_id '
+    'LEFT JOIN product_catalog p ON p.product_id = c.product_id');
+
+SELECT notify_table_changes_on('product_catalog');
+SELECT notify_table_changes_on('customer_demographics');
+SELECT notify_table_changes_on('campaign_performance');
+SELECT notify_table_changes_on('sustainability_mention');
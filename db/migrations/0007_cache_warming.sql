@@ -0,0 +1,25 @@
+-- Request counts per analytics URL and day, flushed by every worker, from
+-- which the cache warmer picks the most popular brand/date combinations.
+CREATE TABLE IF NOT EXISTS cache_popularity (
+    path VARCHAR(255) NOT NULL,
+    query TEXT NOT NULL,
+    day DATE NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (path, query, day)
+);
+
+CREATE INDEX IF NOT EXISTS ix_cache_popularity_day ON cache_popularity (day);
+
+-- Outcome of every URL of the last warming run, for the admin report
+CREATE TABLE IF NOT EXISTS cache_warm_results (
+    path VARCHAR(255) NOT NULL,
+    query TEXT NOT NULL,
+    run_started_at TIMESTAMP NOT NULL,
+    reason VARCHAR(50) NOT NULL,
+    hits INTEGER NOT NULL,
+    status_code INTEGER,
+    cache_status VARCHAR(10),
+    seconds DOUBLE PRECISION,
+    warmed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (path, query)
+);
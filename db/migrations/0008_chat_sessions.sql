@@ -0,0 +1,15 @@
+-- Chat sessions shared by every worker, so any worker can continue a
+-- conversation. Ended sessions are kept until the sweeper purges them, so
+-- their clients can be told the session expired.
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id VARCHAR(36) PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    last_active TIMESTAMP NOT NULL DEFAULT now(),
+    messages INTEGER NOT NULL DEFAULT 0,
+    ended_at TIMESTAMP,
+    end_reason VARCHAR(20)
+);
+
+CREATE INDEX IF NOT EXISTS ix_chat_sessions_active_last_active
+    ON chat_sessions (last_active)
+    WHERE ended_at IS NULL;
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, Date, Boolean, ForeignKey, ARRAY, JSON, DECIMAL, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, Boolean, ForeignKey, ARRAY, JSON, DECIMAL, Text, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from db.database import Base
 
 class ProductCatalog(Base):
     __tablename__ = "product_catalog"
+    __table_args__ = (
+        Index("ix_product_catalog_brand", "brand"),
+    )
     
     product_id = Column(Integer, primary_key=True, index=True)
     product_name = Column(String(255), nullable=False)
@@ -33,9 +36,18 @@ class ProductCatalog(Base):
 
 class ReviewedProduct(Base):
     __tablename__ = "reviewed_product"
+    __table_args__ = (
+        Index("ix_reviewed_product_brand_review_date", "brand", "review_date"),
+        Index("ix_reviewed_product_product_id_review_date", "product_id", "review_date"),
+        Index("ix_reviewed_product_customer_id", "customer_id"),
+        Index("ix_reviewed_product_keyword_tags", "keyword_tags", postgresql_using="gin"),
+        Index("ix_reviewed_product_aspect_sentiments", "aspect_sentiments", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (review_date)"},
+    )
     
-    customer_review_id = Column(Integer, primary_key=True, index=True)
-    review_date = Column(Date)
+    # Partitioned by month, so the partition key is part of the primary key
+    customer_review_id = Column(Integer, primary_key=True)
+    review_date = Column(Date, primary_key=True)
     review_text = Column(Text)
     sentiment_score = Column(DECIMAL)
     keyword_tags = Column(ARRAY(String))
@@ -65,6 +77,9 @@ class CustomerDemographics(Base):
 
 class Campaign(Base):
     __tablename__ = "campaign"
+    __table_args__ = (
+        Index("ix_campaign_product_id", "product_id"),
+    )
     
     campaign_id = Column(Integer, primary_key=True, index=True)
     name_campaign = Column(String(255), nullable=False)
@@ -92,10 +107,16 @@ class SentimentCampaign(Base):
 
 class SocialMedia(Base):
     __tablename__ = "social_media"
+    __table_args__ = (
+        Index("ix_social_media_brand_post_date", "brand", "post_date"),
+        Index("ix_social_media_hashtags", "hashtags", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (post_date)"},
+    )
     
-    social_media_post_id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by month, so the partition key is part of the primary key
+    social_media_post_id = Column(Integer, primary_key=True)
     platform = Column(String(100))
-    post_date = Column(Date)
+    post_date = Column(Date, primary_key=True)
     post_text = Column(Text)
     engagement_count = Column(Integer)
     reach_count = Column(Integer)
@@ -105,24 +126,40 @@ class SocialMedia(Base):
     collabs = Column(String(255))
     collabs_status = Column(String(50))
     jenis_konten = Column(String(100))
-    sentiment = relationship("SentimentSocialMedia", back_populates="post", uselist=False)
+    sentiment = relationship(
+        "SentimentSocialMedia",
+        primaryjoin="SocialMedia.social_media_post_id == foreign(SentimentSocialMedia.id_post)",
+        back_populates="post",
+        uselist=False
+    )
 
 class SentimentSocialMedia(Base):
     __tablename__ = "sentiment_social_media"
     
-    id_post = Column(Integer, ForeignKey("social_media.social_media_post_id"), primary_key=True)
+    # No database foreign key: social_media is partitioned and its id alone is not unique-constrained
+    id_post = Column(Integer, primary_key=True)
     comment = Column(Text)
     sentiment_score = Column(DECIMAL)
     total_likes = Column(Integer)
     total_replies = Column(Integer)
     
-    post = relationship("SocialMedia", back_populates="sentiment")
+    post = relationship(
+        "SocialMedia",
+        primaryjoin="foreign(SentimentSocialMedia.id_post) == SocialMedia.social_media_post_id",
+        back_populates="sentiment"
+    )
 
 class Sales(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_purchase_date", "purchase_date"),
+        Index("ix_sales_customer_id", "customer_id"),
+        {"postgresql_partition_by": "RANGE (purchase_date)"},
+    )
     
-    transaction_id = Column(Integer, primary_key=True, index=True)
-    purchase_date = Column(Date)
+    # Partitioned by month, so the partition key is part of the primary key
+    transaction_id = Column(Integer, primary_key=True)
+    purchase_date = Column(Date, primary_key=True)
     payment_method = Column(String)
     order_value = Column(Float)
     order_location = Column(String)
@@ -131,16 +168,29 @@ class Sales(Base):
     customer_id = Column(Integer, ForeignKey("customer_demographics.customer_id"))
     
     customer = relationship("CustomerDemographics", back_populates="sales")
-    sales_products = relationship("SalesProducts", back_populates="sale")
+    sales_products = relationship(
+        "SalesProducts",
+        primaryjoin="Sales.transaction_id == foreign(SalesProducts.transaction_id)",
+        back_populates="sale"
+    )
 
 class SalesProducts(Base):
     __tablename__ = "sale_product"
+    __table_args__ = (
+        Index("ix_sale_product_transaction_id", "transaction_id"),
+        Index("ix_sale_product_product_id_transaction_id", "product_id", "transaction_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    transaction_id = Column(Integer, ForeignKey("sales.transaction_id"))
+    # No database foreign key: sales is partitioned and its id alone is not unique-constrained
+    transaction_id = Column(Integer)
     product_id = Column(Integer, ForeignKey("product_catalog.product_id"))
     
-    sale = relationship("Sales", back_populates="sales_products")
+    sale = relationship(
+        "Sales",
+        primaryjoin="foreign(SalesProducts.transaction_id) == Sales.transaction_id",
+        back_populates="sales_products"
+    )
     product = relationship("ProductCatalog", back_populates="sales_products")
 
 class SustainabilityIntegration(Base):
@@ -149,3 +199,75 @@ class SustainabilityIntegration(Base):
     column_name = Column(String(255), primary_key=True)
     eco_friendly_keyword_usage = Column(ARRAY(String))
     sustainability_sentiment_score = Column(DECIMAL)
+
+
+class CampaignPerformance(Base):
+    __tablename__ = "campaign_performance"
+    __table_args__ = (
+        Index("ix_campaign_performance_brand_start_date", "brand", "start_date"),
+    )
+    
+    campaign_id = Column(Integer, ForeignKey("campaign.campaign_id"), primary_key=True)
+    name_campaign = Column(String(255))
+    brand = Column(String(100))
+    product_id = Column(Integer)
+    platform = Column(String(100))
+    category = Column(String(100))
+    format_type = Column(String(100))
+    start_date = Column(Date)
+    end_date = Column(Date)
+    window_days = Column(Integer)
+    budget = Column(DECIMAL)
+    reach = Column(Integer)
+    target_engagement = Column(Integer)
+    reach_vs_target = Column(Float)
+    cost_per_reach = Column(Float)
+    campaign_sentiment = Column(Float)
+    reviews_before = Column(Integer)
+    reviews_during = Column(Integer)
+    review_sentiment_before = Column(Float)
+    review_sentiment_during = Column(Float)
+    review_sentiment_delta = Column(Float)
+    posts_before = Column(Integer)
+    posts_during = Column(Integer)
+    social_engagement_before = Column(Float)
+    social_engagement_during = Column(Float)
+    social_sentiment_before = Column(Float)
+    social_sentiment_during = Column(Float)
+    social_sentiment_delta = Column(Float)
+    transactions_before = Column(Integer)
+    transactions_during = Column(Integer)
+    sales_value_before = Column(Float)
+    sales_value_during = Column(Float)
+    sales_value_delta = Column(Float)
+    sales_lift_per_budget = Column(Float)
+    refreshed_at = Column(DateTime)
+
+class SustainabilityMention(Base):
+    __tablename__ = "sustainability_mention"
+    __table_args__ = (
+        Index("ix_sustainability_mention_brand_document_date", "brand", "document_date"),
+    )
+    
+    source = Column(String(20), primary_key=True)
+    document_id = Column(Integer, primary_key=True)
+    brand = Column(String(100))
+    document_date = Column(Date)
+    sentiment_score = Column(DECIMAL)
+    hit_count = Column(Integer)
+    keyword_hits = Column(JSONB)
+
+class SustainabilityScanState(Base):
+    __tablename__ = "sustainability_scan_state"
+    
+    source = Column(String(20), primary_key=True)
+    last_document_id = Column(Integer)
+    keywords_hash = Column(String(64))
+    scanned_at = Column(DateTime)
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    table_name = Column(String(63), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,83 @@
+from sqlalchemy import text
+from db.database import get_db_session
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Months of empty partitions kept ahead of today, so new rows never land in
+# the default partition
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# (table, partition column) pairs converted by migration 0003
+PARTITIONED_TABLES = [
+    ("reviewed_product", "review_date"),
+    ("social_media", "post_date"),
+    ("sales", "purchase_date"),
+]
+
+# Arbitrary key so only one worker creates partitions at a time
+PARTITION_LOCK_KEY = 29001
+
+def ensure_partitions(db, months_ahead: int = MONTHS_AHEAD):
+    """
+    Create the monthly partitions from the current month up to `months_ahead`
+
+    Rows that were stored in a table's default partition for one of these
+    months are moved into the new partition by create_monthly_partition().
+
+    Returns:
+        list of created partition names, or None when another worker holds the lock
+    """
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY}).scalar():
+        db.rollback()
+        return None
+
+    created = []
+    for table, column in PARTITIONED_TABLES:
+        months = db.execute(text("""
+            SELECT generate_series(
+                date_trunc('month', current_date),
+                date_trunc('month', current_date) + make_interval(months => :months_ahead),
+                interval '1 month'
+            )::date
+        """), {"months_ahead": months_ahead}).scalars().all()
+        for month in months:
+            if db.execute(
+                text("SELECT create_monthly_partition(:table, :column, :month)"),
+                {"table": table, "column": column, "month": month}
+            ).scalar():
+                created.append(f"{table}_p{month:%Y%m}")
+    db.commit()
+    return created
+
+def partition_maintenance_job():
+    """Scheduler entry point for the daily partition maintenance"""
+    db = get_db_session()
+    try:
+        created = ensure_partitions(db)
+        if created:
+            logger.info(f"Created partitions: {', '.join(created)}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error in partition maintenance: {str(e)}")
+    finally:
+        db.close()
+
+def schedule_partition_maintenance(scheduler):
+    """Register the daily partition maintenance on the shared scheduler"""
+    scheduler.add_job(
+        partition_maintenance_job,
+        "cron",
+        hour=1,
+        id="partition_maintenance",
+        replace_existing=True
+    )
+
+
+if __name__ == "__main__":
+    db = get_db_session()
+    try:
+        print(ensure_partitions(db))
+    finally:
+        db.close()
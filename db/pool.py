@@ -0,0 +1,73 @@
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+import os
+
+# Upper bounds, in milliseconds, of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long checkouts wait for a connection
+
+    Every checkout is timed, including the time to open an overflow
+    connection, and counted in a histogram. Checkouts that give
+    up after `pool_timeout` are counted separately.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics_lock = threading.Lock()
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_overflow_seen = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self.metrics_lock:
+                self.timeouts += 1
+            raise
+        self._record_wait(time.perf_counter() - started)
+        return connection
+
+    def _record_wait(self, seconds):
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if milliseconds <= bound), len(WAIT_BUCKETS_MS))
+        with self.metrics_lock:
+            self.wait_buckets[bucket] += 1
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self.max_overflow_seen = max(self.max_overflow_seen, self.overflow())
+
+    def metrics(self):
+        """Current occupancy and checkout wait statistics of this worker's pool"""
+        with self.metrics_lock:
+            # Cumulative like Prometheus: each bucket counts the checkouts that waited at most that long
+            histogram = {}
+            total = 0
+            for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets):
+                total += count
+                histogram[f"le{bound}ms"] = total
+            histogram["inf"] = total + self.wait_buckets[-1]
+            return {
+                "pid": os.getpid(),
+                "size": self.size(),
+                "maxOverflow": self._max_overflow,
+                "checkedOut": self.checkedout(),
+                "checkedIn": self.checkedin(),
+                # Negative until the pool has opened `size` connections
+                "overflow": self.overflow(),
+                "maxOverflowSeen": self.max_overflow_seen,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avgWaitMs": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0,
+                "maxWaitMs": round(self.max_wait * 1000, 3),
+                "waitHistogram": histogram
+            }
@@ -0,0 +1,95 @@
+from sqlalchemy import event, text
+import itertools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How far behind the primary a replica may be, measured in the time since the
+# last transaction it replayed while it still has WAL to apply
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+class ReplicaRouter:
+    """
+    Round-robin choice of a healthy read replica, falling back to the primary
+
+    A replica is taken out of rotation when a health check fails, when it
+    lags more than `max_lag` seconds, or when a query on it loses its
+    connection. `check_health` puts it back once it answers again.
+
+    Args:
+        engines: Engines of the read replicas, may be empty
+        fallback: Engine used when no replica is healthy, usually the primary
+        max_lag (float): Seconds of replication lag a replica may have
+    """
+    def __init__(self, engines, fallback, max_lag: float):
+        self.engines = list(engines)
+        self.fallback = fallback
+        self.max_lag = max_lag
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.state = {
+            engine: {"healthy": True, "lagSeconds": None, "lastError": None, "checkedAt": None}
+            for engine in self.engines
+        }
+        self.fallbacks = 0
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def get_engine(self):
+        """Get the next healthy replica engine, or the fallback engine"""
+        if not self.engines:
+            return self.fallback
+        start = next(self.counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self.state[engine]["healthy"]:
+                return engine
+        with self.lock:
+            self.fallbacks += 1
+        return self.fallback
+
+    def check_health(self):
+        """Ping every replica and update whether it may receive reads"""
+        for engine in self.engines:
+            try:
+                with engine.connect() as conn:
+                    lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+                healthy = lag <= self.max_lag
+                error = None if healthy else f"replication lag {lag:.1f}s exceeds {self.max_lag}s"
+            except Exception as e:
+                lag, healthy, error = None, False, str(e)
+            self._set_state(engine, healthy, lag, error)
+
+    def _on_error(self, context):
+        # Connection failures take the replica out until the next health check
+        if context.is_disconnect or context.connection is None:
+            self._set_state(context.engine, False, None, str(context.original_exception))
+
+    def _set_state(self, engine, healthy, lag, error):
+        with self.lock:
+            was_healthy = self.state[engine]["healthy"]
+            self.state[engine] = {"healthy": healthy, "lagSeconds": lag, "lastError": error, "checkedAt": time.time()}
+        if was_healthy and not healthy:
+            logger.error(f"Read replica {engine.url.render_as_string()} taken out of rotation: {error}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "fallbacks": self.fallbacks,
+                "replicas": [
+                    {
+                        "url": engine.url.render_as_string(),
+                        **self.state[engine],
+                        "pool": engine.pool.metrics() if hasattr(engine.pool, "metrics") else None
+                    }
+                    for engine in self.engines
+                ]
+            }
@@ -0,0 +1,131 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+from db.database import get_db_session
+from db.models import ReviewedProduct, ProductCatalog
+from tools.filters import AnalyticsFilter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key so only one worker runs the consistency job
+CONSISTENCY_LOCK_KEY = 30001
+
+def references_catalog(entity):
+    """Check whether a queried entity or expression reads from product_catalog"""
+    if entity is ProductCatalog:
+        return True
+    if isinstance(entity, type):
+        return False
+    clause = entity.__clause_element__() if hasattr(entity, "__clause_element__") else entity
+    return any(
+        table is ProductCatalog.__table__
+        for table in find_tables(clause, check_columns=True, include_aliases=True)
+    )
+
+def review_query(
+    db: Session,
+    *entities,
+    filters: AnalyticsFilter = None,
+    product_name: str = None,
+    join_catalog: bool = False
+):
+    """
+    Build a reviews query filtered by an AnalyticsFilter and product name
+
+    The brand filter always uses the denormalized reviewed_product.brand column,
+    so product_catalog is only joined when a catalog column is selected, the
+    product_name filter is used, or the caller asks for it with join_catalog
+    (e.g. to order by a catalog column).
+
+    Args:
+        db: Database session
+        *entities: Entities or columns to select, ReviewedProduct by default
+        filters (AnalyticsFilter): Brand and review_date range to filter on
+        product_name (str): Catalog product name to filter on
+        join_catalog (bool): Join product_catalog even if nothing selected needs it
+    """
+    entities = entities or (ReviewedProduct,)
+    query = db.query(*entities)
+
+    if join_catalog or product_name or any(references_catalog(e) for e in entities):
+        query = query.join(ProductCatalog, ReviewedProduct.product_id == ProductCatalog.product_id)
+
+    conditions = filters.conditions(ReviewedProduct.brand, ReviewedProduct.review_date) if filters else []
+    if product_name:
+        conditions.append(ProductCatalog.product_name == product_name)
+
+    return query.filter(*conditions)
+
+def check_review_brand_consistency(db: Session, fix: bool = False):
+    """
+    Count reviews whose brand differs from their catalog product's brand
+
+    Migration 0004 keeps the column in sync with triggers; this check catches
+    anything written while the triggers were disabled (e.g. bulk loads).
+
+    Args:
+        db: Database session
+        fix (bool): Copy the catalog brand onto the mismatched reviews
+
+    Returns:
+        dict with the number of mismatched and fixed reviews
+    """
+    mismatched = db.execute(text("""
+        SELECT count(*)
+        FROM reviewed_product r
+        JOIN product_catalog p ON p.product_id = r.product_id
+        WHERE r.brand IS DISTINCT FROM p.brand
+    """)).scalar()
+
+    fixed = 0
+    if fix and mismatched:
+        fixed = db.execute(text("""
+            UPDATE reviewed_product r
+            SET brand = p.brand
+            FROM product_catalog p
+            WHERE p.product_id = r.product_id
+              AND r.brand IS DISTINCT FROM p.brand
+        """)).rowcount
+        db.commit()
+
+    return {"mismatched": mismatched, "fixed": fixed}
+
+def review_brand_consistency_job():
+    """Scheduler entry point that repairs drifted review brands"""
+    db = get_db_session()
+    try:
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": CONSISTENCY_LOCK_KEY}).scalar():
+            return
+        result = check_review_brand_consistency(db, fix=True)
+        if result["mismatched"]:
+            logger.error(f"reviewed_product.brand was out of sync with product_catalog: {result}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error checking review brand consistency: {str(e)}")
+    finally:
+        db.close()
+
+def schedule_review_brand_consistency_check(scheduler):
+    """Register the daily consistency check on the shared scheduler"""
+    scheduler.add_job(
+        review_brand_consistency_job,
+        "cron",
+        hour=3,
+        id="review_brand_consistency",
+        replace_existing=True
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check reviewed_product.brand against product_catalog")
+    parser.add_argument("--fix", action="store_true", help="repair mismatched reviews")
+    args = parser.parse_args()
+
+    db = get_db_session()
+    try:
+        print(check_review_brand_consistency(db, fix=args.fix))
+    finally:
+        db.close()
@@ -3,15 +3,33 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import db.models
-from db.database import SessionLocal, engine, get_db
+from db.database import SessionLocal, engine, get_db, configure_threadpool, schedule_replica_health_checks
 import uvicorn
 from routes_social_media import router as social_media_router
 from routes_social_media_sentiment import router as sentiment_router
 from routes_product_review_sentiment import router as product_review_router
 from routes_sales import router as sales_router
 from routes_ai_chatbot import router as ai_router
+from routes_campaign import router as campaign_router
+from routes_sustainability import router as sustainability_router
+from routes_admin import router as admin_router
 import logging
 from tools.faiss_vectordb import load_vector_db
+from tools.langchain_rag import get_rag_agent
+from tools.chat_checkpointer import open_checkpointer, close_checkpointer
+from starlette.concurrency import run_in_threadpool
+from tools.scheduler import scheduler, start_scheduler, shutdown_scheduler
+from db.campaign_performance import schedule_campaign_performance_refresh
+from db.migrate import warn_pending_migrations
+from db.partitions import schedule_partition_maintenance
+from db.review_queries import schedule_review_brand_consistency_check
+from tools.sustainability_matcher import schedule_sustainability_scan
+from tools.cache_invalidation import start_invalidation_listener, stop_invalidation_listener
+from tools.cache_warmer import schedule_cache_warming
+from tools.request_popularity import popularity
+from tools.chat_sessions import schedule_chat_session_sweep
+from tools.dashboard_summary import schedule_summary_precompute
+from tools.proper_nouns import schedule_proper_noun_refresh
 
 # Set up logging
 logging.basicConfig(
@@ -61,10 +79,55 @@ app.include_router(sentiment_router)
 app.include_router(product_review_router)
 app.include_router(sales_router)
 app.include_router(ai_router)
+app.include_router(campaign_router)
+app.include_router(sustainability_router)
+app.include_router(admin_router)
 
 # Make vector_store available to routes
 app.state.vector_store = vector_store
 
+@app.on_event("startup")
+async def size_threadpool():
+    # The thread limiter belongs to the event loop, so this must run on it
+    configure_threadpool()
+
+@app.on_event("startup")
+def start_background_jobs():
+    warn_pending_migrations()
+    schedule_campaign_performance_refresh(scheduler)
+    schedule_sustainability_scan(scheduler)
+    schedule_partition_maintenance(scheduler)
+    schedule_review_brand_consistency_check(scheduler)
+    schedule_cache_warming(scheduler, app)
+    schedule_replica_health_checks(scheduler)
+    schedule_chat_session_sweep(scheduler)
+    schedule_summary_precompute(scheduler, app)
+    schedule_proper_noun_refresh(scheduler)
+    start_scheduler()
+    start_invalidation_listener()
+
+@app.on_event("startup")
+async def build_chat_agent():
+    # The checkpointer binds to the event loop; reflecting the schema takes
+    # seconds, so pay it once per worker, off the loop, before the first chat
+    try:
+        checkpointer = await open_checkpointer()
+        # Kept for the chat routes, which build the agent if it fails here
+        app.state.chat_checkpointer = checkpointer
+        await run_in_threadpool(get_rag_agent, app.state.vector_store, checkpointer)
+    except Exception as e:
+        logger.error(f"Failed to build the chat agent: {str(e)}")
+
+@app.on_event("shutdown")
+async def close_chat_checkpointer():
+    await close_checkpointer()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    stop_invalidation_listener()
+    shutdown_scheduler()
+    popularity.flush()
+
 # Root endpoint
 @app.get("/api")
 def read_root():
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from db.database import get_db, pool_metrics
+from tools.response_cache import response_cache
+from tools.single_flight import single_flight
+from tools.cache_warmer import get_warming_report, trigger_cache_warming
+from tools.chat_sessions import chat_sessions
+from tools.dashboard_summary import summary_cache, trigger_summary_precompute
+from tools.embedding_cache import query_embedding_cache
+from tools.sql_result_cache import sql_result_cache
+from tools.answer_cache import answer_cache
+from tools.scheduler import scheduler
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"]
+)
+
+@router.get("/")
+def test_endpoint():
+    return {"message": "Admin routes are working!"}
+
+@router.get("/db-pool")
+def get_db_pool_metrics(db: Session = Depends(get_db)):
+    """Get this worker's connection pool usage and checkout waits, with the server's connection limit"""
+    try:
+        metrics = pool_metrics()
+        metrics["server"] = {
+            "maxConnections": int(db.execute(text("SHOW max_connections")).scalar()),
+            "connections": db.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+            )).scalar()
+        }
+        return metrics
+    except Exception as e:
+        logger.error(f"Error in /db-pool endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache")
+def get_cache_stats():
+    """Get the size and hit/miss counters of this worker's caches, and its coalesced requests"""
+    return {
+        **response_cache.stats(),
+        "summaries": summary_cache.stats(),
+        "queryEmbeddings": query_embedding_cache.stats(),
+        "sqlResults": sql_result_cache.stats(),
+        "chatAnswers": answer_cache.stats(),
+        "singleFlight": single_flight.stats()
+    }
+
+@router.post("/cache/clear")
+def clear_cache(
+    prefix: str = Query("", description="Only drop entries of endpoints starting with this, e.g. routes_sales")
+):
+    """Drop cached responses from the configured backend (shared by all workers unless the backend is memory)"""
+    try:
+        return {"status": "success", "removed": response_cache.invalidate(prefix)}
+    except Exception as e:
+        logger.error(f"Error in /cache/clear endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/warming")
+def get_cache_warming(db: Session = Depends(get_db)):
+    """Get the URLs warmed by the last cache warming run and the time it saved"""
+    try:
+        return get_warming_report(db)
+    except Exception as e:
+        logger.error(f"Error in /cache/warming endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/cache/warm")
+def warm_cache_now(request: Request):
+    """Start a cache warming run in the background"""
+    try:
+        trigger_cache_warming(scheduler, request.app, "manual")
+        return {"status": "scheduled"}
+    except Exception as e:
+        logger.error(f"Error in /cache/warm endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/summaries/precompute")
+def precompute_summaries_now(request: Request):
+    """Start summarizing every brand's default dashboard view in the background"""
+    try:
+        trigger_summary_precompute(scheduler, request.app)
+        return {"status": "scheduled"}
+    except Exception as e:
+        logger.error(f"Error in /summaries/precompute endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/chat-sessions")
+def get_chat_sessions(top: int = Query(20, ge=0, le=500, description="Number of largest sessions to list")):
+    """Get the chat session count and evictions of all workers, from the shared chat_sessions table, and the estimated history size"""
+    try:
+        return chat_sessions.stats(top)
+    except Exception as e:
+        logger.error(f"Error in /chat-sessions endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
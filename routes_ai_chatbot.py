@@ -2,15 +2,23 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 import logging
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from datetime import date
+from sqlalchemy.orm import Session
 import json
 import httpx
-from tools.langchain_rag import LangChainRAG
-from fastapi.middleware.cors import CORSMiddleware
-import time
+from tools.langchain_rag import get_rag_agent
+from tools.chat_sessions import chat_sessions
+from tools.answer_cache import answer_cache, BYPASS_HEADER
+from tools.dashboard_summary import summarize, summary_key, get_cached_summary, stream_summary, view_client, fetch_digest
+from tools.dashboard_digest import DIGEST_TABLES, build_digest
+from tools.filters import AnalyticsFilter, analytics_filter
+from tools.response_cache import cached_response
+from db.database import get_read_db
+from starlette.concurrency import run_in_threadpool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,27 +39,26 @@ load_dotenv()
 # Configure OpenAI
 api_key = os.getenv('OPENAI_API_KEY')
 
-# Initialize OpenAI client with custom httpx client
-http_client = httpx.Client()
-client = OpenAI(
+# Initialize OpenAI client with custom httpx client; async so awaiting the
+# model never blocks the event loop
+http_client = httpx.AsyncClient()
+client = AsyncOpenAI(
     api_key=api_key,
     http_client=http_client
 )
 
-# Initialize dictionary to store RAG agents per session
-rag_agents = {}
-session_timestamps = {}
-SESSION_TIMEOUT = 43200  # 12 hours
+def shared_rag_agent(request: Request = None):
+    vector_store = request.app.state.vector_store if request else None
+    # The checkpointer opened at startup, so a lazily built agent still shares histories across workers
+    checkpointer = getattr(request.app.state, "chat_checkpointer", None) if request else None
+    return get_rag_agent(vector_store, checkpointer)
 
 def init_rag_agent(request: Request = None):
     try:
-        vector_store = request.app.state.vector_store if request else None
-        new_agent = LangChainRAG(vector_store=vector_store)
-        session_id = new_agent.config['configurable']['thread_id']
-        rag_agents[session_id] = new_agent
-        session_timestamps[session_id] = time.time()
+        # Build the shared agent now, so failures surface before the session exists
+        shared_rag_agent(request)
+        session_id = chat_sessions.create()
         logger.info(f" New session created: {session_id}")
-        logger.info(f" Active sessions: {len(rag_agents)}")
         return session_id
     except Exception as e:
         logger.error(f"Failed to initialize LangChainRAG agent: {str(e)}")
@@ -59,33 +66,108 @@ def init_rag_agent(request: Request = None):
 
 # Pydantic model for request validation
 class DashboardSummaryRequest(BaseModel):
-    dashboard_data: Dict[str, Any]
     brand: str
+    # Range to summarize, the default window if omitted
+    startDate: Optional[date] = None
+    endDate: Optional[date] = None
+    # Legacy: dashboard JSON posted by older clients, summarized as is instead of the server's digest
+    dashboard_data: Optional[Dict[str, Any]] = None
 
 # Pydantic model for chat request
 class ChatRequest(BaseModel):
     message: str
 
+async def summary_data(request: Request, summary_request: DashboardSummaryRequest):
+    """Get the digest of the requested brand and range, or the posted dashboard data"""
+    if summary_request.dashboard_data is not None:
+        return summary_request.dashboard_data
+    filters = analytics_filter(summary_request.brand, summary_request.startDate, summary_request.endDate)
+    async with view_client(request.app) as view:
+        return await fetch_digest(view, filters.brand, filters.start_date, filters.end_date)
+
+@router.get("/dashboard-digest")
+@cached_response(DIGEST_TABLES, previous_period=True)
+def get_dashboard_digest(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
+):
+    """Get the compact key metrics, changes and top movers that dashboard summaries are written from"""
+    try:
+        window = filters.with_default_range()
+        return {
+            "brand": window.brand,
+            "startDate": window.start_date.isoformat(),
+            "endDate": window.end_date.isoformat(),
+            "digest": build_digest(db, window)
+        }
+    except Exception as e:
+        logger.error(f"Error in /dashboard-digest endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/dashboard-summary")
-async def get_dashboard_summary(request: DashboardSummaryRequest):
+async def get_dashboard_summary(request: Request, summary_request: DashboardSummaryRequest):
     """
     Generate an AI summary for dashboard data
     """
     try:
-        # logger.info(f"Received request for brand: {request.brand}")
-        # logger.debug(f"Dashboard data: {json.dumps(request.dashboard_data, indent=2)}")
+        # logger.info(f"Received request for brand: {summary_request.brand}")
         
-        result = generate_dashboard_summary(request.dashboard_data, request.brand)
+        dashboard_data = await summary_data(request, summary_request)
+        result = await generate_dashboard_summary(dashboard_data, summary_request.brand)
         # logger.info(f"Generated summary status: {result['status']}")
         
         if result["status"] == "error":
             logger.error(f"Error in generate_dashboard_summary: {result['message']}")
             raise HTTPException(status_code=500, detail=result["message"])
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_dashboard_summary endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/dashboard-summary/stream")
+async def stream_dashboard_summary(request: Request, summary_request: DashboardSummaryRequest):
+    """
+    Stream an AI summary for dashboard data as server-sent events
+    """
+    try:
+        dashboard_data = await summary_data(request, summary_request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in stream_dashboard_summary endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    key = summary_key(dashboard_data, summary_request.brand)
+    cached = get_cached_summary(key)
+
+    async def event_generator():
+        try:
+            if cached is not None:
+                # A cached summary is sent whole
+                yield f"data: {json.dumps({'text': cached})}\n\n"
+            else:
+                async for text in stream_summary(client, dashboard_data, summary_request.brand, key):
+                    yield f"data: {json.dumps({'text': text})}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logger.error(f"Error in stream_dashboard_summary: {str(e)}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Content-Type": "text/event-stream;charset=utf-8",
+            # Keep proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+            "X-Cache": "MISS" if cached is None else "HIT"
+        }
+    )
+
 @router.post("/chat")
 async def chat_with_agent(request: Request, chat_request: ChatRequest):
     """
@@ -94,50 +176,72 @@ async def chat_with_agent(request: Request, chat_request: ChatRequest):
     try:
         session_id = request.headers.get("session-id")
         logger.info(f"🔄 Incoming chat request with session: {session_id}")
+        # Only opening questions are answered from the answer cache, later ones depend on the conversation
+        first_turn = not session_id
         
         # Create new session if none exists
-        if not session_id or session_id not in rag_agents.keys():
-            if not session_id:
-                logger.info("❌ No session ID provided")
-                session_id = init_rag_agent(request)
-            else:
-                logger.info(f"❌ Session {session_id} not found")
-                return JSONResponse(
-                    content={"status": "session no valid", "message": "Your Session is Invalid"},
-                    status_code=401
-                )
-        
-        # Check if session has expired
-        if session_id in session_timestamps and time.time() - session_timestamps[session_id] > SESSION_TIMEOUT:
+        if not session_id:
+            logger.info("❌ No session ID provided")
+            session_id = await run_in_threadpool(init_rag_agent, request)
+
+        # Record the message, which also checks whether the session is still alive
+        status = await run_in_threadpool(chat_sessions.touch, session_id)
+        if status == "missing":
+            logger.info(f"❌ Session {session_id} not found")
+            return JSONResponse(
+                content={"status": "session no valid", "message": "Your Session is Invalid"},
+                status_code=401
+            )
+        if status == "expired":
             logger.info(f"❌ Session {session_id} has expired")
             return JSONResponse(
                 content={"status": "session expired", "message": "Your Session is expired"},
                 status_code=401
             )
-            
-        logger.info(f" rag agents keys: {rag_agents.keys()}")
-        
-        # Update session timestamp
-        session_timestamps[session_id] = time.time()
         logger.info(f"✅ Using session: {session_id}")
         
-        # Get the agent for this session
-        rag_agent = rag_agents[session_id]
+        # Every session uses the shared agent with its own thread
+        rag_agent = shared_rag_agent(request)
+
+        cached_answer, cache_entry, cache_status = None, None, None
+        if first_turn:
+            bypass = request.headers.get(BYPASS_HEADER, "").lower() == "bypass"
+            try:
+                cached_answer, cache_entry = await answer_cache.lookup(chat_request.message, bypass=bypass)
+                cache_status = "BYPASS" if bypass else "HIT" if cached_answer is not None else "MISS"
+            except Exception as e:
+                # The agent answers as usual without the cache
+                logger.error(f"Answer cache lookup failed: {str(e)}")
         
         async def event_generator():
             try:
+                if cached_answer is not None:
+                    await rag_agent.record_exchange(chat_request.message, cached_answer, session_id)
+                    # Same chunks as the agent's, split after spaces
+                    for word in cached_answer.split(" ")[:-1]:
+                        yield f"data: {json.dumps({'text': word + ' '})}\n\n"
+                    yield f"data: {json.dumps({'text': cached_answer.split(' ')[-1]})}\n\n"
+                    yield "data: [DONE]\n\n"
+                    return
+
                 current_chunk = ""
-                async for chunk in rag_agent.run_agent(chat_request.message):
+                answer, failed = [], False
+                async for chunk in rag_agent.run_agent(chat_request.message, session_id):
                     if chunk:
                         try:
                             # Parse the chunk as JSON
                             chunk_data = json.loads(chunk)
+                            failed = failed or "error" in chunk_data
                             if chunk_data.get("text"):
+                                answer.append(chunk_data["text"])
                                 # Send the text chunk
                                 yield f"data: {json.dumps(chunk_data)}\n\n"
                         except json.JSONDecodeError:
                             # If chunk is not JSON, send it as raw text
+                            answer.append(chunk)
                             yield f"data: {json.dumps({'text': chunk})}\n\n"
+                if cache_entry is not None and answer and not failed:
+                    answer_cache.store(cache_entry, "".join(answer))
                 yield "data: [DONE]\n\n"
             except Exception as e:
                 logger.error(f"Error in event_generator: {str(e)}")
@@ -154,12 +258,14 @@ async def chat_with_agent(request: Request, chat_request: ChatRequest):
                 "Content-Type": "text/event-stream;charset=utf-8",
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Methods": "POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, session-id",
-                "Access-Control-Expose-Headers": "session-id",
+                "Access-Control-Allow-Headers": f"Content-Type, session-id, {BYPASS_HEADER}",
+                "Access-Control-Expose-Headers": f"session-id, {BYPASS_HEADER}",
                 "Access-Control-Max-Age": "86400",
                 "session-id": session_id
             }
         )
+        if cache_status:
+            response.headers[BYPASS_HEADER] = cache_status
         return response
     except Exception as e:
         logger.error(f"Error in chat_with_agent endpoint: {str(e)}", exc_info=True)
@@ -169,11 +275,9 @@ async def chat_with_agent(request: Request, chat_request: ChatRequest):
 async def reset_agent(request: Request):
     try:
         session_id = request.headers.get("session-id")
-        if session_id and session_id in rag_agents:
-            # Clean up old session
+        if session_id and await run_in_threadpool(chat_sessions.end, session_id):
+            # Old session and its history are cleaned up
             logger.info(f"Cleaning up session: {session_id}")
-            del rag_agents[session_id]
-            del session_timestamps[session_id]
             
         # Create new session
         new_session_id = ""
@@ -186,51 +290,20 @@ async def reset_agent(request: Request):
         logger.error(f"Error reinitializing agent: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_dashboard_summary(dashboard_data, brand):
+async def generate_dashboard_summary(dashboard_data, brand):
     """
-    Generate an AI summary of the entire dashboard data
+    Generate an AI summary of the entire dashboard data, or get it from the summary cache
     """
     try:
         # logger.info(f"Generating summary for brand: {brand}")
-        
-        # Prepare the prompt with dashboard data
-        prompt = f"""Analyze this dashboard data for {brand} and provide a comprehensive business summary:
-
-        Brand: {brand}
-        Dashboard Data: {json.dumps(dashboard_data, indent=2)}
-
-        Please provide:
-        1. Key performance insights
-        2. Actionable recommendations
-        
-        do not talk to much about the data. just provide the summary in the most easy way possible. 
-        the summary should be easy to understand. use high level perspective like we talk to CEOs.
-        do not use list, use numbering and paragraphs to explain the data. reposonse should be short and clear.
-        """
-        
-        # logger.debug(f"Generated prompt: {prompt}")
-
-        # Call OpenAI API
-        # logger.info("Calling OpenAI API...")
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a business analytics expert who provides clear, actionable insights from dashboard data."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1000
-        )
-        # logger.info("Received response from OpenAI API")
-
-        # Extract the summary
-        summary = response.choices[0].message.content
+        summary, cached = await summarize(client, dashboard_data, brand)
         logger.debug(f"Generated summary: {summary}")
 
         return {
             "status": "success",
             "summary": summary,
-            "brand": brand
+            "brand": brand,
+            "cached": cached
         }
 
     except Exception as e:
@@ -0,0 +1,129 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from db.database import get_db, get_read_db
+from db.models import CampaignPerformance
+from db.campaign_performance import refresh_campaign_performance
+from tools.filters import AnalyticsFilter, analytics_filter
+from tools.response_cache import cached_response, response_cache
+from db.data_versions import expire_data_versions
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/campaigns",
+    tags=["campaigns"]
+)
+
+# Tables the endpoints read; writes to them invalidate cached responses
+DATA_TABLES = ("campaign_performance",)
+
+def format_campaign_performance(row: CampaignPerformance):
+    return {
+        "campaignId": row.campaign_id,
+        "name": row.name_campaign,
+        "brand": row.brand,
+        "productId": row.product_id,
+        "platform": row.platform,
+        "category": row.category,
+        "formatType": row.format_type,
+        "startDate": row.start_date.strftime("%Y-%m-%d") if row.start_date else None,
+        "endDate": row.end_date.strftime("%Y-%m-%d") if row.end_date else None,
+        "windowDays": row.window_days,
+        "budget": float(row.budget) if row.budget is not None else None,
+        "reach": row.reach,
+        "targetEngagement": row.target_engagement,
+        "reachVsTarget": row.reach_vs_target,
+        "costPerReach": row.cost_per_reach,
+        "campaignSentiment": row.campaign_sentiment,
+        "reviews": {
+            "before": row.reviews_before,
+            "during": row.reviews_during,
+            "sentimentBefore": row.review_sentiment_before,
+            "sentimentDuring": row.review_sentiment_during,
+            "sentimentDelta": row.review_sentiment_delta
+        },
+        "social": {
+            "postsBefore": row.posts_before,
+            "postsDuring": row.posts_during,
+            "engagementBefore": row.social_engagement_before,
+            "engagementDuring": row.social_engagement_during,
+            "sentimentBefore": row.social_sentiment_before,
+            "sentimentDuring": row.social_sentiment_during,
+            "sentimentDelta": row.social_sentiment_delta
+        },
+        "sales": {
+            "transactionsBefore": row.transactions_before,
+            "transactionsDuring": row.transactions_during,
+            "valueBefore": row.sales_value_before,
+            "valueDuring": row.sales_value_during,
+            "valueDelta": row.sales_value_delta,
+            "liftPerBudget": row.sales_lift_per_budget
+        },
+        "refreshedAt": row.refreshed_at.isoformat() if row.refreshed_at else None
+    }
+
+@router.get("/")
+def test_endpoint():
+    return {"message": "Campaign routes are working!"}
+
+@router.get("/performance")
+@cached_response(DATA_TABLES)
+def get_campaign_performance(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
+):
+    """Get precomputed performance of campaigns running within the date range"""
+    try:
+        query = db.query(CampaignPerformance)
+
+        conditions = filters.conditions(CampaignPerformance.brand)
+        if filters.has_date_range:
+            # Campaigns whose window overlaps the requested range
+            conditions.append(CampaignPerformance.start_date <= filters.end_date)
+            conditions.append(CampaignPerformance.end_date >= filters.start_date)
+
+        campaigns = query.filter(*conditions).order_by(desc(CampaignPerformance.start_date)).all()
+        return [format_campaign_performance(c) for c in campaigns]
+    except Exception as e:
+        logger.error(f"Error in /performance endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/performance/{campaign_id}")
+@cached_response(DATA_TABLES)
+def get_campaign_performance_detail(campaign_id: int, db: Session = Depends(get_read_db)):
+    """Get precomputed performance of a single campaign"""
+    try:
+        campaign = db.query(CampaignPerformance).filter(
+            CampaignPerformance.campaign_id == campaign_id
+        ).first()
+    except Exception as e:
+        logger.error(f"Error in /performance/{campaign_id} endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return format_campaign_performance(campaign)
+
+@router.post("/performance/refresh")
+def refresh_performance(
+    full: bool = Query(False, description="Recompute every campaign instead of only stale ones"),
+    db: Session = Depends(get_db)
+):
+    """Refresh the campaign performance table now"""
+    try:
+        result = refresh_campaign_performance(db, full=full)
+        if result is None:
+            return {"status": "skipped", "message": "A refresh is already running"}
+        # Drop the cached /api/campaigns responses now rather than when this
+        # worker's listener gets the NOTIFY, so the next GET sees the refresh
+        response_cache.invalidate_matching("campaign_performance")
+        # The refresh bumped the campaign_performance version; re-read it so the
+        # agent's SQL-result and answer caches miss right away too
+        expire_data_versions()
+        return {"status": "success", **result}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error in /performance/refresh endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,8 +3,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_, text
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from db.database import get_db
+from db.database import get_read_db
 from db.models import ProductCatalog, ReviewedProduct, CustomerDemographics
+from db.review_queries import review_query
+from tools.filters import AnalyticsFilter, analytics_filter
+from tools.response_cache import cached_response
 import logging
 import json
 
@@ -15,39 +18,31 @@ router = APIRouter(
     tags=["product-reviews"]
 )
 
+# Tables the endpoints read; writes to them invalidate cached responses
+DATA_TABLES = ("reviewed_product", "product_catalog")
+
 @router.get("/")
 def test_endpoint():
     return {"message": "Product review routes are working!"}
 
 @router.get("/metrics")
+@cached_response(DATA_TABLES)
 def get_review_metrics(
-    brand: str = Query(None, description="Brand name to filter data"),
     product_name: str = None, 
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get overall product review metrics"""
     # logger.info("Processing /metrics endpoint request")
     try:
-        query = db.query(ReviewedProduct).join(ProductCatalog)
-        
-        filters = []
-        if product_name:
-            filters.append(ProductCatalog.product_name == product_name)
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+        query = review_query(db, filters=filters, product_name=product_name)
 
         total_reviews = query.count()
         positive_reviews = query.filter(ReviewedProduct.sentiment_score >= 0.5).count()
         negative_reviews = total_reviews - positive_reviews
         
         # Calculate average rating
-        avg_rating = db.query(func.avg(ReviewedProduct.rating)).filter(*filters).scalar()
+        avg_rating = query.with_entities(func.avg(ReviewedProduct.rating)).scalar()
         avg_rating = float(avg_rating) if avg_rating is not None else 0
 
         response = {
@@ -63,27 +58,16 @@ def get_review_metrics(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sentiment-distribution")
+@cached_response(DATA_TABLES)
 def get_sentiment_distribution(
-    brand: str = Query(None, description="Brand name to filter data"),
     product_name: str = None, 
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get sentiment distribution data"""
     # logger.info("Processing /sentiment-distribution endpoint request")
     try:
-        query = db.query(ReviewedProduct).join(ProductCatalog)
-        
-        filters = []
-        if product_name:
-            filters.append(ProductCatalog.product_name == product_name)
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+        query = review_query(db, filters=filters, product_name=product_name)
 
         total = query.count()
         positive = query.filter(ReviewedProduct.sentiment_score >= 0.5).count()
@@ -103,12 +87,11 @@ def get_sentiment_distribution(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/aspect-sentiment")
+@cached_response(DATA_TABLES)
 def get_aspect_sentiment(
-    brand: str = Query(None, description="Brand name to filter data"),
     product_name: str = None, 
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get sentiment scores for different aspects"""
     # logger.info("Processing /aspect-sentiment endpoint request")
@@ -121,17 +104,7 @@ def get_aspect_sentiment(
             'design': 'Desain'
         }
         
-        query = db.query(ReviewedProduct).join(ProductCatalog)
-        
-        filters = []
-        if product_name:
-            filters.append(ProductCatalog.product_name == product_name)
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+        query = review_query(db, filters=filters, product_name=product_name)
 
         # Initialize counters for each aspect
         aspect_counts = {aspect: {'positive': 0, 'negative': 0} for aspect in aspect_mapping.values()}
@@ -191,30 +164,19 @@ def get_aspect_sentiment(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/products")
+@cached_response(DATA_TABLES)
 def get_products(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)):
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)):
     """Get list of all products"""
     # logger.info("Processing /products endpoint request")
     try:
-        query = db.query(ReviewedProduct.product_id, ProductCatalog.product_name
-        ).join(
-            ProductCatalog,
-            ReviewedProduct.product_id == ProductCatalog.product_id
+        query = review_query(
+            db, ReviewedProduct.product_id, ProductCatalog.product_name, filters=filters
         ).group_by(
             ReviewedProduct.product_id, ProductCatalog.product_name
         ).order_by(desc(ProductCatalog.product_name)
         )
-        
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
 
         products = query.all()
         
@@ -226,25 +188,16 @@ def get_products(
     
 #products review sentiment
 @router.get("/products-review-sentiment/{product_id}")
+@cached_response(DATA_TABLES)
 def get_products_review_sentiment(
     product_id: int, 
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """get review sentiments based on product id"""
     # logger.info("Processing /products-review-sentiment endpoint request")
     try:
-        query = db.query(ReviewedProduct).filter(ReviewedProduct.product_id == product_id)
-        
-        filters = []
-        if brand:
-            query = query.join(ProductCatalog).filter(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+        query = review_query(db, filters=filters).filter(ReviewedProduct.product_id == product_id)
 
         reviews = query.all()
         
@@ -303,38 +256,25 @@ def get_filter_categories():
     
 #get review sentiment by upper material
 @router.get("/review-sentiment-by-upper-material")
+@cached_response(DATA_TABLES)
 def get_review_sentiment_by_upper_material(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get review sentiment by upper material for each aspect"""
     # logger.info("Processing /review-sentiment-by-upper-material endpoint request")
     try:
         # Get all reviews with their product's upper material
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct, 
-            ProductCatalog.upper_material
-        ).join(
-            ProductCatalog,
-            ReviewedProduct.product_id == ProductCatalog.product_id
+            ProductCatalog.upper_material,
+            filters=filters
         )
-        
-        # Build all filters first
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        # Apply all filters at once
-        query = query.filter(*filters)
 
         # Get distinct upper materials for this brand and date range
         upper_materials_query = db.query(ProductCatalog.upper_material).distinct()
-        if brand:
-            upper_materials_query = upper_materials_query.filter(ProductCatalog.brand == brand)
+        upper_materials_query = upper_materials_query.filter(*filters.conditions(ProductCatalog.brand))
         upper_materials = [um[0] for um in upper_materials_query.all() if um[0] is not None]
 
         # Initialize the data structure
@@ -399,38 +339,25 @@ def get_review_sentiment_by_upper_material(
 
 #get review sentiment by sole material
 @router.get("/review-sentiment-by-sole-material")
+@cached_response(DATA_TABLES)
 def get_review_sentiment_by_sole_material(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get review sentiment by sole material for each aspect"""
     # logger.info("Processing /review-sentiment-by-sole-material endpoint request")
     try:
         # Get all reviews with their product's sole material
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct, 
-            ProductCatalog.sole_material
-        ).join(
-            ProductCatalog,
-            ReviewedProduct.product_id == ProductCatalog.product_id
+            ProductCatalog.sole_material,
+            filters=filters
         )
-        
-        # Build all filters first
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        # Apply all filters at once
-        query = query.filter(*filters)
 
         # Get distinct sole materials for this brand and date range
         sole_materials_query = db.query(ProductCatalog.sole_material).distinct()
-        if brand:
-            sole_materials_query = sole_materials_query.filter(ProductCatalog.brand == brand)
+        sole_materials_query = sole_materials_query.filter(*filters.conditions(ProductCatalog.brand))
         sole_materials = [sm[0] for sm in sole_materials_query.all() if sm[0] is not None]
 
         # Initialize the data structure
@@ -495,38 +422,25 @@ def get_review_sentiment_by_sole_material(
 
 #get review sentiment by origin
 @router.get("/review-sentiment-by-origin")
+@cached_response(DATA_TABLES)
 def get_review_sentiment_by_origin(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get review sentiment by origin for each aspect"""
     # logger.info("Processing /review-sentiment-by-origin endpoint request")
     try:
         # Get all reviews with their product's origin
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct, 
-            ProductCatalog.origin
-        ).join(
-            ProductCatalog,
-            ReviewedProduct.product_id == ProductCatalog.product_id
+            ProductCatalog.origin,
+            filters=filters
         )
-        
-        # Build all filters first
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        # Apply all filters at once
-        query = query.filter(*filters)
 
         # Get distinct origins for this brand and date range
         origins_query = db.query(ProductCatalog.origin).distinct()
-        if brand:
-            origins_query = origins_query.filter(ProductCatalog.brand == brand)
+        origins_query = origins_query.filter(*filters.conditions(ProductCatalog.brand))
         origins = [o[0] for o in origins_query.all() if o[0] is not None]
 
         # Initialize the data structure
@@ -591,38 +505,25 @@ def get_review_sentiment_by_origin(
 
 #get review sentiment by gender orientation
 @router.get("/review-sentiment-by-gender")
+@cached_response(DATA_TABLES)
 def get_review_sentiment_by_gender(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get review sentiment by gender orientation for each aspect"""
     # logger.info("Processing /review-sentiment-by-gender endpoint request")
     try:
         # Get all reviews with their product's gender orientation
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct, 
-            ProductCatalog.gender_orientation
-        ).join(
-            ProductCatalog,
-            ReviewedProduct.product_id == ProductCatalog.product_id
+            ProductCatalog.gender_orientation,
+            filters=filters
         )
-        
-        # Build all filters first
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        # Apply all filters at once
-        query = query.filter(*filters)
 
         # Get distinct gender orientations for this brand and date range
         genders_query = db.query(ProductCatalog.gender_orientation).distinct()
-        if brand:
-            genders_query = genders_query.filter(ProductCatalog.brand == brand)
+        genders_query = genders_query.filter(*filters.conditions(ProductCatalog.brand))
         genders = [g[0] for g in genders_query.all() if g[0] is not None]
 
         # Initialize the data structure
@@ -687,24 +588,15 @@ def get_review_sentiment_by_gender(
 
 #get top 10 positive and negative keywords from review
 @router.get("/top-keywords")
+@cached_response(DATA_TABLES)
 def get_top_keywords(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top 10 positive and negative keywords from review texts"""
     # logger.info("Processing /top-keywords endpoint request")
     try:
-        query = db.query(ReviewedProduct.keyword_tags).join(ProductCatalog)
-        
-        filters = []
-        if brand:
-            query = query.filter(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+        query = review_query(db, ReviewedProduct.keyword_tags, filters=filters)
 
         # Collect all keywords and their frequencies
         keyword_freq = {}
@@ -723,24 +615,15 @@ def get_top_keywords(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/emotion-intensity")
+@cached_response(DATA_TABLES)
 def get_emotion_intensity(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get distribution of emotion intensity in reviews"""
     # logger.info("Processing /emotion-intensity endpoint request")
     try:
-        query = db.query(ReviewedProduct).join(ProductCatalog)
-        
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+        query = review_query(db, filters=filters)
         
         # Get total count for percentage calculation
         total_reviews = query.count()
@@ -776,27 +659,20 @@ def get_emotion_intensity(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-topics")
+@cached_response(DATA_TABLES)
 def get_top_topics(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top review topics based on keyword tags"""
     # logger.info("Processing /top-topics endpoint request")
     try:
-        query = db.query(
+        query = review_query(
+            db,
             func.unnest(ReviewedProduct.keyword_tags).label('topic'),
-            func.count().label('count')
-        ).join(ProductCatalog)
-        
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+            func.count().label('count'),
+            filters=filters
+        )
         
         # Group by topic and order by count
         results = query.group_by('topic').order_by(text('count DESC')).limit(7).all()
@@ -814,28 +690,21 @@ def get_top_topics(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/rating-sentiment-correlation")
+@cached_response(DATA_TABLES)
 def get_rating_sentiment_correlation(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get correlation between ratings and sentiment scores"""
     # logger.info("Processing /rating-sentiment-correlation endpoint request")
     try:
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct.rating,
             func.avg(ReviewedProduct.sentiment_score).label('avg_sentiment'),
-            func.count().label('count')
-        ).join(ProductCatalog)
-        
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+            func.count().label('count'),
+            filters=filters
+        )
         
         # Group by rating
         results = query.group_by(ReviewedProduct.rating).order_by(ReviewedProduct.rating).all()
@@ -857,31 +726,24 @@ def get_rating_sentiment_correlation(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/helpful-reviews")
+@cached_response(DATA_TABLES)
 def get_helpful_reviews(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
+    filters: AnalyticsFilter = Depends(analytics_filter),
     limit: int = Query(5, description="Number of reviews to return"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get most helpful reviews based on helpful votes"""
     # logger.info("Processing /helpful-reviews endpoint request")
     try:
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct.review_text,
             ReviewedProduct.rating,
             ReviewedProduct.helpful_votes,
             ReviewedProduct.sentiment_score,
-            ProductCatalog.product_name
-        ).join(ProductCatalog)
-        
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+            ProductCatalog.product_name,
+            filters=filters
+        )
         
         # Order by helpful votes and limit results
         results = query.order_by(ReviewedProduct.helpful_votes.desc()).limit(limit).all()
@@ -905,29 +767,22 @@ def get_helpful_reviews(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trend")
+@cached_response(DATA_TABLES)
 def get_sentiment_rating_trend(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get daily trend of average sentiment and rating"""
     # logger.info("Processing /trend endpoint request")
     try:
-        query = db.query(
+        query = review_query(
+            db,
             ReviewedProduct.review_date,
             func.avg(ReviewedProduct.sentiment_score).label('avg_sentiment'),
             func.avg(ReviewedProduct.rating).label('avg_rating'),
-            func.count().label('review_count')
-        ).join(ProductCatalog)
-        
-        filters = []
-        if brand:
-            filters.append(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            filters.append(ReviewedProduct.review_date.between(startDate, endDate))
-            
-        query = query.filter(*filters)
+            func.count().label('review_count'),
+            filters=filters
+        )
         
         # Group by date and get daily averages
         results = query.group_by(ReviewedProduct.review_date)\
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, case, distinct
-from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from db.database import get_db
+from db.database import get_read_db
 from db.models import Sales, SalesProducts, ProductCatalog, CustomerDemographics
+from tools.filters import AnalyticsFilter, analytics_filter
+from tools.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,41 +15,35 @@ router = APIRouter(
     tags=["sales"]
 )
 
+# Tables the endpoints read; writes to them invalidate cached responses
+DATA_TABLES = ("sales", "sale_product", "product_catalog", "customer_demographics")
+
 @router.get("/")
 def test_endpoint():
     return {"message": "Sales routes are working!"}
 
 @router.get("/daily-sales")
-async def get_daily_sales(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_daily_sales(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get daily sales data filtered by brand and date range"""
     try:
-        if startDate and endDate:
-            query_startDate = datetime.strptime(startDate, "%Y-%m-%d")
-            query_endDate = datetime.strptime(endDate, "%Y-%m-%d")
-        else:
-            query_endDate = datetime.now()
-            query_startDate = query_endDate - timedelta(days=7)
+        filters = filters.with_default_range()
 
         query = db.query(
-            func.date(Sales.purchase_date).label('day'),
+            Sales.purchase_date.label('day'),
             func.sum(Sales.order_value).label('orderValue')
         ).join(
             SalesProducts, Sales.transaction_id == SalesProducts.transaction_id
         ).join(
             ProductCatalog, SalesProducts.product_id == ProductCatalog.product_id
         ).filter(
-            Sales.purchase_date.between(query_startDate, query_endDate)
+            *filters.conditions(ProductCatalog.brand, Sales.purchase_date)
         )
 
-        if brand:
-            query = query.filter(ProductCatalog.brand == brand)
-
-        query = query.group_by(func.date(Sales.purchase_date))
+        query = query.group_by(Sales.purchase_date)
         
         results = query.all()
         return [{"day": day.strftime("%a"), "orderValue": float(value)} for day, value in results]
@@ -57,11 +52,10 @@ async def get_daily_sales(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/product-categories")
-async def get_product_categories(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_product_categories(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get sales volume by product category"""
     try:
@@ -74,10 +68,7 @@ async def get_product_categories(
             Sales, SalesProducts.transaction_id == Sales.transaction_id
         )
 
-        if brand:
-            query = query.filter(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            query = query.filter(Sales.purchase_date.between(startDate, endDate))
+        query = query.filter(*filters.conditions(ProductCatalog.brand, Sales.purchase_date))
 
         query = query.group_by(ProductCatalog.subcategory).order_by(desc('volume'))
         
@@ -88,11 +79,10 @@ async def get_product_categories(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/return-rates")
-async def get_return_rates(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_return_rates(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get return rates by product category"""
     try:
@@ -105,10 +95,7 @@ async def get_return_rates(
             Sales, SalesProducts.transaction_id == Sales.transaction_id
         )
 
-        if brand:
-            query = query.filter(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            query = query.filter(Sales.purchase_date.between(startDate, endDate))
+        query = query.filter(*filters.conditions(ProductCatalog.brand, Sales.purchase_date))
 
         query = query.group_by(ProductCatalog.subcategory)
         
@@ -119,11 +106,10 @@ async def get_return_rates(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/customer-locations")
-async def get_customer_locations(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_customer_locations(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get customer count by city"""
     try:
@@ -138,10 +124,7 @@ async def get_customer_locations(
             ProductCatalog, SalesProducts.product_id == ProductCatalog.product_id
         )
 
-        if brand:
-            query = query.filter(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            query = query.filter(Sales.purchase_date.between(startDate, endDate))
+        query = query.filter(*filters.conditions(ProductCatalog.brand, Sales.purchase_date))
 
         query = query.group_by(CustomerDemographics.location).order_by(desc('customers')).limit(10)
         
@@ -152,11 +135,10 @@ async def get_customer_locations(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/demographics")
-async def get_demographics(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_demographics(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get customer demographics (gender and age distribution)"""
     try:
@@ -173,10 +155,7 @@ async def get_demographics(
             ProductCatalog, SalesProducts.product_id == ProductCatalog.product_id
         )
 
-        if brand:
-            base_query = base_query.filter(ProductCatalog.brand == brand)
-        if startDate and endDate:
-            base_query = base_query.filter(Sales.purchase_date.between(startDate, endDate))
+        base_query = base_query.filter(*filters.conditions(ProductCatalog.brand, Sales.purchase_date))
 
         # Get distinct customers subquery
         distinct_customers = base_query.distinct().subquery()
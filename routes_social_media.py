@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from db.database import get_db
-from db.models import SocialMedia, SentimentSocialMedia, Campaign
+from db.database import get_read_db
+from db.models import SocialMedia, SentimentSocialMedia
+from tools.filters import AnalyticsFilter, analytics_filter
+from tools.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,38 +15,36 @@ router = APIRouter(
     tags=["social-media"]
 )
 
+# Tables the endpoints read; writes to them invalidate cached responses
+DATA_TABLES = ("social_media", "sentiment_social_media")
+
 @router.get("/")
 def test_endpoint():
     return {"message": "Social media routes are working!"}
 
 @router.get("/metrics")
+@cached_response(DATA_TABLES)
 def get_engagement_metrics(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get overall social media engagement metrics filtered by brand and date range"""
-    # logger.info(f"Processing /metrics endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /metrics endpoint request for {filters}")
     try:
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        if startDate and endDate:
-            filters.append(SocialMedia.post_date.between(startDate, endDate))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Base queries with filters
         engagement_query = db.query(
             func.sum(SentimentSocialMedia.total_likes + SentimentSocialMedia.total_replies)
         ).join(
             SocialMedia, SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
-        ).filter(*filters)
+        ).filter(*conditions)
 
         reach_query = db.query(
             func.sum(SocialMedia.reach_count)
-        ).filter(*filters)
+        ).filter(*conditions)
 
-        posts_query = db.query(SocialMedia).filter(*filters)
+        posts_query = db.query(SocialMedia).filter(*conditions)
 
         # Execute queries
         total_engagement = engagement_query.scalar() or 0
@@ -69,43 +68,33 @@ def get_engagement_metrics(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/timeseries")
-async def get_timeseries_data(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_timeseries_data(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get daily engagement and reach data filtered by brand and date range"""
-    # logger.info(f"Processing /timeseries endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /timeseries endpoint request for {filters}")
     try:
         # Use provided date range or default to last 7 days
-        if startDate and endDate:
-            query_startDate = datetime.strptime(startDate, "%Y-%m-%d")
-            query_endDate = datetime.strptime(endDate, "%Y-%m-%d")
-        else:
-            query_endDate = datetime.now() - timedelta(days=1)
-            query_startDate = query_endDate - timedelta(days=7)
+        filters = filters.with_default_range()
         
         # Base query
         query = db.query(
-            func.date(SocialMedia.post_date).label('date'),
+            SocialMedia.post_date.label('date'),
             func.sum(SentimentSocialMedia.total_likes + SentimentSocialMedia.total_replies).label('engagement'),
             func.sum(SocialMedia.reach_count).label('reach')
         ).join(
             SentimentSocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         ).filter(
-            SocialMedia.post_date.between(query_startDate, query_endDate)
+            *filters.conditions(SocialMedia.brand, SocialMedia.post_date)
         )
         
-        # Apply brand filter if provided
-        if brand:
-            query = query.filter(SocialMedia.brand == brand)
-        
         daily_stats = query.group_by(
-            func.date(SocialMedia.post_date)
+            SocialMedia.post_date
         ).order_by(
-            func.date(SocialMedia.post_date)
+            SocialMedia.post_date
         ).all()
         
         dates = []
@@ -140,14 +129,13 @@ async def get_timeseries_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/content-performance")
-async def get_content_performance(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_content_performance(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get engagement and reach rates by content type filtered by brand and date range"""
-    # logger.info(f"Processing /content-performance endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /content-performance endpoint request for {filters}")
     try:
         query = db.query(
             SocialMedia.jenis_konten,
@@ -159,11 +147,7 @@ async def get_content_performance(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
 
-        if brand:
-            query = query.filter(SocialMedia.brand == brand)
-            
-        if startDate and endDate:
-            query = query.filter(SocialMedia.post_date.between(startDate, endDate))
+        query = query.filter(*filters.conditions(SocialMedia.brand, SocialMedia.post_date))
         
         performance = query.group_by(
             SocialMedia.jenis_konten
@@ -207,14 +191,13 @@ async def get_content_performance(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/platform-performance")
-async def get_platform_performance(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_platform_performance(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get reach and engagement metrics by platform filtered by brand and date range"""
-    # logger.info(f"Processing /platform-performance endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /platform-performance endpoint request for {filters}")
     try:
         query = db.query(
             SocialMedia.platform,
@@ -225,11 +208,7 @@ async def get_platform_performance(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
 
-        if brand:
-            query = query.filter(SocialMedia.brand == brand)
-            
-        if startDate and endDate:
-            query = query.filter(SocialMedia.post_date.between(startDate, endDate))
+        query = query.filter(*filters.conditions(SocialMedia.brand, SocialMedia.post_date))
         
         platform_stats = query.group_by(
             SocialMedia.platform
@@ -268,14 +247,13 @@ async def get_platform_performance(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-posts/reach")
-async def get_top_posts_by_reach(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_top_posts_by_reach(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top 5 posts by reach filtered by brand and date range"""
-    # logger.info(f"Processing /top-posts/reach endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /top-posts/reach endpoint request for {filters}")
     try:
         # Base query
         query = db.query(
@@ -286,14 +264,8 @@ async def get_top_posts_by_reach(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
         
-        # Apply brand filter if provided
-        if brand:
-            query = query.filter(SocialMedia.brand == brand)
-        
-        # Apply date filters if provided
-        if startDate and endDate:
-            # logger.info(f"Applying date filter: {startDate} to {endDate}")
-            query = query.filter(SocialMedia.post_date.between(startDate, endDate))
+        # Apply brand and date filters if provided
+        query = query.filter(*filters.conditions(SocialMedia.brand, SocialMedia.post_date))
         
         posts = query.order_by(
             desc(SocialMedia.reach_count)
@@ -318,14 +290,13 @@ async def get_top_posts_by_reach(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-posts/engagement")
-async def get_top_posts_by_engagement(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_top_posts_by_engagement(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top 5 posts by engagement filtered by brand and date range"""
-    # logger.info(f"Processing /top-posts/engagement endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /top-posts/engagement endpoint request for {filters}")
     try:
         # Base query
         query = db.query(
@@ -336,13 +307,8 @@ async def get_top_posts_by_engagement(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
         
-        # Apply brand filter if provided
-        if brand:
-            query = query.filter(SocialMedia.brand == brand)
-        
-        # Apply date filters if provided
-        if startDate and endDate:
-            query = query.filter(SocialMedia.post_date.between(startDate, endDate))
+        # Apply brand and date filters if provided
+        query = query.filter(*filters.conditions(SocialMedia.brand, SocialMedia.post_date))
         
         top_posts = query.order_by(
             desc('total_engagement')
@@ -366,14 +332,13 @@ async def get_top_posts_by_engagement(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-hashtags")
-async def get_top_hashtags(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_top_hashtags(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top hashtags by reach and engagement filtered by brand and date range"""
-    # logger.info(f"Processing /top-hashtags endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /top-hashtags endpoint request for {filters}")
     try:
         # Using array_elements to unnest hashtags array
         reach_hashtags = db.query(
@@ -381,9 +346,7 @@ async def get_top_hashtags(
             func.sum(SocialMedia.reach_count).label('reach'),
             func.count(SocialMedia.social_media_post_id).label('count')
         ).filter(
-            SocialMedia.brand == brand
-        ).filter(
-            SocialMedia.post_date.between(startDate, endDate)
+            *filters.conditions(SocialMedia.brand, SocialMedia.post_date)
         ).group_by(
             'hashtag'
         ).order_by(
@@ -398,9 +361,7 @@ async def get_top_hashtags(
             SentimentSocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         ).filter(
-            SocialMedia.brand == brand
-        ).filter(
-            SocialMedia.post_date.between(startDate, endDate)
+            *filters.conditions(SocialMedia.brand, SocialMedia.post_date)
         ).group_by(
             'hashtag'
         ).order_by(
@@ -434,14 +395,13 @@ async def get_top_hashtags(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-collaborators")
-async def get_top_collaborators(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+@cached_response(DATA_TABLES)
+def get_top_collaborators(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top collaborators by reach and engagement filtered by brand and date range"""
-    # logger.info(f"Processing /top-collaborators endpoint request for brand: {brand}, date range: {startDate} to {endDate}")
+    # logger.info(f"Processing /top-collaborators endpoint request for {filters}")
     try:
         # Get top collaborators by reach
         reach_collabs = db.query(
@@ -449,9 +409,7 @@ async def get_top_collaborators(
             func.sum(SocialMedia.reach_count).label('reach'),
             func.count(SocialMedia.social_media_post_id).label('posts')
         ).filter(
-            SocialMedia.brand == brand
-        ).filter(
-            SocialMedia.post_date.between(startDate, endDate)
+            *filters.conditions(SocialMedia.brand, SocialMedia.post_date)
         ).filter(
             SocialMedia.collabs.isnot(None)
         ).group_by(
@@ -469,9 +427,7 @@ async def get_top_collaborators(
             SentimentSocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         ).filter(
-            SocialMedia.brand == brand
-        ).filter(
-            SocialMedia.post_date.between(startDate, endDate)
+            *filters.conditions(SocialMedia.brand, SocialMedia.post_date)
         ).filter(
             SocialMedia.collabs.isnot(None)
         ).group_by(
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case
 from typing import List, Dict
-from datetime import datetime, timedelta
+from datetime import timedelta
 from  db.models import SentimentSocialMedia, SocialMedia
-from db.database import get_db
+from db.database import get_read_db
+from tools.filters import AnalyticsFilter, analytics_filter, DEFAULT_WINDOW_DAYS
+from tools.response_cache import cached_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,16 +16,18 @@ router = APIRouter(
     tags=["sentiment"]
 )
 
+# Tables the endpoints read; writes to them invalidate cached responses
+DATA_TABLES = ("social_media", "sentiment_social_media")
+
 @router.get("/")
 def test_endpoint():
     return {"message": "Social media sentiment routes are working!"}
 
 @router.get("/overview")
+@cached_response(DATA_TABLES)
 def get_sentiment_overview(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get overview metrics filtered by brand and date range"""
     try:
@@ -35,36 +39,32 @@ def get_sentiment_overview(
         engagement_query = db.query(func.sum(SocialMedia.engagement_count))
         sentiment_query = db.query(SentimentSocialMedia)
         
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        if startDate and endDate:
-            filters.append(SocialMedia.post_date.between(startDate, endDate))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Apply filters
         comments_query = comments_query.join(
             SocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
-        ).filter(*filters)
+        ).filter(*conditions)
         
-        posts_query = posts_query.filter(*filters)
+        posts_query = posts_query.filter(*conditions)
         
         likes_query = likes_query.join(
             SocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
-        ).filter(*filters)
+        ).filter(*conditions)
         
         replies_query = replies_query.join(
             SocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
-        ).filter(*filters)
+        ).filter(*conditions)
         
-        engagement_query = engagement_query.filter(*filters)
+        engagement_query = engagement_query.filter(*conditions)
         
         sentiment_query = sentiment_query.join(
             SocialMedia,
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
-        ).filter(*filters)
+        ).filter(*conditions)
         
         # Get results
         total_comments = comments_query.count()
@@ -92,11 +92,10 @@ def get_sentiment_overview(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/platform-sentiment")
+@cached_response(DATA_TABLES)
 def get_platform_sentiment(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get sentiment distribution by platform filtered by brand and date range"""
     try:
@@ -112,14 +111,10 @@ def get_platform_sentiment(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
         
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        if startDate and endDate:
-            filters.append(SocialMedia.post_date.between(startDate, endDate))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Apply filters
-        query = query.filter(*filters)
+        query = query.filter(*conditions)
         
         platform_sentiment = query.group_by(
             SocialMedia.platform
@@ -138,26 +133,20 @@ def get_platform_sentiment(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/time-series")
+@cached_response(DATA_TABLES)
 def get_sentiment_time_series(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    days: int = 7,
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    days: int = DEFAULT_WINDOW_DAYS,
+    db: Session = Depends(get_read_db)
 ):
     """Get sentiment trends over time filtered by brand and date range"""
     try:
-        # Convert string dates to datetime objects if provided, otherwise use default range
-        if startDate and endDate:
-            start_date = datetime.strptime(startDate, "%Y-%m-%d")
-            end_date = datetime.strptime(endDate, "%Y-%m-%d")
-        else:
-            end_date = datetime.now() - timedelta(days=1)
-            start_date = end_date - timedelta(days=days)
+        # Use provided date range, otherwise the last `days` days
+        filters = filters.with_default_range(days)
         
         # Base query
         query = db.query(
-            func.date(SocialMedia.post_date).label('date'),
+            SocialMedia.post_date.label('date'),
             func.count(SentimentSocialMedia.id_post).label('total'),
             func.count(SentimentSocialMedia.id_post).filter(
                 SentimentSocialMedia.sentiment_score > 0.5
@@ -167,23 +156,15 @@ def get_sentiment_time_series(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
         
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        
-        # Always add date filter using the determined date range
-        filters.append(SocialMedia.post_date.between(
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d")
-        ))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Apply filters
-        query = query.filter(*filters)
+        query = query.filter(*conditions)
         
         daily_sentiment = query.group_by(
-            func.date(SocialMedia.post_date)
+            SocialMedia.post_date
         ).order_by(
-            func.date(SocialMedia.post_date)
+            SocialMedia.post_date
         ).all()
         
         result = {
@@ -192,12 +173,12 @@ def get_sentiment_time_series(
             "negative": []
         }
         
-        current_date = start_date
-        while current_date <= end_date:
+        current_date = filters.start_date
+        while current_date <= filters.end_date:
             date_str = current_date.strftime("%Y-%m-%d")  
             result["labels"].append(date_str)
             
-            day_data = next((data for data in daily_sentiment if data.date == current_date.date()), None)
+            day_data = next((data for data in daily_sentiment if data.date == current_date), None)
             if day_data:
                 total = day_data.total
                 positive = day_data.positive
@@ -214,11 +195,10 @@ def get_sentiment_time_series(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/keywords")
+@cached_response(DATA_TABLES)
 def get_sentiment_keywords(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top keywords filtered by brand and date range"""
     try:
@@ -243,15 +223,11 @@ def get_sentiment_keywords(
             SentimentSocialMedia.sentiment_score <= 0.5
         )
         
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        if startDate and endDate:
-            filters.append(SocialMedia.post_date.between(startDate, endDate))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Apply filters
-        positive_query = positive_query.filter(*filters)
-        negative_query = negative_query.filter(*filters)
+        positive_query = positive_query.filter(*conditions)
+        negative_query = negative_query.filter(*conditions)
         
         positive_keywords = positive_query.group_by(
             'word'
@@ -273,34 +249,25 @@ def get_sentiment_keywords(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trending-hashtags")
+@cached_response(DATA_TABLES, previous_period=True)
 def get_trending_hashtags(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get trending hashtags filtered by brand and date range"""
     try:
         # Default date range if not provided
-        if not startDate or not endDate:
-            end_date = datetime.now() - timedelta(days=1)
-            start_date = end_date - timedelta(days=7)
-            startDate = start_date.strftime("%Y-%m-%d")
-            endDate = end_date.strftime("%Y-%m-%d")
+        filters = filters.with_default_range()
         
         # Calculate previous period
-        end_date = datetime.strptime(endDate, "%Y-%m-%d")
-        start_date = datetime.strptime(startDate, "%Y-%m-%d")
-        period_length = (end_date - start_date).days
-        prev_start = (start_date - timedelta(days=period_length)).strftime("%Y-%m-%d")
-        prev_end = startDate
+        previous = filters.previous_period()
         
         # Base query for current period
         current_query = db.query(
             func.unnest(SocialMedia.hashtags).label('hashtag'),
             func.count('*').label('count')
         ).filter(
-            SocialMedia.post_date.between(startDate, endDate)
+            *filters.conditions(SocialMedia.brand, SocialMedia.post_date)
         )
         
         # Base query for previous period
@@ -308,14 +275,9 @@ def get_trending_hashtags(
             func.unnest(SocialMedia.hashtags).label('hashtag'),
             func.count('*').label('count')
         ).filter(
-            SocialMedia.post_date.between(prev_start, prev_end)
+            *previous.conditions(SocialMedia.brand, SocialMedia.post_date)
         )
         
-        # Apply brand filter if provided
-        if brand:
-            current_query = current_query.filter(SocialMedia.brand == brand)
-            prev_query = prev_query.filter(SocialMedia.brand == brand)
-        
         # Group and create subqueries
         current_hashtags = current_query.group_by('hashtag').subquery()
         prev_hashtags = prev_query.group_by('hashtag').subquery()
@@ -346,11 +308,10 @@ def get_trending_hashtags(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-comments")
+@cached_response(DATA_TABLES)
 def get_top_comments(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get top comments filtered by brand and date range"""
     try:
@@ -362,14 +323,10 @@ def get_top_comments(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
         
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        if startDate and endDate:
-            filters.append(SocialMedia.post_date.between(startDate, endDate))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Apply filters
-        query = query.filter(*filters)
+        query = query.filter(*conditions)
         
         comments = query.order_by(
             SentimentSocialMedia.sentiment_score.desc()
@@ -388,11 +345,10 @@ def get_top_comments(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/content-sentiment")
+@cached_response(DATA_TABLES)
 def get_content_sentiment(
-    brand: str = Query(None, description="Brand name to filter data"),
-    startDate: str = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
-    endDate: str = Query(None, description="End date for filtering (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
 ):
     """Get content sentiment analysis filtered by brand and date range"""
     try:
@@ -408,14 +364,10 @@ def get_content_sentiment(
             SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
         )
         
-        filters = []
-        if brand:
-            filters.append(SocialMedia.brand == brand)
-        if startDate and endDate:
-            filters.append(SocialMedia.post_date.between(startDate, endDate))
+        conditions = filters.conditions(SocialMedia.brand, SocialMedia.post_date)
 
         # Apply filters
-        query = query.filter(*filters)
+        query = query.filter(*conditions)
         
         content_sentiment = query.group_by(
             SocialMedia.jenis_konten
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import func, desc, true, Integer
+from db.database import get_read_db
+from db.models import SustainabilityMention
+from tools.filters import AnalyticsFilter, analytics_filter
+from tools.response_cache import cached_response
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/sustainability",
+    tags=["sustainability"]
+)
+
+# Tables the endpoints read; writes to them invalidate cached responses
+DATA_TABLES = ("sustainability_mention",)
+
+@router.get("/")
+def test_endpoint():
+    return {"message": "Sustainability routes are working!"}
+
+@router.get("/metrics")
+@cached_response(DATA_TABLES, ttl=3600)
+def get_sustainability_metrics(
+    filters: AnalyticsFilter = Depends(analytics_filter),
+    db: Session = Depends(get_read_db)
+):
+    """Get eco keyword mention volume and the sentiment of matching texts"""
+    try:
+        conditions = filters.conditions(SustainabilityMention.brand, SustainabilityMention.document_date)
+
+        # Mention volume per source
+        by_source = db.query(
+            SustainabilityMention.source,
+            func.count().label('documents'),
+            func.sum(SustainabilityMention.hit_count).label('mentions'),
+            func.avg(SustainabilityMention.sentiment_score).label('avg_sentiment'),
+            func.count().filter(SustainabilityMention.sentiment_score >= 0.5).label('positive'),
+            func.count(SustainabilityMention.sentiment_score).label('scored')
+        ).filter(*conditions).group_by(SustainabilityMention.source).all()
+
+        # Top keywords across all matching texts
+        keyword_hits = func.jsonb_each_text(SustainabilityMention.keyword_hits).table_valued("key", "value").alias("hits")
+        keyword_count = func.sum(keyword_hits.c.value.cast(Integer)).label('count')
+        top_keywords = db.query(
+            keyword_hits.c.key,
+            keyword_count
+        ).select_from(SustainabilityMention).join(keyword_hits, true()).filter(
+            *conditions
+        ).group_by(keyword_hits.c.key).order_by(desc(keyword_count)).limit(10).all()
+
+        sources = {}
+        total_documents = 0
+        total_mentions = 0
+        total_positive = 0
+        total_scored = 0
+        for source, documents, mentions, avg_sentiment, positive, scored in by_source:
+            sources[source] = {
+                "documents": documents,
+                "mentions": int(mentions or 0),
+                "averageSentiment": float(avg_sentiment) if avg_sentiment is not None else None
+            }
+            total_documents += documents
+            total_mentions += int(mentions or 0)
+            total_positive += positive
+            total_scored += scored
+
+        return {
+            "totalMentions": total_mentions,
+            "matchingDocuments": total_documents,
+            "bySource": sources,
+            "sentimentDistribution": {
+                "positive": round((total_positive / total_scored) * 100) if total_scored > 0 else 0,
+                "negative": round(((total_scored - total_positive) / total_scored) * 100) if total_scored > 0 else 0
+            },
+            "topKeywords": [{"keyword": keyword, "count": int(count)} for keyword, count in top_keywords]
+        }
+    except Exception as e:
+        logger.error(f"Error in /metrics endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
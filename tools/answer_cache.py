@@ -0,0 +1,165 @@
+from datetime import date
+from langchain_openai import OpenAIEmbeddings
+from db.data_versions import get_data_versions, versions_key
+from tools.embedding_cache import CachedQueryEmbeddings, normalize_query
+from tools.proper_nouns import proper_nouns
+import numpy as np
+import asyncio
+import threading
+import time
+import re
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lowest cosine similarity between two questions for one to get the other's answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "21600"))  # 6 hours
+ANSWER_EMBEDDING_MODEL = os.getenv("ANSWER_EMBEDDING_MODEL", "text-embedding-3-large")
+# Request header that skips the lookup with the value bypass, response header with HIT, MISS or BYPASS
+BYPASS_HEADER = "X-Answer-Cache"
+# Names resolved with at least this score must be the same in both questions
+ENTITY_SCORE = 0.85
+
+def question_terms(question: str):
+    """Names and numbers in a question, which a paraphrase must keep, e.g. Nike vs Adidas or Q3 vs Q4"""
+    proper_nouns.ensure_loaded()
+    entities = {value for value, _, score in proper_nouns.resolve(question, limit=10) if score >= ENTITY_SCORE}
+    return frozenset(entities), frozenset(re.findall(r"\d+", question))
+
+class SemanticAnswerCache:
+    """
+    Per-worker cache of chat answers, found by question similarity
+
+    A question is embedded and compared with the cached questions of the
+    same scope: today's date, since questions like "last month" depend on
+    it, and the data versions of every tracked table, so any data change
+    starts over. A cached answer is only returned when the cosine similarity
+    reaches `threshold` and both questions name the same brands, products
+    and other proper nouns and the same numbers, as paraphrases that differ
+    in those ("Nike sales" vs "Adidas sales") embed very close together.
+    A question in which no name is resolved only gets the answer to the
+    same question, up to case and whitespace.
+
+    Args:
+        embeddings: Embeddings of the questions
+        threshold (float): Lowest cosine similarity of a hit
+        max_entries (int): Most answers kept, the oldest are dropped beyond
+        ttl (int): Seconds an answer is kept
+    """
+    def __init__(self, embeddings, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES, ttl: int = ANSWER_CACHE_TTL):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # Parallel: one row of unit vectors per entry of (scope, stored at, question, terms, answer)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.entries = []
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+
+    def scope(self):
+        """Today's date and the data versions of every tracked table"""
+        return f"{date.today().isoformat()}#{versions_key(sorted(get_data_versions()))}"
+
+    def _prepare(self, question: str):
+        # Reads the database at most once per VERSION_TTL and on the first resolve
+        return self.scope(), question_terms(question)
+
+    async def embed(self, question: str):
+        """Unit vector of a question"""
+        vector = np.asarray(await self.embeddings.aembed_query(question), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _keep(self, keep):
+        self.entries = [entry for entry, kept in zip(self.entries, keep) if kept]
+        self.vectors = self.vectors[np.asarray(keep, dtype=bool)] if self.entries else np.empty((0, 0), dtype=np.float32)
+
+    def _expire(self, scope: str):
+        # Drops the answers of earlier data versions or days and the timed out ones
+        oldest = time.time() - self.ttl
+        keep = [entry[0] == scope and entry[1] >= oldest for entry in self.entries]
+        if not all(keep):
+            self._keep(keep)
+
+    async def lookup(self, question: str, bypass: bool = False):
+        """
+        Find the answer to a question similar enough to this one
+
+        Args:
+            question (str): Opening question of a chat
+            bypass (bool): Skip the search, only prepare the entry so the fresh answer replaces the cached one
+
+        Returns:
+            tuple of (answer or None, entry to pass to store with the fresh answer)
+        """
+        (scope, terms), vector = await asyncio.gather(
+            asyncio.to_thread(self._prepare, question),
+            self.embed(question)
+        )
+        answer = None
+        with self.lock:
+            self._expire(scope)
+            if bypass:
+                self.bypassed += 1
+                return None, (question, vector, scope, terms)
+            entities, _ = terms
+            if self.entries and not entities:
+                # Without a resolved name the guard cannot tell brands apart, so only the same question hits
+                normalized = normalize_query(question)
+                for entry in reversed(self.entries):
+                    if normalize_query(entry[2]) == normalized:
+                        answer = entry[4]
+                        break
+            elif self.entries:
+                similarities = self.vectors @ vector
+                for index in np.argsort(-similarities):
+                    if similarities[index] < self.threshold:
+                        break
+                    if self.entries[index][3] == terms:
+                        answer = self.entries[index][4]
+                        break
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer, (question, vector, scope, terms)
+
+    def store(self, entry, answer: str):
+        """Cache the answer to a question looked up before, replacing a cached answer to the same question"""
+        question, vector, scope, terms = entry
+        with self.lock:
+            keep = [cached[2] != question for cached in self.entries]
+            overflow = len(self.entries) - self.max_entries + 1
+            if overflow > 0:
+                # Oldest first, since entries are appended
+                keep[:overflow] = [False] * overflow
+            if not all(keep):
+                self._keep(keep)
+            self.entries.append((scope, time.time(), question, terms, answer))
+            self.vectors = np.vstack([self.vectors, vector[np.newaxis, :]]) if len(self.vectors) else vector[np.newaxis, :]
+            self.stores += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "maxEntries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0,
+                "bypassed": self.bypassed,
+                "stores": self.stores
+            }
+
+answer_cache = SemanticAnswerCache(
+    CachedQueryEmbeddings(OpenAIEmbeddings(model=ANSWER_EMBEDDING_MODEL), ANSWER_EMBEDDING_MODEL)
+)
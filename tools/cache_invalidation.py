@@ -0,0 +1,163 @@
+from db.database import engine, replica_engines, DB_REPLICA_MAX_LAG
+from tools.response_cache import response_cache
+from datetime import date
+import psycopg2
+import select
+import threading
+import json
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Channel the triggers of migration 0006 notify on
+CHANNEL = "data_changed"
+# Data-loaded handlers run once writes have been quiet for this many seconds...
+DATA_LOADED_DEBOUNCE = float(os.getenv("DATA_LOADED_DEBOUNCE", "30"))
+# ...or at the latest this long after the first write of a continuous load
+DATA_LOADED_MAX_WAIT = float(os.getenv("DATA_LOADED_MAX_WAIT", "300"))
+RECONNECT_DELAY = 5
+
+_invalidation_handlers = [response_cache.invalidate_matching]
+_data_loaded_handlers = []
+
+def register_invalidation_handler(handler):
+    """
+    Call `handler(table, brand, start_date, end_date)` for every change notification
+
+    Brand and dates are None when the change could not be narrowed down
+    (e.g. truncates or tables without a brand). Dates are ISO strings.
+    """
+    _invalidation_handlers.append(handler)
+
+def register_data_loaded_handler(handler):
+    """
+    Call `handler(tables)` with the set of changed tables once a data load has settled
+
+    Notifications are debounced, so a bulk load triggers one call instead of
+    one per statement.
+    """
+    _data_loaded_handlers.append(handler)
+
+def parse_notification(payload: str):
+    """
+    Parse a change notification payload
+
+    Returns:
+        tuple of (table, brand, start_date, end_date), None for the parts the payload does not narrow
+    """
+    data = json.loads(payload)
+    start_date = data.get("start")
+    end_date = data.get("end")
+    # Validate the dates so a malformed payload cannot match entries by accident
+    if start_date and end_date:
+        start_date = date.fromisoformat(start_date).isoformat()
+        end_date = date.fromisoformat(end_date).isoformat()
+    else:
+        start_date = end_date = None
+    return data["table"], data.get("brand"), start_date, end_date
+
+class InvalidationListener(threading.Thread):
+    """
+    Per-worker thread that LISTENs for data changes and evicts affected cached responses
+
+    It keeps its own connection outside the pool, since LISTEN needs one
+    connection for the lifetime of the worker. After a reconnect the whole
+    response cache is cleared, as notifications sent in between are lost.
+    """
+
+    def __init__(self):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.stopping = threading.Event()
+        self.pending_tables = set()
+        self.first_change_at = None
+        self.last_change_at = None
+
+    def run(self):
+        connected_before = False
+        while not self.stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(engine.url.render_as_string(hide_password=False))
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if connected_before:
+                    response_cache.invalidate()
+                connected_before = True
+                self._listen(conn)
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {str(e)}")
+                self.stopping.wait(RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def stop(self):
+        self.stopping.set()
+
+    def _listen(self, conn):
+        while not self.stopping.is_set():
+            if select.select([conn], [], [], 1.0)[0]:
+                conn.poll()
+                while conn.notifies:
+                    self._handle(conn.notifies.pop(0).payload)
+            self._flush_data_loaded()
+
+    def _handle(self, payload: str):
+        try:
+            table, brand, start_date, end_date = parse_notification(payload)
+        except Exception as e:
+            logger.error(f"Invalid change notification {payload!r}: {str(e)}")
+            response_cache.invalidate()
+            return
+
+        self._invalidate(table, brand, start_date, end_date)
+        if replica_engines:
+            # A lagging replica may have refilled the cache with the old data in between
+            timer = threading.Timer(DB_REPLICA_MAX_LAG, self._invalidate, args=(table, brand, start_date, end_date))
+            timer.daemon = True
+            timer.start()
+
+        now = time.monotonic()
+        self.pending_tables.add(table)
+        self.first_change_at = self.first_change_at or now
+        self.last_change_at = now
+
+    def _invalidate(self, table, brand, start_date, end_date):
+        for handler in _invalidation_handlers:
+            try:
+                handler(table, brand, start_date, end_date)
+            except Exception as e:
+                logger.error(f"Invalidation handler failed for {table}: {str(e)}")
+
+    def _flush_data_loaded(self):
+        if not self.pending_tables:
+            return
+        now = time.monotonic()
+        if now - self.last_change_at < DATA_LOADED_DEBOUNCE and now - self.first_change_at < DATA_LOADED_MAX_WAIT:
+            return
+
+        tables = self.pending_tables
+        self.pending_tables = set()
+        self.first_change_at = self.last_change_at = None
+        for handler in _data_loaded_handlers:
+            try:
+                handler(tables)
+            except Exception as e:
+                logger.error(f"Data loaded handler failed: {str(e)}")
+
+_listener = None
+
+def start_invalidation_listener():
+    """Start this worker's listener thread if it is not running yet"""
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = InvalidationListener()
+        _listener.start()
+
+def stop_invalidation_listener():
+    """Ask this worker's listener thread to stop"""
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,218 @@
+from datetime import datetime
+from sqlalchemy import text
+from db.database import engine, get_db_session
+from tools.cache_invalidation import register_data_loaded_handler
+from tools.request_popularity import popularity, resolve_query
+import asyncio
+import httpx
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hour of the morning run, so the first visitors of the day find warm caches
+WARM_HOUR = int(os.getenv("CACHE_WARM_HOUR", "6"))
+# Number of most requested URLs to warm per run
+WARM_TOP_N = int(os.getenv("CACHE_WARM_TOP_N", "50"))
+# Requests the warmer runs at once, kept low so it does not starve live traffic
+WARM_CONCURRENCY = int(os.getenv("CACHE_WARM_CONCURRENCY", "2"))
+# Days of request counts that decide popularity
+WARM_LOOKBACK_DAYS = int(os.getenv("CACHE_WARM_LOOKBACK_DAYS", "14"))
+# Seconds between flushes of each worker's request counts
+FLUSH_INTERVAL = 60
+
+# Arbitrary key so only one worker warms at a time
+WARM_LOCK_KEY = 37001
+# Sent by the warmer so its own requests are not counted as demand
+WARMER_HEADER = "X-Cache-Warmer"
+
+def popular_requests(db, limit: int = WARM_TOP_N, lookback_days: int = WARM_LOOKBACK_DAYS):
+    """Get (path, query, hits) of the most requested cached URLs of the last days"""
+    return db.execute(text("""
+        SELECT path, query, sum(hits) AS hits
+        FROM cache_popularity
+        WHERE day > current_date - :days
+        GROUP BY path, query
+        ORDER BY hits DESC
+        LIMIT :limit
+    """), {"days": lookback_days, "limit": limit}).all()
+
+async def request_all(app, requests, concurrency: int):
+    """
+    Request the URLs through the application itself, a few at a time
+
+    Cached URLs are answered from the cache and cost nothing, the others
+    run their queries and fill it.
+
+    Returns:
+        list of dicts with path, query, hits, statusCode, cacheStatus and seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://cache-warmer",
+        headers={WARMER_HEADER: "1"},
+        timeout=None
+    ) as client:
+        async def warm(path, query, hits):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    # Rolling date ranges are shifted to today's
+                    response = await client.get(f"{path}?{resolve_query(query)}" if query else path)
+                    status_code, cache_status = response.status_code, response.headers.get("x-cache")
+                except Exception as e:
+                    logger.error(f"Cache warming of {path}?{query} failed: {str(e)}")
+                    status_code, cache_status = None, None
+                return {
+                    "path": path,
+                    "query": query,
+                    "hits": hits,
+                    "statusCode": status_code,
+                    "cacheStatus": cache_status,
+                    "seconds": round(time.perf_counter() - started, 4)
+                }
+
+        return await asyncio.gather(*(warm(*request) for request in requests))
+
+def warm_cache(app, reason: str):
+    """
+    Pre-compute the most popular analytics responses
+
+    The lock is held by a session on its own connection, outside any
+    transaction, so no connection sits idle in transaction while the
+    requests run.
+
+    Args:
+        app: FastAPI application whose endpoints are requested
+        reason (str): Why the run started, kept in the report (e.g. schedule, data_loaded)
+
+    Returns:
+        list of per-URL results, or None if another worker is already warming
+    """
+    popularity.flush()
+    lock_conn = engine.connect()
+    locked = False
+    try:
+        locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": WARM_LOCK_KEY}).scalar()
+        # Ends the implicit transaction; the session lock outlives it
+        lock_conn.commit()
+        if not locked:
+            return None
+
+        db = get_db_session()
+        try:
+            db.execute(text("DELETE FROM cache_popularity WHERE day <= current_date - :days"), {"days": WARM_LOOKBACK_DAYS})
+            requests = popular_requests(db)
+            db.commit()
+        finally:
+            db.close()
+
+        started_at = datetime.now()
+        results = asyncio.run(request_all(app, requests, WARM_CONCURRENCY))
+        finished_at = datetime.now()
+
+        db = get_db_session()
+        try:
+            db.execute(text("DELETE FROM cache_warm_results"))
+            if results:
+                db.execute(text("""
+                    INSERT INTO cache_warm_results
+                        (path, query, run_started_at, reason, hits, status_code, cache_status, seconds, warmed_at)
+                    VALUES (:path, :query, :started_at, :reason, :hits, :statusCode, :cacheStatus, :seconds, :finished_at)
+                """), [
+                    {**result, "started_at": started_at, "finished_at": finished_at, "reason": reason}
+                    for result in results
+                ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return results
+    finally:
+        if locked:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": WARM_LOCK_KEY})
+            lock_conn.commit()
+        lock_conn.close()
+
+def warm_cache_job(app, reason: str):
+    """Scheduler entry point that warms the cache"""
+    try:
+        results = warm_cache(app, reason)
+        if results and any(result["statusCode"] != 200 for result in results):
+            logger.error(f"Cache warming ({reason}) had failed requests")
+    except Exception as e:
+        logger.error(f"Error warming the response cache: {str(e)}")
+
+def get_warming_report(db):
+    """
+    Summarize the last warming run
+
+    Computed responses are the ones a first visitor would otherwise have
+    waited for, so their query time is the time saved.
+    """
+    rows = db.execute(text("""
+        SELECT path, query, run_started_at, reason, hits, status_code, cache_status, seconds, warmed_at
+        FROM cache_warm_results
+        ORDER BY hits DESC
+    """)).all()
+    if not rows:
+        return {"lastRun": None, "keys": []}
+
+    computed = [r for r in rows if r.status_code == 200 and r.cache_status == "MISS"]
+    return {
+        "lastRun": {
+            "startedAt": rows[0].run_started_at.isoformat(),
+            "finishedAt": max(r.warmed_at for r in rows).isoformat(),
+            "reason": rows[0].reason,
+            "keys": len(rows),
+            "warmed": len(computed),
+            "alreadyCached": sum(1 for r in rows if r.status_code == 200 and r.cache_status == "HIT"),
+            "failed": sum(1 for r in rows if r.status_code != 200),
+            "secondsSaved": round(sum(r.seconds for r in computed), 3)
+        },
+        "keys": [
+            {
+                "path": r.path,
+                "query": r.query,
+                "hits": r.hits,
+                "statusCode": r.status_code,
+                "cacheStatus": r.cache_status,
+                "seconds": r.seconds
+            }
+            for r in rows
+        ]
+    }
+
+def trigger_cache_warming(scheduler, app, reason: str):
+    """Run the warmer on the scheduler as soon as possible, once even if triggered repeatedly"""
+    scheduler.add_job(
+        warm_cache_job,
+        args=[app, reason],
+        id="cache_warm_now",
+        replace_existing=True
+    )
+
+def schedule_cache_warming(scheduler, app):
+    """Register popularity flushing, the morning warm-up and warming after data loads"""
+    scheduler.add_job(
+        popularity.flush,
+        "interval",
+        seconds=FLUSH_INTERVAL,
+        id="cache_popularity_flush",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        warm_cache_job,
+        "cron",
+        hour=WARM_HOUR,
+        args=[app, "schedule"],
+        id="cache_warm_morning",
+        replace_existing=True
+    )
+    register_data_loaded_handler(lambda tables: trigger_cache_warming(scheduler, app, "data_loaded"))
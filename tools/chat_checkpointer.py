@@ -0,0 +1,128 @@
+from langgraph.checkpoint.memory import MemorySaver
+from sqlalchemy import text
+from db.database import DATABASE_URL, engine
+import sqlite3
+import tempfile
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# postgres: shared by every worker and host, sqlite: shared by the workers of a host, memory: per worker
+BACKEND = os.getenv("CHAT_CHECKPOINTER", "postgres")
+SQLITE_PATH = os.getenv("CHAT_CHECKPOINT_PATH", os.path.join(tempfile.gettempdir(), "iykra_chat_checkpoints.sqlite3"))
+# Connections of the checkpointer's own pool, per worker
+POOL_SIZE = int(os.getenv("CHAT_CHECKPOINT_POOL_SIZE", "4"))
+
+_resource = None
+
+async def open_checkpointer():
+    """
+    Create the checkpointer that stores chat histories
+
+    The Postgres and SQLite savers are async and bound to the running event
+    loop, so call this on the loop at startup. Falls back to an in-memory
+    saver if the backend cannot be opened.
+
+    Returns:
+        LangGraph checkpoint saver
+    """
+    global _resource
+    try:
+        if BACKEND == "postgres":
+            # Optional dependencies: langgraph-checkpoint-postgres and psycopg[binary,pool]
+            from psycopg.rows import dict_row
+            from psycopg_pool import AsyncConnectionPool
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+            pool = AsyncConnectionPool(
+                conninfo=DATABASE_URL,
+                max_size=POOL_SIZE,
+                kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+                open=False
+            )
+            await pool.open()
+            saver = AsyncPostgresSaver(pool)
+            # Creates or upgrades LangGraph's own checkpoint tables
+            await saver.setup()
+            _resource = pool
+            return saver
+        if BACKEND == "sqlite":
+            # Optional dependencies: langgraph-checkpoint-sqlite and aiosqlite
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            conn = await aiosqlite.connect(SQLITE_PATH)
+            await conn.execute("PRAGMA journal_mode=WAL")
+            saver = AsyncSqliteSaver(conn)
+            await saver.setup()
+            _resource = conn
+            return saver
+    except Exception as e:
+        logger.error(f"Could not open the {BACKEND} chat checkpointer, keeping histories in memory: {str(e)}")
+    return MemorySaver()
+
+async def close_checkpointer():
+    """Close the connection pool or file of the checkpointer"""
+    global _resource
+    if _resource is not None:
+        await _resource.close()
+        _resource = None
+
+def checkpoint_memory_usage(saver):
+    """
+    Estimate the stored history size of each chat thread
+
+    Returns:
+        dict of thread id to bytes
+    """
+    if hasattr(saver, "storage"):
+        return _in_memory_usage(saver)
+    if type(saver).__name__ == "AsyncPostgresSaver":
+        with engine.connect() as conn:
+            return dict(conn.execute(text("""
+                SELECT thread_id, sum(bytes)::bigint
+                FROM (
+                    SELECT thread_id, pg_column_size(checkpoint) + pg_column_size(metadata) AS bytes FROM checkpoints
+                    UNION ALL
+                    SELECT thread_id, coalesce(pg_column_size(blob), 0) FROM checkpoint_blobs
+                    UNION ALL
+                    SELECT thread_id, coalesce(pg_column_size(blob), 0) FROM checkpoint_writes
+                ) sizes
+                GROUP BY thread_id
+            """)).all())
+    if type(saver).__name__ == "AsyncSqliteSaver":
+        conn = sqlite3.connect(SQLITE_PATH)
+        try:
+            return dict(conn.execute("""
+                SELECT thread_id, sum(bytes)
+                FROM (
+                    SELECT thread_id, length(checkpoint) + length(metadata) AS bytes FROM checkpoints
+                    UNION ALL
+                    SELECT thread_id, length(value) FROM writes
+                )
+                GROUP BY thread_id
+            """).fetchall())
+        finally:
+            conn.close()
+    return {}
+
+def _in_memory_usage(saver):
+    # Sums the serialized checkpoints, pending writes and channel values MemorySaver keeps per thread
+    usage = {}
+
+    def add(thread_id, typed_value):
+        if isinstance(typed_value, tuple) and len(typed_value) == 2 and isinstance(typed_value[1], (bytes, bytearray)):
+            usage[thread_id] = usage.get(thread_id, 0) + len(typed_value[1])
+
+    for thread_id, namespaces in list(saver.storage.items()):
+        for checkpoints in list(namespaces.values()):
+            for checkpoint, metadata, _ in list(checkpoints.values()):
+                add(thread_id, checkpoint)
+                add(thread_id, metadata)
+    for (thread_id, _, _), writes in list(getattr(saver, "writes", {}).items()):
+        for write in list(writes.values()):
+            add(thread_id, write[2])
+    for (thread_id, *_), blob in list(getattr(saver, "blobs", {}).items()):
+        add(thread_id, blob)
+    return usage
@@ -0,0 +1,199 @@
+from sqlalchemy import text
+from db.database import engine
+import threading
+import uuid
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Most active sessions kept; the least recently used ones are ended beyond this
+MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "500"))
+# Seconds without a message after which a session expires
+SESSION_TIMEOUT = int(os.getenv("CHAT_SESSION_TIMEOUT", "43200"))  # 12 hours
+# Seconds between sweeps for expired sessions
+SWEEP_INTERVAL = int(os.getenv("CHAT_SWEEP_INTERVAL", "300"))
+
+class ChatSessionManager:
+    """
+    Chat sessions shared by all workers, bounded in number and idle time
+
+    Sessions live in the chat_sessions table (migration 0008), so a message
+    may land on any worker. A session is an id for a conversation thread of
+    the shared agent. When a session ends, whether by reset, LRU eviction or
+    expiry, the worker that ended it deletes its history from the attached
+    history store. Every state change is a single UPDATE ... RETURNING, so
+    exactly one worker ends each session even when they sweep at once.
+
+    The methods block on the database; call them from a thread, not the
+    event loop.
+
+    Args:
+        max_sessions (int): Most active sessions kept
+        timeout (int): Idle seconds before a session expires
+    """
+    def __init__(self, max_sessions: int = MAX_SESSIONS, timeout: int = SESSION_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self.history = None
+        self.lock = threading.Lock()
+        self.evictions = {"lru": 0, "expired": 0, "reset": 0}
+
+    def attach_history(self, history):
+        """Set the store of conversation histories, which has delete_session and memory_usage"""
+        self.history = history
+
+    def create(self):
+        """Start a session and get its id"""
+        session_id = str(uuid.uuid4())
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO chat_sessions (session_id) VALUES (:id)"), {"id": session_id})
+            evicted = conn.execute(text("""
+                UPDATE chat_sessions SET ended_at = now(), end_reason = 'lru'
+                WHERE ended_at IS NULL AND session_id IN (
+                    SELECT session_id FROM chat_sessions
+                    WHERE ended_at IS NULL
+                    ORDER BY last_active DESC
+                    OFFSET :max_sessions
+                )
+                RETURNING session_id
+            """), {"max_sessions": self.max_sessions}).scalars().all()
+        self._end_histories(evicted, "lru")
+        return session_id
+
+    def touch(self, session_id: str):
+        """
+        Record a message on a session
+
+        Returns:
+            "active", "expired" (also for sessions evicted before), or "missing"
+        """
+        with engine.begin() as conn:
+            active = conn.execute(text("""
+                UPDATE chat_sessions SET last_active = now(), messages = messages + 1
+                WHERE session_id = :id
+                  AND ended_at IS NULL
+                  AND last_active > now() - make_interval(secs => :timeout)
+                RETURNING session_id
+            """), {"id": session_id, "timeout": self.timeout}).first()
+            if active:
+                return "active"
+
+            expired = conn.execute(text("""
+                UPDATE chat_sessions SET ended_at = now(), end_reason = 'expired'
+                WHERE session_id = :id AND ended_at IS NULL
+                RETURNING session_id
+            """), {"id": session_id}).scalars().all()
+            end_reason = conn.execute(
+                text("SELECT end_reason FROM chat_sessions WHERE session_id = :id"), {"id": session_id}
+            ).scalar()
+
+        self._end_histories(expired, "expired")
+        # Sessions the client reset are gone rather than expired
+        return "expired" if end_reason in ("expired", "lru") else "missing"
+
+    def end(self, session_id: str):
+        """End a session on the client's request; returns whether it was active"""
+        with engine.begin() as conn:
+            ended = conn.execute(text("""
+                UPDATE chat_sessions SET ended_at = now(), end_reason = 'reset'
+                WHERE session_id = :id AND ended_at IS NULL
+                RETURNING session_id
+            """), {"id": session_id}).scalars().all()
+        self._end_histories(ended, "reset")
+        return bool(ended)
+
+    def sweep(self):
+        """End every session idle for longer than the timeout and purge long-ended ones; returns how many ended"""
+        with engine.begin() as conn:
+            expired = conn.execute(text("""
+                UPDATE chat_sessions SET ended_at = now(), end_reason = 'expired'
+                WHERE ended_at IS NULL AND last_active <= now() - make_interval(secs => :timeout)
+                RETURNING session_id
+            """), {"timeout": self.timeout}).scalars().all()
+            conn.execute(text("""
+                DELETE FROM chat_sessions WHERE ended_at < now() - make_interval(secs => :timeout)
+            """), {"timeout": self.timeout})
+        self._end_histories(expired, "expired")
+        return len(expired)
+
+    def sweep_job(self):
+        """Scheduler entry point for sweep"""
+        try:
+            self.sweep()
+        except Exception as e:
+            logger.error(f"Error sweeping chat sessions: {str(e)}")
+
+    def _end_histories(self, session_ids, reason):
+        with self.lock:
+            self.evictions[reason] += len(session_ids)
+        if self.history is None:
+            return
+        for session_id in session_ids:
+            try:
+                self.history.delete_session(session_id)
+            except Exception as e:
+                logger.error(f"Could not delete the history of chat session {session_id}: {str(e)}")
+
+    def stats(self, top: int = 20):
+        """
+        Session count, estimated history bytes and eviction counters
+
+        Args:
+            top (int): Number of largest sessions to list
+        """
+        try:
+            usage = self.history.memory_usage() if self.history is not None else {}
+        except Exception as e:
+            logger.error(f"Could not measure chat history memory: {str(e)}")
+            usage = {}
+
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT session_id, created_at, last_active, messages
+                FROM chat_sessions
+                WHERE ended_at IS NULL
+            """)).all()
+            ended = dict(conn.execute(text("""
+                SELECT end_reason, count(*) FROM chat_sessions WHERE ended_at IS NOT NULL GROUP BY end_reason
+            """)).all())
+
+        sessions = [
+            {
+                "sessionId": row.session_id,
+                "createdAt": row.created_at.isoformat(),
+                "lastActive": row.last_active.isoformat(),
+                "messages": row.messages,
+                "bytes": usage.get(row.session_id, 0)
+            }
+            for row in rows
+        ]
+        active_ids = {s["sessionId"] for s in sessions}
+        sessions.sort(key=lambda s: s["bytes"], reverse=True)
+        with self.lock:
+            evictions = dict(self.evictions)
+        return {
+            "count": len(sessions),
+            "maxSessions": self.max_sessions,
+            "timeoutSeconds": self.timeout,
+            "bytes": sum(s["bytes"] for s in sessions),
+            # History left behind by sessions that are no longer active
+            "orphanBytes": sum(size for session_id, size in usage.items() if session_id not in active_ids),
+            # Sessions ended within the last timeout, across all workers
+            "recentlyEnded": ended,
+            # Sessions this worker ended since it started
+            "evictions": evictions,
+            "largest": sessions[:top]
+        }
+
+chat_sessions = ChatSessionManager()
+
+def schedule_chat_session_sweep(scheduler):
+    """Register the expired session sweep on the shared scheduler"""
+    scheduler.add_job(
+        chat_sessions.sweep_job,
+        "interval",
+        seconds=SWEEP_INTERVAL,
+        id="chat_session_sweep",
+        replace_existing=True
+    )
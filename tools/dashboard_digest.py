@@ -0,0 +1,164 @@
+from dataclasses import replace
+from sqlalchemy import func, distinct, case, desc
+from sqlalchemy.orm import Session
+from db.models import Sales, SalesProducts, ProductCatalog, ReviewedProduct, SocialMedia, SentimentSocialMedia, SustainabilityMention
+from db.review_queries import review_query
+from tools.filters import AnalyticsFilter
+
+# Tables the digest reads; writes to them invalidate cached digests
+DIGEST_TABLES = (
+    "sales", "sale_product", "product_catalog", "reviewed_product",
+    "social_media", "sentiment_social_media", "sustainability_mention"
+)
+# Rows per top movers table
+TOP_MOVERS = 5
+
+def compact_number(value):
+    """Format a number with three significant digits and a k/M/B suffix"""
+    if value is None:
+        return "-"
+    value = float(value)
+    for limit, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "k")):
+        if abs(value) >= limit:
+            return f"{value / limit:.3g}{suffix}"
+    return f"{value:.3g}"
+
+def change(current, previous):
+    """Relative change between two periods, e.g. +12%"""
+    current, previous = float(current or 0), float(previous or 0)
+    if previous == 0:
+        return "new" if current else "-"
+    return f"{(current - previous) / abs(previous) * 100:+.0f}%"
+
+def table(header, rows):
+    """Pipe-separated table, far fewer tokens than the same data as JSON"""
+    return "\n".join("|".join(str(cell) for cell in row) for row in [header, *rows])
+
+def compare_periods(query, date_column, filters: AnalyticsFilter, previous: AnalyticsFilter, **measures):
+    """
+    Evaluate aggregates over the current and the previous period in one query
+
+    Args:
+        query: Query already filtered to the span of both periods
+        date_column: Column the periods are taken on
+        filters (AnalyticsFilter): Current period
+        previous (AnalyticsFilter): Previous period
+        **measures: Aggregate functions by name
+
+    Returns:
+        dict of name to (current, previous)
+    """
+    current_condition = date_column >= filters.start_date
+    previous_condition = date_column <= previous.end_date
+    columns = []
+    for measure in measures.values():
+        columns += [measure.filter(current_condition), measure.filter(previous_condition)]
+    row = query.with_entities(*columns).one()
+    return {name: (row[2 * i], row[2 * i + 1]) for i, name in enumerate(measures)}
+
+def top_movers(query, label, value, date_column, filters: AnalyticsFilter, previous: AnalyticsFilter, limit: int = TOP_MOVERS):
+    """Get (label, current, previous) of the groups whose value changed most between the periods"""
+    current_value = func.coalesce(func.sum(value).filter(date_column >= filters.start_date), 0)
+    previous_value = func.coalesce(func.sum(value).filter(date_column <= previous.end_date), 0)
+    return query.with_entities(
+        label, current_value, previous_value
+    ).group_by(label).order_by(
+        desc(func.abs(current_value - previous_value))
+    ).limit(limit).all()
+
+def build_digest(db: Session, filters: AnalyticsFilter):
+    """
+    Summarize a brand and date range as compact tables for the summary prompt
+
+    Key metrics of sales, reviews, social media and sustainability mentions
+    are compared with the previous period of the same length, followed by
+    the product categories and products whose revenue moved most.
+
+    Args:
+        db: Database session
+        filters (AnalyticsFilter): Brand and date range, the default window if no range is given
+
+    Returns:
+        str digest
+    """
+    filters = filters.with_default_range()
+    previous = filters.previous_period()
+    span = replace(filters, start_date=previous.start_date)
+
+    sales = db.query(Sales).join(
+        SalesProducts, Sales.transaction_id == SalesProducts.transaction_id
+    ).join(
+        ProductCatalog, SalesProducts.product_id == ProductCatalog.product_id
+    ).filter(*span.conditions(ProductCatalog.brand, Sales.purchase_date))
+    sales_kpis = compare_periods(
+        sales, Sales.purchase_date, filters, previous,
+        revenue=func.sum(Sales.order_value),
+        orders=func.count(distinct(Sales.transaction_id)),
+        returnRatePct=func.avg(Sales.return_rate * 100)
+    )
+
+    review_kpis = compare_periods(
+        review_query(db, filters=span), ReviewedProduct.review_date, filters, previous,
+        reviews=func.count(),
+        avgRating=func.avg(ReviewedProduct.rating),
+        positiveReviewsPct=func.avg(case((ReviewedProduct.sentiment_score >= 0.5, 100.0), else_=0.0))
+    )
+
+    posts = db.query(SocialMedia).filter(*span.conditions(SocialMedia.brand, SocialMedia.post_date))
+    social_kpis = compare_periods(
+        posts, SocialMedia.post_date, filters, previous,
+        posts=func.count(),
+        reach=func.sum(SocialMedia.reach_count),
+        engagement=func.sum(SocialMedia.engagement_count)
+    )
+    comments = db.query(SentimentSocialMedia).join(
+        SocialMedia, SocialMedia.social_media_post_id == SentimentSocialMedia.id_post
+    ).filter(*span.conditions(SocialMedia.brand, SocialMedia.post_date))
+    comment_kpis = compare_periods(
+        comments, SocialMedia.post_date, filters, previous,
+        comments=func.count(),
+        positiveCommentsPct=func.avg(case((SentimentSocialMedia.sentiment_score > 0.5, 100.0), else_=0.0))
+    )
+
+    mentions = db.query(SustainabilityMention).filter(
+        *span.conditions(SustainabilityMention.brand, SustainabilityMention.document_date)
+    )
+    sustainability_kpis = compare_periods(
+        mentions, SustainabilityMention.document_date, filters, previous,
+        ecoMentions=func.sum(SustainabilityMention.hit_count)
+    )
+
+    kpis = {**sales_kpis, **review_kpis, **social_kpis, **comment_kpis, **sustainability_kpis}
+    category_movers = top_movers(
+        sales, ProductCatalog.subcategory, Sales.order_value, Sales.purchase_date, filters, previous
+    )
+    product_movers = top_movers(
+        sales, ProductCatalog.product_name, Sales.order_value, Sales.purchase_date, filters, previous
+    )
+
+    header = "brand={} period={}..{} prev={}..{}".format(
+        filters.brand or "all",
+        filters.start_date.isoformat(),
+        filters.end_date.isoformat(),
+        previous.start_date.isoformat(),
+        previous.end_date.isoformat()
+    )
+    sections = [
+        header,
+        "KPIs",
+        table(
+            ("metric", "now", "prev", "chg"),
+            [(name, compact_number(now), compact_number(prev), change(now, prev)) for name, (now, prev) in kpis.items()]
+        ),
+        "Category revenue movers",
+        table(
+            ("category", "now", "prev", "chg"),
+            [(name, compact_number(now), compact_number(prev), change(now, prev)) for name, now, prev in category_movers]
+        ),
+        "Product revenue movers",
+        table(
+            ("product", "now", "prev", "chg"),
+            [(name, compact_number(now), compact_number(prev), change(now, prev)) for name, now, prev in product_movers]
+        )
+    ]
+    return "\n".join(sections)
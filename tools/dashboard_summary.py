@@ -0,0 +1,286 @@
+from datetime import datetime, timedelta
+from openai import AsyncOpenAI
+from sqlalchemy import text
+from db.database import engine, get_db_session, replica_engines, DB_REPLICA_MAX_LAG
+from tools.cache_invalidation import register_data_loaded_handler
+from tools.cache_warmer import WARMER_HEADER
+from tools.response_cache import ResponseCache, create_backend
+from tools.single_flight import single_flight
+import asyncio
+import hashlib
+import httpx
+import json
+import tempfile
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompt or model changes, so summaries written for the old one are not served
+PROMPT_VERSION = 2
+MODEL = "gpt-4o"
+
+# Summaries are keyed by their input, so they never go stale; the TTL only bounds their age
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", "604800"))  # 7 days
+SUMMARY_CACHE_MAX_BYTES = int(float(os.getenv("SUMMARY_CACHE_MAX_MB", "16")) * 1024 * 1024)
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(tempfile.gettempdir(), "iykra_summary_cache.sqlite3"))
+# Hour of the daily precompute, after the morning cache warm-up
+PRECOMPUTE_HOUR = int(os.getenv("SUMMARY_PRECOMPUTE_HOUR", "6"))
+# Brands summarized at once, kept low to stay within the OpenAI rate limit
+PRECOMPUTE_CONCURRENCY = int(os.getenv("SUMMARY_PRECOMPUTE_CONCURRENCY", "2"))
+
+# Arbitrary key so only one worker precomputes at a time
+PRECOMPUTE_LOCK_KEY = 45001
+# Name the summaries are counted under in the cache and single-flight stats
+ENDPOINT = "dashboard_summary"
+
+# Endpoint serving the cached digest of a brand and date range
+DIGEST_PATH = "/api/ai/dashboard-digest"
+
+# Same backend as the response cache, in its own file or namespace
+summary_cache = ResponseCache(create_backend(
+    sqlite_path=SUMMARY_CACHE_PATH,
+    redis_namespace="summary_cache:",
+    max_bytes=SUMMARY_CACHE_MAX_BYTES
+))
+
+def summary_params(dashboard_data, brand):
+    """
+    Build the chat completion parameters of a dashboard summary
+
+    Args:
+        dashboard_data: Digest from tools.dashboard_digest, or dashboard JSON posted by a client
+        brand (str): Brand of the dashboard
+    """
+    if isinstance(dashboard_data, str):
+        data = f"""Dashboard Digest (pipe-separated tables; chg compares with the previous period):
+{dashboard_data}"""
+    else:
+        data = f"Dashboard Data: {json.dumps(dashboard_data, separators=(',', ':'), default=str)}"
+
+    # Prepare the prompt with dashboard data
+    prompt = f"""Analyze this dashboard data for {brand} and provide a comprehensive business summary:
+
+        Brand: {brand}
+        {data}
+
+        Please provide:
+        1. Key performance insights
+        2. Actionable recommendations
+
+        do not talk to much about the data. just provide the summary in the most easy way possible.
+        the summary should be easy to understand. use high level perspective like we talk to CEOs.
+        do not use list, use numbering and paragraphs to explain the data. reposonse should be short and clear.
+        """
+
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a business analytics expert who provides clear, actionable insights from dashboard data."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 1000
+    }
+
+def summary_key(dashboard_data, brand):
+    """Hash of the brand, the dashboard data with sorted keys and the prompt version"""
+    canonical = json.dumps(
+        {"brand": brand, "data": dashboard_data, "promptVersion": PROMPT_VERSION},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def get_cached_summary(key: str):
+    """Get a cached summary, or None"""
+    body = summary_cache.get(ENDPOINT, key)
+    return body.decode("utf-8") if body is not None else None
+
+def store_summary(key: str, brand: str, summary: str):
+    summary_cache.set(
+        key,
+        summary.encode("utf-8"),
+        SUMMARY_CACHE_TTL,
+        {"tables": [], "brand": brand, "start": None, "end": None}
+    )
+
+async def summarize(client, dashboard_data, brand):
+    """
+    Get the summary of dashboard data from the cache, or generate and cache it
+
+    Identical requests generating at the same time share one OpenAI call.
+
+    Args:
+        client: AsyncOpenAI client
+        dashboard_data: Digest or dashboard JSON, see summary_params
+        brand (str): Brand of the dashboard
+
+    Returns:
+        tuple of (summary, whether it came from the cache)
+    """
+    key = summary_key(dashboard_data, brand)
+    summary = get_cached_summary(key)
+    if summary is not None:
+        return summary, True
+
+    async def generate():
+        response = await client.chat.completions.create(**summary_params(dashboard_data, brand))
+        summary = response.choices[0].message.content
+        store_summary(key, brand, summary)
+        return summary
+
+    return await single_flight.do_async(ENDPOINT, key, generate), False
+
+async def stream_summary(client, dashboard_data, brand, key: str):
+    """
+    Generate a summary as text chunks, caching it once complete
+
+    Args:
+        client: AsyncOpenAI client
+        dashboard_data: Digest or dashboard JSON, see summary_params
+        brand (str): Brand of the dashboard
+        key (str): summary_key of the data and brand
+    """
+    parts = []
+    stream = await client.chat.completions.create(**summary_params(dashboard_data, brand), stream=True)
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield chunk.choices[0].delta.content
+    store_summary(key, brand, "".join(parts))
+
+def view_client(app):
+    """HTTP client that requests the application's own endpoints in-process"""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://dashboard-summary",
+        # Internal requests are not counted as demand for cache warming
+        headers={WARMER_HEADER: "1"},
+        timeout=None
+    )
+
+async def fetch_digest(client, brand: str, start_date=None, end_date=None):
+    """
+    Get the digest of a brand and date range, usually from the response cache
+
+    Args:
+        client: Client from view_client
+        brand (str): Brand to summarize
+        start_date (date): First day, the default window if None
+        end_date (date): Last day, the default window if None
+
+    Returns:
+        str digest
+    """
+    params = {"brand": brand}
+    if start_date and end_date:
+        params.update(startDate=start_date.isoformat(), endDate=end_date.isoformat())
+    response = await client.get(DIGEST_PATH, params=params)
+    response.raise_for_status()
+    return response.json()["digest"]
+
+async def summarize_brands(app, brands, concurrency: int):
+    """
+    Summarize the default window of each brand, a few at a time
+
+    Returns:
+        list of dicts with brand, cacheStatus (HIT, MISS or None on failure) and seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as openai_client, view_client(app) as client:
+        async def precompute(brand):
+            async with semaphore:
+                started = asyncio.get_running_loop().time()
+                try:
+                    _, cached = await summarize(openai_client, await fetch_digest(client, brand), brand)
+                    cache_status = "HIT" if cached else "MISS"
+                except Exception as e:
+                    logger.error(f"Summary precompute for {brand} failed: {str(e)}")
+                    cache_status = None
+                return {
+                    "brand": brand,
+                    "cacheStatus": cache_status,
+                    "seconds": round(asyncio.get_running_loop().time() - started, 4)
+                }
+
+        return await asyncio.gather(*(precompute(brand) for brand in brands))
+
+def precompute_summaries(app):
+    """
+    Summarize every brand's default date window into the summary cache
+
+    The lock is held by a session on its own connection, outside any
+    transaction, so no connection sits idle in transaction during the
+    OpenAI calls.
+
+    Args:
+        app: FastAPI application that serves the digests
+
+    Returns:
+        list of per-brand results, or None if another worker is already precomputing
+    """
+    lock_conn = engine.connect()
+    locked = False
+    try:
+        locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": PRECOMPUTE_LOCK_KEY}).scalar()
+        # Ends the implicit transaction; the session lock outlives it
+        lock_conn.commit()
+        if not locked:
+            return None
+
+        db = get_db_session()
+        try:
+            brands = db.execute(text(
+                "SELECT DISTINCT brand FROM product_catalog WHERE brand IS NOT NULL ORDER BY brand"
+            )).scalars().all()
+        finally:
+            db.close()
+        return asyncio.run(summarize_brands(app, brands, PRECOMPUTE_CONCURRENCY))
+    finally:
+        if locked:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PRECOMPUTE_LOCK_KEY})
+            lock_conn.commit()
+        lock_conn.close()
+
+def precompute_summaries_job(app):
+    """Scheduler entry point that precomputes dashboard summaries"""
+    try:
+        results = precompute_summaries(app)
+        if results and any(result["cacheStatus"] is None for result in results):
+            logger.error("Dashboard summary precompute had failed brands")
+    except Exception as e:
+        logger.error(f"Error precomputing dashboard summaries: {str(e)}")
+
+def trigger_summary_precompute(scheduler, app):
+    """
+    Precompute on the scheduler, once even if triggered repeatedly
+
+    With read replicas, waits until they can have caught up with the load,
+    so the summaries are not built from data the replicas do not have yet.
+    """
+    delay = DB_REPLICA_MAX_LAG if replica_engines else 0
+    scheduler.add_job(
+        precompute_summaries_job,
+        "date",
+        run_date=datetime.now() + timedelta(seconds=delay),
+        args=[app],
+        id="summary_precompute_now",
+        replace_existing=True
+    )
+
+def schedule_summary_precompute(scheduler, app):
+    """Register the daily precompute and precomputing after data loads"""
+    scheduler.add_job(
+        precompute_summaries_job,
+        "cron",
+        hour=PRECOMPUTE_HOUR,
+        minute=15,
+        args=[app],
+        id="summary_precompute_daily",
+        replace_existing=True
+    )
+    register_data_loaded_handler(lambda tables: trigger_summary_precompute(scheduler, app))
@@ -0,0 +1,83 @@
+from array import array
+from langchain_core.embeddings import Embeddings
+from tools.response_cache import ResponseCache, create_backend
+import hashlib
+import tempfile
+import unicodedata
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# memory: per-worker LRU, sqlite: persisted and shared by the workers of a host, redis: shared by every host
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "memory")
+EMBEDDING_CACHE_MAX_BYTES = int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", "32")) * 1024 * 1024)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(tempfile.gettempdir(), "iykra_embedding_cache.sqlite3"))
+# An embedding model always returns the same vector, so entries only expire to make room
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", "2592000"))  # 30 days
+
+query_embedding_cache = ResponseCache(create_backend(
+    EMBEDDING_CACHE_BACKEND,
+    sqlite_path=EMBEDDING_CACHE_PATH,
+    redis_namespace="embedding_cache:",
+    max_bytes=EMBEDDING_CACHE_MAX_BYTES
+))
+
+def normalize_query(text: str):
+    """Fold case, Unicode forms and whitespace, so trivially different spellings share an embedding"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings whose query vectors are cached by model and normalized text
+
+    Document embedding, only used when building the vector store, passes
+    through. Vectors are stored as float32, the precision FAISS searches
+    with.
+
+    Args:
+        embeddings: Embeddings that compute the vectors, e.g. OpenAIEmbeddings
+        model (str): Model name, part of the cache key
+        cache (ResponseCache): Store of the vectors, query_embedding_cache by default
+    """
+    def __init__(self, embeddings, model: str, cache: ResponseCache = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or query_embedding_cache
+
+    def cache_key(self, text: str):
+        digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _get(self, key):
+        body = self.cache.get(self.model, key)
+        if body is None:
+            return None
+        vector = array("f")
+        vector.frombytes(body)
+        return vector.tolist()
+
+    def _set(self, key, vector):
+        self.cache.set(key, array("f", vector).tobytes(), EMBEDDING_CACHE_TTL, {"tables": [], "brand": None, "start": None, "end": None})
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text):
+        key = self.cache_key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._set(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        key = self.cache_key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._set(key, vector)
+        return vector
@@ -11,6 +11,7 @@ import tiktoken
 from dotenv import load_dotenv
 import os
 from db.database import engine, get_db_session, DATABASE_URL
+from tools.embedding_cache import CachedQueryEmbeddings
 from sqlalchemy import text
 import logging
 
@@ -242,7 +243,9 @@ def save_vector_db(vector_store: FAISS, path: str = "vector_db"):
 def load_vector_db(path: str = "vector_db"):
     
     print(f"=== Loading Vector Store ===")
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+    # Repeated retriever queries are answered from the query embedding cache
+    model = "text-embedding-3-large"
+    embeddings = CachedQueryEmbeddings(OpenAIEmbeddings(model=model), model)
     
     vector_store = FAISS.load_local(
         folder_path=path,
@@ -0,0 +1,92 @@
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import HTTPException, Query
+import hashlib
+
+# Length of the window used by date-series endpoints when no range is given
+DEFAULT_WINDOW_DAYS = 7
+
+@dataclass(frozen=True)
+class AnalyticsFilter:
+    """
+    Validated brand and date range shared by the dashboard endpoints
+
+    Instances are immutable and hashable, and `cache_key` is the same for
+    every request that asks for the same data.
+
+    Attributes:
+        brand (str): Brand name, None for all brands
+        start_date (date): First day of the range, inclusive
+        end_date (date): Last day of the range, inclusive
+    """
+    brand: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @property
+    def has_date_range(self) -> bool:
+        return self.start_date is not None and self.end_date is not None
+
+    @property
+    def is_historical(self) -> bool:
+        """True when the whole range is before today, so its data no longer changes"""
+        return self.has_date_range and self.end_date < date.today()
+
+    @property
+    def canonical(self) -> str:
+        return "brand={}&start={}&end={}".format(
+            self.brand or "",
+            self.start_date.isoformat() if self.start_date else "",
+            self.end_date.isoformat() if self.end_date else ""
+        )
+
+    @property
+    def cache_key(self) -> str:
+        return hashlib.sha256(self.canonical.encode("utf-8")).hexdigest()[:32]
+
+    def with_default_range(self, days: int = DEFAULT_WINDOW_DAYS) -> "AnalyticsFilter":
+        """Fill a missing date range with the `days` days before yesterday, up to yesterday"""
+        if self.has_date_range:
+            return self
+        end_date = date.today() - timedelta(days=1)
+        return replace(self, start_date=end_date - timedelta(days=days), end_date=end_date)
+
+    def previous_period(self) -> "AnalyticsFilter":
+        """Range of the same number of days that ends the day before this one starts"""
+        days = self.end_date - self.start_date + timedelta(days=1)
+        return replace(self, start_date=self.start_date - days, end_date=self.start_date - timedelta(days=1))
+
+    def conditions(self, brand_column=None, date_column=None):
+        """
+        Build SQLAlchemy filter conditions for this filter
+
+        Args:
+            brand_column: Column compared with the brand, skipped if None
+            date_column: Column compared with the date range, skipped if None
+
+        Returns:
+            list of conditions for Query.filter(*conditions)
+        """
+        conditions = []
+        if self.brand and brand_column is not None:
+            conditions.append(brand_column == self.brand)
+        if self.has_date_range and date_column is not None:
+            conditions.append(date_column.between(self.start_date, self.end_date))
+        return conditions
+
+def analytics_filter(
+    brand: str = Query(None, description="Brand name to filter data"),
+    startDate: date = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
+    endDate: date = Query(None, description="End date for filtering (YYYY-MM-DD)")
+) -> AnalyticsFilter:
+    """FastAPI dependency that validates the brand and date range query parameters"""
+    if (startDate is None) != (endDate is None):
+        raise HTTPException(status_code=422, detail="startDate and endDate must be given together")
+    if startDate and startDate > endDate:
+        raise HTTPException(status_code=422, detail="startDate must not be after endDate")
+    return AnalyticsFilter(
+        brand=(brand or "").strip() or None,
+        start_date=startDate,
+        end_date=endDate
+    )
@@ -0,0 +1,51 @@
+import ahocorasick
+import json
+
+# Keyword matching run in the sustainability scan's worker processes.
+# Imports nothing from the application, so a spawned worker only loads this
+# module instead of the API's engines, models and vector store.
+
+# Automaton built once per pool process by init_worker
+_automaton = None
+
+def build_automaton(keywords):
+    """Compile all keywords into a single Aho-Corasick automaton"""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+def count_keywords(automaton, text_value):
+    """Count whole-word keyword hits in a text with one pass over it"""
+    haystack = " ".join(text_value.lower().split())
+    hits = {}
+    for end_index, keyword in automaton.iter(haystack):
+        start_index = end_index - len(keyword) + 1
+        # Only count matches that are not part of a longer word
+        if start_index > 0 and haystack[start_index - 1].isalnum():
+            continue
+        if end_index + 1 < len(haystack) and haystack[end_index + 1].isalnum():
+            continue
+        hits[keyword] = hits.get(keyword, 0) + 1
+    return hits
+
+def init_worker(keywords):
+    global _automaton
+    _automaton = build_automaton(keywords)
+
+def match_chunk(rows):
+    """Match one chunk of documents, returning only documents with hits"""
+    matches = []
+    for document_id, text_value, brand, document_date, sentiment_score in rows:
+        hits = count_keywords(_automaton, text_value)
+        if hits:
+            matches.append({
+                "document_id": document_id,
+                "brand": brand,
+                "document_date": document_date,
+                "sentiment_score": sentiment_score,
+                "hit_count": sum(hits.values()),
+                "keyword_hits": json.dumps(hits)
+            })
+    return matches
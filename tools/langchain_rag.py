@@ -3,15 +3,20 @@ from langchain_community.utilities import SQLDatabase
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import Tool
 from langgraph.prebuilt import create_react_agent
 from langchain.agents.agent_toolkits import create_retriever_tool
 from langgraph.checkpoint.memory import MemorySaver
 from typing_extensions import TypedDict, Annotated
 from dotenv import load_dotenv
 import os
-from db.database import DATABASE_URL
-import asyncio
+from db.database import get_read_engine
+from tools.chat_sessions import chat_sessions
+from tools.chat_checkpointer import checkpoint_memory_usage
+from tools.proper_nouns import proper_nouns
+from tools.sql_result_cache import CachedQuerySQLDatabaseTool
+import threading
 import uuid
 import logging
 import json
@@ -25,6 +30,22 @@ logging.getLogger("asyncio").setLevel(logging.ERROR)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.ERROR)
 
+# Source tables the agent may query. Partitions and the application's own
+# bookkeeping tables (migrations, data versions, cache, sessions, checkpoints)
+# are left out of its schema prompt and table list.
+AGENT_TABLES = [
+    "product_catalog",
+    "reviewed_product",
+    "customer_demographics",
+    "campaign",
+    "sentiment_campaign",
+    "social_media",
+    "sentiment_social_media",
+    "sales",
+    "sale_product",
+    "sustainability_integration",
+]
+
 class State(TypedDict):
     question: str
     query: str
@@ -35,20 +56,48 @@ class QueryOutput(TypedDict):
     """Generated SQL query."""
     query: Annotated[str, ..., "Syntactically valid SQL query."]
 
+class ReplicaSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase that runs every query on the next healthy read replica, or the primary
+
+    Table info (schema plus sample rows) is read once per set of tables and
+    then served from memory, for the system prompt and the schema tool alike.
+    """
+
+    @property
+    def _engine(self):
+        return get_read_engine()
+
+    @_engine.setter
+    def _engine(self, engine):
+        # The routed engine is resolved on every use instead
+        pass
+
+    def get_table_info(self, table_names=None):
+        if not hasattr(self, "_table_info_cache"):
+            self._table_info_cache = {}
+        key = tuple(sorted(table_names)) if table_names else None
+        if key not in self._table_info_cache:
+            self._table_info_cache[key] = super().get_table_info(table_names)
+        return self._table_info_cache[key]
+
 class LangChainRAG:
-    def __init__(self, vector_store=None, model_name="gpt-4o", temperature=0, streaming=True):
+    def __init__(self, vector_store=None, model_name="gpt-4o", temperature=0, streaming=True, checkpointer=None):
         """
         Initialize LangChainRAG with configuration
+
+        One instance serves every chat session of the process (see
+        get_rag_agent); sessions are separate checkpointer threads.
         
         Args:
-            vector_store: Pre-loaded vector store instance
+            vector_store: Pre-loaded vector store instance, searched for review and post content
             model_name (str): Name of the OpenAI model to use
             temperature (float): Temperature for model generation
             streaming (bool): Whether to use streaming for model generation
+            checkpointer: Saver of the conversation histories, in memory if None (see tools.chat_checkpointer)
         """
         load_dotenv()
-        self.memory = MemorySaver()
-        self.config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        self.memory = checkpointer or MemorySaver()
         
         # Set environment variables
         if not os.environ.get("LANGSMITH_API_KEY"):
@@ -56,12 +105,17 @@ class LangChainRAG:
             os.environ["LANGSMITH_TRACING"] = os.getenv("LANGSMITH_TRACING")
         
         # Initialize components
-        self.db = SQLDatabase.from_uri(DATABASE_URL)
+        self.db = ReplicaSQLDatabase(get_read_engine(), include_tables=AGENT_TABLES)
         self.llm = ChatOpenAI(model=model_name, temperature=temperature, streaming=streaming, verbose=False)
         self.toolkit = SQLDatabaseToolkit(db=self.db, llm=self.llm)
-        self.tools = self.toolkit.get_tools()
+        # Query results are shared by every session until the tables they read change
+        self.tools = [
+            CachedQuerySQLDatabaseTool(db=self.db, description=tool.description) if isinstance(tool, QuerySQLDatabaseTool) else tool
+            for tool in self.toolkit.get_tools()
+        ]
         
-        # Set vector store and setup retriever if provided
+        # Entity names are resolved locally, the vector store is only used for content search
+        self.setup_proper_noun_tool()
         self.vector_store = vector_store
         if vector_store:
             self.setup_retriever()
@@ -69,18 +123,34 @@ class LangChainRAG:
         # Setup agent
         self.setup_sql_agent()
     
-    def setup_retriever(self):
-        """Setup vector store retriever and create retriever tool"""
-        self.retriever = self.vector_store.as_retriever(search_kwargs={"k": 3})
+    def setup_proper_noun_tool(self):
+        """Create the tool that resolves approximate names with the in-memory fuzzy matcher"""
+        proper_nouns.ensure_loaded()
         description = (
             "Use to look up values to filter on. Input is an approximate spelling "
             "of the proper noun, output is valid proper nouns. Use the noun most "
             "similar to the search."
         )
+
+        self.proper_noun_tool = Tool.from_function(
+            func=proper_nouns.search,
+            name="search_proper_nouns",
+            description=description,
+        )
+        self.tools.append(self.proper_noun_tool)
+
+    def setup_retriever(self):
+        """Setup vector store retriever and create retriever tool"""
+        self.retriever = self.vector_store.as_retriever(search_kwargs={"k": 3})
+        description = (
+            "Use to find reviews, social media posts and comments about a topic, "
+            "e.g. complaints about comfort. Input is a description of the content. "
+            "Do not use it to look up names to filter on."
+        )
         
         self.retriever_tool = create_retriever_tool(
             self.retriever,
-            name="search_proper_nouns",
+            name="search_content",
             description=description,
         )
         self.tools.append(self.retriever_tool)
@@ -143,14 +213,36 @@ class LangChainRAG:
         system = f"{system_message}\n\n{suffix}"
         self.agent = create_react_agent(self.llm, self.tools, prompt=system, checkpointer=self.memory)
 
-    async def run_agent(self, question: str):
+    def session_config(self, thread_id: str):
+        """Graph config that keeps a session's conversation in its own checkpointer thread"""
+        return {"configurable": {"thread_id": thread_id}}
+
+    def delete_session(self, thread_id: str):
+        """Drop the conversation history of a session; call from a thread, the async savers refuse sync calls on the event loop"""
+        self.memory.delete_thread(thread_id)
+
+    def memory_usage(self):
+        """Estimate the stored history of each session, as a dict of thread id to bytes"""
+        return checkpoint_memory_usage(self.memory)
+
+    async def record_exchange(self, question: str, answer: str, thread_id: str):
+        """Add a question and an answer served without running the agent to a session's history, so follow-ups have it"""
+        await self.agent.aupdate_state(
+            self.session_config(thread_id),
+            {"messages": [HumanMessage(content=question), AIMessage(content=answer)]},
+            as_node="agent"
+        )
+
+    async def run_agent(self, question: str, thread_id: str):
         """Run the agent with streaming events"""
         try:
             current_token = ""
             async for msg, metadata in self.agent.astream(
                 {"messages": [HumanMessage(content=question)]},
-                config=self.config,
-                stream_mode='messages'
+                config=self.session_config(thread_id),
+                stream_mode='messages',
+                # Persist the checkpoint once the run finishes instead of after every step
+                durability="exit"
             ):
                 if msg.content and metadata["langgraph_node"] == "agent":
                     # yield json.dumps({"text": msg.content})  # print(msg.content, end="", flush=True)
@@ -191,6 +283,33 @@ class LangChainRAG:
         """Generate a unique thread ID"""
         return str(uuid.uuid4())
 
+_rag_agent = None
+_rag_agent_lock = threading.Lock()
+
+def get_rag_agent(vector_store=None, checkpointer=None):
+    """
+    Get the process-wide agent, building it on first use
+
+    The database handle, table info, LLM client, tools and compiled graph
+    are shared by all sessions, so starting a session costs nothing.
+
+    Args:
+        vector_store: Vector store for the proper noun retriever, used on the first call only
+        checkpointer: Saver of the conversation histories, used on the first call only
+    """
+    global _rag_agent
+    if _rag_agent is None:
+        with _rag_agent_lock:
+            if _rag_agent is None:
+                if checkpointer is None:
+                    logger.error(
+                        "Building the chat agent without a checkpointer: chat histories are kept "
+                        "in this worker's memory only and are lost on other workers and restarts"
+                    )
+                _rag_agent = LangChainRAG(vector_store=vector_store, checkpointer=checkpointer)
+                chat_sessions.attach_history(_rag_agent)
+    return _rag_agent
+
 
 # # Example usage
 # if __name__ == "__main__":
@@ -0,0 +1,183 @@
+from collections import Counter, defaultdict
+from sqlalchemy import text
+from db.database import get_read_engine
+from tools.cache_invalidation import register_data_loaded_handler
+import threading
+import heapq
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Distinct names the agent may filter on, as (kind, query)
+NAME_QUERIES = (
+    ("brand", "SELECT DISTINCT brand FROM product_catalog"),
+    ("product", "SELECT DISTINCT product_name FROM product_catalog"),
+    ("subcategory", "SELECT DISTINCT subcategory FROM product_catalog"),
+    ("color", "SELECT DISTINCT color FROM product_catalog"),
+    ("origin", "SELECT DISTINCT origin FROM product_catalog"),
+    ("sole material", "SELECT DISTINCT sole_material FROM product_catalog"),
+    ("upper material", "SELECT DISTINCT upper_material FROM product_catalog"),
+    ("platform", "SELECT DISTINCT platform FROM social_media"),
+    ("content type", "SELECT DISTINCT jenis_konten FROM social_media"),
+    ("collaborator", "SELECT DISTINCT collabs FROM social_media"),
+)
+# Tables whose loads refresh the names
+NAME_TABLES = {"product_catalog", "social_media"}
+# Names with the largest share of their trigrams in the query, ranked by trigram similarity
+CANDIDATES = 50
+# Best ranked names scored by edit distance
+RESCORED = 10
+# Queries whose matches are remembered until the next refresh
+RESULT_CACHE_SIZE = 1024
+# Lowest similarity returned, 1 is an exact match
+MIN_SCORE = 0.4
+
+def trigrams(value: str):
+    """Trigrams of a lowercased name, padded like pg_trgm so short names and word starts match"""
+    trigram_set = set()
+    for word in value.lower().split():
+        padded = f"  {word} "
+        trigram_set.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigram_set
+
+def edit_distance(a: str, b: str):
+    """Levenshtein distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def similarity(a: str, b: str):
+    """1 minus the edit distance relative to the longer string"""
+    longest = max(len(a), len(b))
+    return 1 - edit_distance(a, b) / longest if longest else 1
+
+class ProperNounResolver:
+    """
+    In-memory fuzzy lookup of brand, product, category, material and platform names
+
+    Names are indexed by trigram. A lookup takes the names with the largest
+    share of their trigrams in the query, ranks them by trigram similarity
+    against the whole query and against each run of query words as long as
+    the name, then scores the best ones by edit distance. No network call or embedding is
+    involved, so a lookup takes microseconds, and repeated queries are
+    answered from memory.
+    """
+    def __init__(self):
+        # (names, trigram index, results) swapped in one assignment so lookups never see a half-built index
+        self.index = ([], {}, {})
+        self.refresh_lock = threading.Lock()
+        self.refreshed_at = None
+
+    def refresh(self):
+        """Reload the distinct names from the database"""
+        with self.refresh_lock:
+            names = []
+            with get_read_engine().connect() as conn:
+                for kind, query in NAME_QUERIES:
+                    for value in conn.execute(text(query)).scalars():
+                        value = (value or "").strip()
+                        if value:
+                            # Name, kind, lowercased name, word count and trigrams
+                            names.append((value, kind, value.lower(), len(value.split()), trigrams(value)))
+
+            index = defaultdict(list)
+            for position, name in enumerate(names):
+                for trigram in name[4]:
+                    index[trigram].append(position)
+            self.index = (names, dict(index), {})
+            self.refreshed_at = time.time()
+        return len(names)
+
+    def refresh_job(self):
+        """Scheduler entry point for refresh"""
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing proper nouns: {str(e)}")
+
+    def ensure_loaded(self):
+        if self.refreshed_at is None:
+            self.refresh()
+
+    def resolve(self, query: str, limit: int = 5):
+        """
+        Find the names most similar to an approximate spelling
+
+        Args:
+            query (str): Approximate name, may contain other words
+            limit (int): Most names returned
+
+        Returns:
+            list of (name, kind, score), best first
+        """
+        names, index, results = self.index
+        query = " ".join(query.lower().split())
+        if (query, limit) in results:
+            return results[(query, limit)]
+
+        query_trigrams = trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(index.get(trigram, ()))
+
+        # Share of each name's trigrams found in the query, so a short name the
+        # query contains outranks long names that merely share more trigrams
+        candidates = heapq.nlargest(
+            CANDIDATES,
+            shared.items(),
+            key=lambda item: (item[1] / len(names[item[0]][4]), item[1])
+        )
+
+        words = query.split()
+        windows = {}
+        ranked = []
+        for position, _ in candidates:
+            _, _, lowered, width, name_trigrams = names[position]
+            if width not in windows:
+                windows[width] = [(query, query_trigrams)] + [
+                    (window, trigrams(window))
+                    for window in (" ".join(words[i:i + width]) for i in range(len(words) - width + 1))
+                ]
+            overlap, window = max(
+                (len(window_trigrams & name_trigrams) / len(window_trigrams | name_trigrams), window)
+                for window, window_trigrams in windows[width]
+            )
+            ranked.append((overlap, position, window))
+        ranked.sort(reverse=True)
+
+        scored = []
+        for _, position, window in ranked[:RESCORED]:
+            value, kind, lowered, _, _ = names[position]
+            score = similarity(window, lowered)
+            if score >= MIN_SCORE:
+                scored.append((value, kind, round(score, 3)))
+        scored.sort(key=lambda match: match[2], reverse=True)
+        matches = scored[:limit]
+        if len(results) < RESULT_CACHE_SIZE:
+            results[(query, limit)] = matches
+        return matches
+
+    def search(self, query: str):
+        """Tool entry point: the matching names, one per line with their kind"""
+        self.ensure_loaded()
+        matches = self.resolve(query)
+        if not matches:
+            return "No matching names."
+        return "\n".join(f"{value} ({kind})" for value, kind, _ in matches)
+
+proper_nouns = ProperNounResolver()
+
+def schedule_proper_noun_refresh(scheduler):
+    """Reload the names on the shared scheduler after loads into the tables they come from"""
+    def on_data_loaded(tables):
+        if tables & NAME_TABLES:
+            scheduler.add_job(proper_nouns.refresh_job, id="proper_noun_refresh", replace_existing=True)
+
+    register_data_loaded_handler(on_data_loaded)
@@ -0,0 +1,77 @@
+from collections import Counter
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlencode
+from sqlalchemy import text
+from db.database import engine
+import threading
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ranges ending at most this many days before today are rolling windows
+# ("last 7 days") and are recorded relative to today, so they move with the date
+ROLLING_END_DAYS = 1
+RELATIVE_DATE = re.compile(r"today-(\d+)")
+
+def relative_query(params):
+    """
+    URL query of the sorted parameters, with a rolling date range written as today-N
+
+    Args:
+        params: (name, value) pairs of the request
+    """
+    params = sorted((name, value) for name, value in params if value)
+    values = dict(params)
+    try:
+        offsets = [(date.today() - date.fromisoformat(values[name])).days for name in ("startDate", "endDate")]
+    except (KeyError, ValueError):
+        return urlencode(params)
+    if not 0 <= offsets[1] <= ROLLING_END_DAYS:
+        return urlencode(params)
+    relative = dict(zip(("startDate", "endDate"), offsets))
+    return urlencode([(name, f"today-{relative[name]}" if name in relative else value) for name, value in params])
+
+def resolve_query(query: str):
+    """Replace the today-N dates of a recorded query with the dates they mean today"""
+    def resolve(value):
+        match = RELATIVE_DATE.fullmatch(value)
+        return (date.today() - timedelta(days=int(match.group(1)))).isoformat() if match else value
+    return urlencode([(name, resolve(value)) for name, value in parse_qsl(query)])
+
+class PopularityTracker:
+    """
+    Per-worker request counts of cached analytics URLs
+
+    Counting is in memory; `flush` adds the counts to cache_popularity so
+    the warmer sees the demand of every worker.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def record(self, path: str, query: str):
+        with self.lock:
+            self.counts[(path, query)] += 1
+
+    def flush(self):
+        """Add the counts since the last flush to cache_popularity"""
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        if not counts:
+            return
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO cache_popularity (path, query, day, hits)
+                    VALUES (:path, :query, current_date, :hits)
+                    ON CONFLICT (path, query, day) DO UPDATE
+                    SET hits = cache_popularity.hits + EXCLUDED.hits
+                """), [{"path": path, "query": query, "hits": hits} for (path, query), hits in counts.items()])
+        except Exception as e:
+            logger.error(f"Could not flush cache popularity: {str(e)}")
+            # Keep the counts for the next flush
+            with self.lock:
+                self.counts.update(counts)
+
+popularity = PopularityTracker()
@@ -0,0 +1,588 @@
+from collections import OrderedDict, defaultdict
+from datetime import date
+from functools import wraps
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from tools.filters import AnalyticsFilter
+from tools.single_flight import single_flight
+from tools.request_popularity import popularity, relative_query
+import asyncio
+import hashlib
+import inspect
+import threading
+import sqlite3
+import tempfile
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# memory: per worker, sqlite: shared by the workers of a host, redis: shared by every host
+BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "sqlite")
+MAX_BYTES = int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+DEFAULT_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Ranges that end before today can no longer change
+HISTORICAL_TTL = int(os.getenv("RESPONSE_CACHE_HISTORICAL_TTL", "86400"))
+SQLITE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "iykra_response_cache.sqlite3"))
+REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+def tags_match(tags, table: str, brand: str = None, start_date: str = None, end_date: str = None):
+    """
+    Check whether a change to `table` for brand and date range could affect a cached entry
+
+    A missing brand or range on either side matches anything. Dates are
+    ISO strings, so they compare in date order.
+    """
+    if table not in tags["tables"]:
+        return False
+    if brand and tags["brand"] and brand != tags["brand"]:
+        return False
+    if start_date and end_date and tags["start"] and tags["end"]:
+        return tags["start"] <= end_date and tags["end"] >= start_date
+    return True
+
+class MemoryCacheBackend:
+    """
+    Per-process LRU store with per-entry expiry
+
+    Entries are evicted least recently used first once the stored bytes
+    exceed max_bytes.
+
+    Args:
+        max_bytes (int): Memory budget for cached bodies
+    """
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, body: bytes, ttl: int, tags: dict):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.time() + ttl, body, tags)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, prefix: str = ""):
+        with self.lock:
+            keys = [key for key in self.entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def invalidate_matching(self, table: str, brand: str = None, start_date: str = None, end_date: str = None):
+        with self.lock:
+            keys = [
+                key for key, (_, _, tags) in self.entries.items()
+                if tags_match(tags, table, brand, start_date, end_date)
+            ]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def _remove(self, key):
+        _, body, _ = self.entries.pop(key)
+        self.size -= len(body)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "backend": "memory",
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "maxBytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+class SQLiteCacheBackend:
+    """
+    Store in a local SQLite file in WAL mode, shared by every worker on the host
+
+    Readers never block each other or the writer. Expired entries and the
+    least recently used ones beyond max_bytes are pruned every
+    `prune_every` writes of a worker.
+
+    Args:
+        path (str): Database file, created if missing
+        max_bytes (int): Size budget for cached bodies
+        prune_every (int): Writes between two prunes
+    """
+    # Last access is only rewritten when older than this, to keep hits read-only
+    TOUCH_INTERVAL = 30
+    # Bumped when the table layout changes; an older cache file is simply emptied
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str = SQLITE_PATH, max_bytes: int = MAX_BYTES, prune_every: int = 100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self.writes = 0
+        self.local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS response_cache")
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            # tables is stored as ",table_a,table_b," so one table can be matched with LIKE
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    tables TEXT NOT NULL,
+                    brand TEXT,
+                    start_date TEXT,
+                    end_date TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_last_access ON response_cache (last_access)")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        # Connections are per thread and must not be inherited across a fork
+        if conn is None or self.local.pid != os.getpid():
+            # Autocommit, each statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT body, expires_at, last_access FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, expires_at, last_access = row
+        now = time.time()
+        if expires_at < now:
+            return None
+        if now - last_access > self.TOUCH_INTERVAL:
+            conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+        return body
+
+    def set(self, key: str, body: bytes, ttl: int, tags: dict):
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO response_cache
+                (key, body, size, expires_at, last_access, tables, brand, start_date, end_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (key, body, len(body), now + ttl, now, f",{','.join(tags['tables'])},", tags["brand"], tags["start"], tags["end"])
+        )
+        self.writes += 1
+        if self.writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete expired entries, then the least recently used ones beyond the budget"""
+        conn = self._connect()
+        conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+        conn.execute("""
+            DELETE FROM response_cache WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, sum(size) OVER (ORDER BY last_access DESC) AS running_size
+                    FROM response_cache
+                ) WHERE running_size > ?
+            )
+        """, (self.max_bytes,))
+
+    def invalidate(self, prefix: str = ""):
+        conn = self._connect()
+        # Keys are compared as a range so the primary key index is used
+        if prefix:
+            cursor = conn.execute(
+                "DELETE FROM response_cache WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff")
+            )
+        else:
+            cursor = conn.execute("DELETE FROM response_cache")
+        return cursor.rowcount
+
+    def invalidate_matching(self, table: str, brand: str = None, start_date: str = None, end_date: str = None):
+        cursor = self._connect().execute(
+            """
+            DELETE FROM response_cache
+            WHERE tables LIKE '%,' || :table || ',%'
+              AND (:brand IS NULL OR brand IS NULL OR brand = :brand)
+              AND (:start_date IS NULL OR :end_date IS NULL OR start_date IS NULL
+                   OR (start_date <= :end_date AND end_date >= :start_date))
+            """,
+            {"table": table, "brand": brand, "start_date": start_date, "end_date": end_date}
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        entries, size = self._connect().execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM response_cache"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "maxBytes": self.max_bytes
+        }
+
+class RedisCacheBackend:
+    """
+    Store in Redis, shared by every host
+
+    Each entry is a hash of the body and its tags. Expiry uses Redis TTLs;
+    set `maxmemory` with the allkeys-lru policy on the server to bound
+    memory. Requires the optional `redis` package.
+
+    Args:
+        url (str): Redis connection URL
+        namespace (str): Prefix of every key written by this cache
+    """
+    def __init__(self, url: str = REDIS_URL, namespace: str = "response_cache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, key: str):
+        return self.client.hget(self.namespace + key, "body")
+
+    def set(self, key: str, body: bytes, ttl: int, tags: dict):
+        pipeline = self.client.pipeline()
+        pipeline.hset(self.namespace + key, mapping={
+            "body": body,
+            "tables": ",".join(tags["tables"]),
+            "brand": tags["brand"] or "",
+            "start": tags["start"] or "",
+            "end": tags["end"] or ""
+        })
+        pipeline.expire(self.namespace + key, ttl)
+        pipeline.execute()
+
+    def invalidate(self, prefix: str = ""):
+        return self._delete_where(prefix, lambda key: True)
+
+    def invalidate_matching(self, table: str, brand: str = None, start_date: str = None, end_date: str = None):
+        def matches(key):
+            tables, cached_brand, start, end = (
+                (value or b"").decode("utf-8")
+                for value in self.client.hmget(key, "tables", "brand", "start", "end")
+            )
+            tags = {"tables": tables.split(","), "brand": cached_brand or None, "start": start or None, "end": end or None}
+            return tags_match(tags, table, brand, start_date, end_date)
+        return self._delete_where("", matches)
+
+    def _delete_where(self, prefix, condition):
+        removed = 0
+        batch = []
+        for key in self.client.scan_iter(match=self.namespace + prefix + "*", count=500):
+            if not condition(key):
+                continue
+            batch.append(key)
+            if len(batch) == 500:
+                removed += self.client.delete(*batch)
+                batch = []
+        if batch:
+            removed += self.client.delete(*batch)
+        return removed
+
+    def stats(self):
+        memory = self.client.info("memory")
+        return {
+            "backend": "redis",
+            "usedMemory": memory.get("used_memory"),
+            "maxMemory": memory.get("maxmemory")
+        }
+
+def create_backend(name: str = BACKEND, sqlite_path: str = SQLITE_PATH, redis_namespace: str = "response_cache:", max_bytes: int = MAX_BYTES):
+    """
+    Create a cache backend, falling back to memory if it cannot be opened
+
+    The defaults are those of the response cache; other caches pass their
+    own file, namespace and budget so they do not share its entries.
+    """
+    try:
+        if name == "sqlite":
+            return SQLiteCacheBackend(sqlite_path, max_bytes)
+        if name == "redis":
+            return RedisCacheBackend(REDIS_URL, redis_namespace)
+    except Exception as e:
+        logger.error(f"Could not open the {name} cache at {sqlite_path if name == 'sqlite' else redis_namespace}, using per-worker memory: {str(e)}")
+    return MemoryCacheBackend(max_bytes)
+
+class ResponseCache:
+    """
+    Encoded endpoint responses in a pluggable backend, with this worker's hit/miss counters
+
+    Backend errors are logged and treated as misses, so a broken cache only
+    costs the database query it would have saved.
+
+    Args:
+        backend: MemoryCacheBackend, SQLiteCacheBackend or RedisCacheBackend
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.endpoint_stats = defaultdict(lambda: {"hits": 0, "misses": 0, "notModified": 0})
+
+    def get(self, endpoint: str, key: str):
+        """Get a cached response body, or None when it is missing or expired"""
+        try:
+            body = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Response cache read failed: {str(e)}")
+            body = None
+            self._count("errors")
+
+        with self.lock:
+            if body is None:
+                self.misses += 1
+                self.endpoint_stats[endpoint]["misses"] += 1
+            else:
+                self.hits += 1
+                self.endpoint_stats[endpoint]["hits"] += 1
+        return body
+
+    def set(self, key: str, body: bytes, ttl: int, tags: dict):
+        """
+        Store an encoded response
+
+        Args:
+            key (str): Cache key
+            body (bytes): Encoded JSON response
+            ttl (int): Seconds to keep it
+            tags (dict): tables read, brand and ISO start/end dates covered, used by invalidate_matching
+        """
+        try:
+            self.backend.set(key, body, ttl, tags)
+        except Exception as e:
+            logger.error(f"Response cache write failed: {str(e)}")
+            self._count("errors")
+
+    def invalidate(self, prefix: str = ""):
+        """Drop every entry whose key starts with prefix, or all entries"""
+        try:
+            return self.backend.invalidate(prefix)
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed: {str(e)}")
+            self._count("errors")
+            return 0
+
+    def invalidate_matching(self, table: str, brand: str = None, start_date: str = None, end_date: str = None):
+        """Drop the entries that read `table` and cover the brand and date range of a change"""
+        try:
+            return self.backend.invalidate_matching(table, brand, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed: {str(e)}")
+            self._count("errors")
+            return 0
+
+    def count_not_modified(self, endpoint: str):
+        """Record a request answered with 304 Not Modified"""
+        with self.lock:
+            self.not_modified += 1
+            self.endpoint_stats[endpoint]["notModified"] += 1
+
+    def _count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        try:
+            storage = self.backend.stats()
+        except Exception as e:
+            storage = {"error": str(e)}
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                **storage,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0,
+                "notModified": self.not_modified,
+                "errors": self.errors,
+                "endpoints": {name: dict(counts) for name, counts in self.endpoint_stats.items()}
+            }
+
+response_cache = ResponseCache(create_backend())
+
+def cache_key(endpoint: str, kwargs: dict):
+    """
+    Build the cache key of an endpoint call
+
+    The AnalyticsFilter contributes its canonical form, every other
+    parameter except the database session is added sorted by name. Without
+    an explicit date range the endpoint may fall back to a window relative
+    to today (see AnalyticsFilter.with_default_range), so today's date is
+    part of the key.
+
+    Returns:
+        tuple of (key, the AnalyticsFilter of the call or None)
+    """
+    filters = None
+    parts = []
+    for name, value in sorted(kwargs.items()):
+        if isinstance(value, Session):
+            continue
+        if isinstance(value, AnalyticsFilter):
+            filters = value
+            parts.append(value.canonical)
+        else:
+            parts.append(f"{name}={value}")
+    if filters is None or not filters.has_date_range:
+        parts.append(f"today={date.today().isoformat()}")
+    return f"{endpoint}?{'&'.join(parts)}", filters
+
+def cache_tags(tables, filters: AnalyticsFilter, previous_period: bool = False):
+    """Describe which data a cached response was computed from, for targeted invalidation"""
+    if filters is None:
+        return {"tables": list(tables), "brand": None, "start": None, "end": None}
+    start_date = filters.start_date
+    if previous_period and filters.has_date_range:
+        start_date = filters.previous_period().start_date
+    return {
+        "tables": list(tables),
+        "brand": filters.brand,
+        "start": start_date.isoformat() if start_date else None,
+        "end": filters.end_date.isoformat() if filters.end_date else None
+    }
+
+def etag_matches(if_none_match: str, etag: str):
+    """Check an If-None-Match header, which may list several or weak ETags, against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def encode_response(result):
+    """Encode an endpoint result exactly like FastAPI's default JSON response"""
+    return JSONResponse(content=jsonable_encoder(result))
+
+def respond(request: Request, endpoint: str, body: bytes, cache_status: str):
+    """JSON response of an encoded body with its ETag, or 304 if the client already has that body"""
+    headers = {
+        "ETag": '"' + hashlib.sha1(body).hexdigest() + '"',
+        # Let browsers keep the response but revalidate it every time
+        "Cache-Control": "private, no-cache"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        response_cache.count_not_modified(endpoint)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": cache_status})
+
+def cached_response(tables=(), ttl: int = DEFAULT_TTL, historical_ttl: int = HISTORICAL_TTL, previous_period: bool = False):
+    """
+    Cache the JSON response of a sync or async endpoint and answer conditional requests
+
+    Place it below the router decorator. The endpoint keeps its parameters
+    and gains the Request, so FastAPI resolves the same query parameters and
+    dependencies. Responses carry an ETag hashed from the body actually
+    served, so it can never vouch for data the client does not have; a
+    matching If-None-Match on a cache hit gets a 304 without running the
+    endpoint. Bodies are stored already encoded and served as-is on a hit,
+    until they expire or a change notification for one of `tables`
+    overlaps their brand and date range. Concurrent misses for the
+    same key within a worker run the endpoint once and share its response.
+
+    Args:
+        tables: Tables the endpoint reads
+        ttl (int): Seconds to keep results of ranges that include today
+        historical_ttl (int): Seconds to keep results of ranges that ended before today
+        previous_period (bool): The endpoint also reads the period before the requested range
+    """
+    def decorator(func):
+        endpoint = f"{func.__module__}.{func.__name__}"
+
+        def lookup(request, kwargs):
+            if "x-cache-warmer" not in request.headers:
+                popularity.record(request.url.path, relative_query(request.query_params.multi_items()))
+
+            key, filters = cache_key(endpoint, kwargs)
+            for value in kwargs.values():
+                if isinstance(value, Session):
+                    # Lets the disconnect watcher spare queries that coalesced requests wait for
+                    value.info["single_flight_key"] = key
+            body = response_cache.get(endpoint, key)
+            if body is not None:
+                return key, filters, respond(request, endpoint, body, "HIT")
+            return key, filters, None
+
+        def store(key, filters, result):
+            body = bytes(encode_response(result).body)
+            response_cache.set(
+                key,
+                body,
+                historical_ttl if filters and filters.is_historical else ttl,
+                cache_tags(tables, filters, previous_period)
+            )
+            return body
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(**kwargs):
+                request = kwargs.pop("cache_request")
+                key, filters, response = lookup(request, kwargs)
+                if response is not None:
+                    return response
+
+                async def compute():
+                    return store(key, filters, await func(**kwargs))
+
+                body = await single_flight.do_async(endpoint, key, compute)
+                return respond(request, endpoint, body, "MISS")
+        else:
+            @wraps(func)
+            def wrapper(**kwargs):
+                request = kwargs.pop("cache_request")
+                key, filters, response = lookup(request, kwargs)
+                if response is not None:
+                    return response
+                body = single_flight.do(endpoint, key, lambda: store(key, filters, func(**kwargs)))
+                return respond(request, endpoint, body, "MISS")
+
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        ])
+        return wrapper
+    return decorator
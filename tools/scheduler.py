@@ -0,0 +1,22 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+import logging
+
+logging.getLogger("apscheduler").setLevel(logging.ERROR)
+
+logger = logging.getLogger(__name__)
+
+# One background scheduler per worker process. Jobs that must not run on
+# every worker at once guard themselves with a Postgres advisory lock.
+scheduler = BackgroundScheduler(
+    job_defaults={"coalesce": True, "max_instances": 1}
+)
+
+def start_scheduler():
+    """Start the shared scheduler if it is not running yet"""
+    if not scheduler.running:
+        scheduler.start()
+
+def shutdown_scheduler():
+    """Stop the shared scheduler without waiting for running jobs"""
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
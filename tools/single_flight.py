@@ -0,0 +1,132 @@
+from collections import defaultdict
+import asyncio
+import threading
+import time
+
+class _Call:
+    """One in-flight computation that later callers with the same key wait for"""
+    def __init__(self, future=None):
+        self.done = threading.Event()
+        self.future = future
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Run a computation once for concurrent callers with the same key
+
+    The first caller of a key runs it; callers arriving while it is running
+    wait and get the same result, or the same exception. Nothing is kept
+    once it finishes, so callers arriving afterwards run it again (the
+    response cache is filled by then). Sync callers run in FastAPI's
+    threadpool and wait on an Event; async callers await a Future of this
+    worker's event loop.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.async_calls = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+        self.endpoint_stats = defaultdict(lambda: {"executions": 0, "coalesced": 0, "savedSeconds": 0.0})
+
+    def do(self, endpoint: str, key: str, fn):
+        """
+        Call fn() unless an identical call is already running, then wait for it
+
+        Args:
+            endpoint (str): Name used for the per-endpoint counters
+            key (str): Normalized request, e.g. the response cache key
+            fn: Function without arguments that computes the result
+
+        Returns:
+            the result of fn, possibly computed for another caller
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        started = time.perf_counter()
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+            self._record(endpoint, call.waiters, time.perf_counter() - started)
+
+    async def do_async(self, endpoint: str, key: str, fn):
+        """Async version of do; fn is a coroutine function without arguments"""
+        # Futures belong to one event loop, and the cache warmer runs its own
+        loop = asyncio.get_running_loop()
+        call = self.async_calls.get((loop, key))
+        if call is not None:
+            call.waiters += 1
+            # Shield so a cancelled follower does not cancel the computation
+            return await asyncio.shield(call.future)
+
+        call = self.async_calls[(loop, key)] = _Call(loop.create_future())
+        started = time.perf_counter()
+        try:
+            result = await fn()
+            call.future.set_result(result)
+            return result
+        except BaseException as e:
+            call.future.set_exception(e)
+            # Mark it retrieved so a future nobody awaited does not log a warning
+            call.future.exception()
+            raise
+        finally:
+            del self.async_calls[(loop, key)]
+            self._record(endpoint, call.waiters, time.perf_counter() - started)
+
+    def has_waiters(self, key: str):
+        """Whether callers other than the one computing `key` are waiting for it"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None and call.waiters:
+                return True
+            return any(call.waiters for (_, call_key), call in list(self.async_calls.items()) if call_key == key)
+
+    def _record(self, endpoint, waiters, duration):
+        with self.lock:
+            stats = self.endpoint_stats[endpoint]
+            self.executions += 1
+            stats["executions"] += 1
+            self.coalesced += waiters
+            stats["coalesced"] += waiters
+            self.saved_seconds += waiters * duration
+            stats["savedSeconds"] += waiters * duration
+
+    def stats(self):
+        """Executions run, executions saved by coalescing, and the time they would have taken"""
+        with self.lock:
+            return {
+                "inFlight": len(self.calls) + len(self.async_calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "savedSeconds": round(self.saved_seconds, 3),
+                "endpoints": {
+                    name: {**counts, "savedSeconds": round(counts["savedSeconds"], 3)}
+                    for name, counts in self.endpoint_stats.items()
+                }
+            }
+
+# Shared by every endpoint of this worker
+single_flight = SingleFlight()
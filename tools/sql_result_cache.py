@@ -0,0 +1,81 @@
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+from db.data_versions import get_data_versions, versions_key
+from tools.cache_invalidation import register_invalidation_handler
+from tools.response_cache import ResponseCache, create_backend
+import hashlib
+import tempfile
+import re
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# sqlite: shared by the workers of a host, redis: shared by every host, memory: per worker
+SQL_RESULT_CACHE_BACKEND = os.getenv("SQL_RESULT_CACHE_BACKEND", "sqlite")
+SQL_RESULT_CACHE_MAX_BYTES = int(float(os.getenv("SQL_RESULT_CACHE_MAX_MB", "16")) * 1024 * 1024)
+SQL_RESULT_CACHE_PATH = os.getenv("SQL_RESULT_CACHE_PATH", os.path.join(tempfile.gettempdir(), "iykra_sql_result_cache.sqlite3"))
+SQL_RESULT_CACHE_TTL = int(os.getenv("SQL_RESULT_CACHE_TTL", "3600"))
+
+# Name the results are counted under in the cache stats
+ENDPOINT = "sql_db_query"
+# String literals, quoted identifiers and comments, the parts of a query normalization must respect
+SQL_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/)""", re.DOTALL)
+
+sql_result_cache = ResponseCache(create_backend(
+    SQL_RESULT_CACHE_BACKEND,
+    sqlite_path=SQL_RESULT_CACHE_PATH,
+    redis_namespace="sql_result_cache:",
+    max_bytes=SQL_RESULT_CACHE_MAX_BYTES
+))
+# Drops results of changed tables, again once read replicas have caught up
+register_invalidation_handler(sql_result_cache.invalidate_matching)
+
+def normalize_sql(query: str):
+    """Drop comments and a trailing semicolon, fold case and whitespace outside literals and quoted identifiers"""
+    # Comments become whitespace first, so it folds with the whitespace around them
+    query = SQL_TOKENS.sub(lambda match: " " if match.group().startswith(("--", "/*")) else match.group(), query)
+    parts = SQL_TOKENS.split(query)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r" ?([(),=<>]) ?", r"\1", re.sub(r"\s+", " ", parts[i].lower()))
+    return "".join(parts).strip().rstrip(";").strip()
+
+def tables_read(normalized_query: str, tables):
+    """The tables of `tables` a normalized query mentions"""
+    return sorted(table for table in tables if re.search(rf'\b{re.escape(table)}\b', normalized_query, re.IGNORECASE))
+
+class CachedQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """
+    SQL query tool whose results are shared across chat sessions
+
+    Results are keyed by the normalized query and the data versions of the
+    tables it reads (all tracked tables if none is recognized), so any
+    write to them makes the next run go to the database. Queries reading a
+    table without a data version, error results and statements other than
+    SELECT / WITH are never cached.
+    """
+
+    def _run(self, query: str, run_manager=None):
+        normalized = normalize_sql(query)
+        if not normalized.startswith(("select", "with")):
+            return super()._run(query, run_manager)
+
+        versions = get_data_versions()
+        tables = tables_read(normalized, set(versions) | set(self.db.get_usable_table_names()))
+        if any(table not in versions for table in tables):
+            # Writes to untracked tables (campaign, sentiment_campaign, ...) would not invalidate the result
+            return super()._run(query, run_manager)
+        tables = tables or sorted(versions)
+        key = hashlib.sha256(f"{normalized}#{versions_key(tables)}".encode("utf-8")).hexdigest()
+        body = sql_result_cache.get(ENDPOINT, key)
+        if body is not None:
+            return body.decode("utf-8")
+
+        result = super()._run(query, run_manager)
+        if isinstance(result, str) and not result.startswith("Error"):
+            sql_result_cache.set(
+                key,
+                result.encode("utf-8"),
+                SQL_RESULT_CACHE_TTL,
+                {"tables": tables, "brand": None, "start": None, "end": None}
+            )
+        return result
@@ -0,0 +1,215 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import datetime
+import multiprocessing
+import subprocess
+import hashlib
+import sys
+import os
+import logging
+
+from db.database import engine, get_db_session
+from db.models import SustainabilityMention, SustainabilityScanState
+from sqlalchemy import text
+from tools.keyword_matching import init_worker, match_chunk
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.getenv("SUSTAINABILITY_CHUNK_SIZE", "2000"))
+MAX_WORKERS = int(os.getenv("SUSTAINABILITY_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+SCAN_HOUR = int(os.getenv("SUSTAINABILITY_SCAN_HOUR", "2"))
+
+# Arbitrary key so only one worker scans at a time
+SCAN_LOCK_KEY = 27001
+# Directory the scan CLI is run from, so `tools` is importable
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each source yields (document_id, text, brand, document_date, sentiment_score)
+# ordered by document_id, so a scan can resume after the last id it stored.
+# Posts have no sentiment of their own.
+SOURCES = {
+    "review": """
+        SELECT customer_review_id, review_text, brand, review_date, sentiment_score
+        FROM reviewed_product
+        WHERE customer_review_id > :last_id AND review_text IS NOT NULL
+        ORDER BY customer_review_id
+    """,
+    "post": """
+        SELECT social_media_post_id, post_text, brand, post_date, NULL
+        FROM social_media
+        WHERE social_media_post_id > :last_id AND post_text IS NOT NULL
+        ORDER BY social_media_post_id
+    """,
+    "comment": """
+        SELECT ssm.id_post, ssm.comment, sm.brand, sm.post_date, ssm.sentiment_score
+        FROM sentiment_social_media ssm
+        JOIN social_media sm ON sm.social_media_post_id = ssm.id_post
+        WHERE ssm.id_post > :last_id AND ssm.comment IS NOT NULL
+        ORDER BY ssm.id_post
+    """
+}
+
+UPSERT_SQL = text("""
+    INSERT INTO sustainability_mention
+        (source, document_id, brand, document_date, sentiment_score, hit_count, keyword_hits)
+    VALUES
+        (:source, :document_id, :brand, :document_date, :sentiment_score, :hit_count, CAST(:keyword_hits AS jsonb))
+    ON CONFLICT (source, document_id) DO UPDATE SET
+        brand = EXCLUDED.brand,
+        document_date = EXCLUDED.document_date,
+        sentiment_score = EXCLUDED.sentiment_score,
+        hit_count = EXCLUDED.hit_count,
+        keyword_hits = EXCLUDED.keyword_hits
+""")
+
+def load_keywords(db):
+    """Get the distinct, lower-cased eco keywords from sustainability_integration"""
+    rows = db.execute(text("SELECT eco_friendly_keyword_usage FROM sustainability_integration"))
+    keywords = set()
+    for (usage,) in rows:
+        for keyword in usage or []:
+            keyword = " ".join(keyword.lower().split())
+            if keyword:
+                keywords.add(keyword)
+    return sorted(keywords)
+
+def scan_source(source, executor, write_db, last_id, keywords_hash):
+    """
+    Stream one source table through the process pool and persist its hits
+
+    Chunks are consumed in submission order, so the stored scan state only
+    ever advances past documents whose hits have been written.
+
+    Returns:
+        tuple of (documents scanned, documents with hits)
+    """
+    read_db = get_db_session()
+    scanned = 0
+    matched = 0
+    try:
+        result = read_db.execute(
+            text(SOURCES[source]).execution_options(stream_results=True, yield_per=CHUNK_SIZE),
+            {"last_id": last_id}
+        )
+        pending = deque()
+
+        def drain(limit):
+            nonlocal matched
+            while len(pending) > limit:
+                future, chunk_last_id = pending.popleft()
+                matches = future.result()
+                if matches:
+                    write_db.execute(UPSERT_SQL, [dict(m, source=source) for m in matches])
+                    matched += len(matches)
+                write_db.merge(SustainabilityScanState(
+                    source=source,
+                    last_document_id=chunk_last_id,
+                    keywords_hash=keywords_hash,
+                    scanned_at=datetime.now()
+                ))
+                write_db.commit()
+
+        for rows in result.partitions(CHUNK_SIZE):
+            rows = [tuple(row) for row in rows]
+            scanned += len(rows)
+            pending.append((executor.submit(match_chunk, rows), rows[-1][0]))
+            # Keep a bounded number of chunks in flight
+            drain(MAX_WORKERS * 2)
+        drain(0)
+    finally:
+        read_db.close()
+    return scanned, matched
+
+def run_sustainability_scan(full=False):
+    """
+    Scan reviews, posts and comments for eco keywords
+
+    Args:
+        full (bool): Drop stored hits and rescan every document. A full scan
+            also happens automatically when the keyword list changes.
+
+    Returns:
+        dict of per-source scan counts, or None when another worker holds the lock
+    """
+    write_db = get_db_session()
+    lock_conn = engine.connect()
+    locked = False
+    try:
+        locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCAN_LOCK_KEY}).scalar()
+        if not locked:
+            return None
+
+        keywords = load_keywords(write_db)
+        if not keywords:
+            logger.info("No eco keywords configured, skipping sustainability scan")
+            return {}
+        keywords_hash = hashlib.sha256("\n".join(keywords).encode("utf-8")).hexdigest()
+
+        summary = {}
+        with ProcessPoolExecutor(
+            max_workers=MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(keywords,)
+        ) as executor:
+            for source in SOURCES:
+                state = write_db.get(SustainabilityScanState, source)
+                last_id = 0
+                if full or state is None or state.keywords_hash != keywords_hash:
+                    write_db.query(SustainabilityMention).filter(
+                        SustainabilityMention.source == source
+                    ).delete()
+                    write_db.commit()
+                else:
+                    last_id = state.last_document_id or 0
+
+                scanned, matched = scan_source(source, executor, write_db, last_id, keywords_hash)
+                summary[source] = {"scanned": scanned, "matched": matched}
+        return summary
+    finally:
+        if locked:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCAN_LOCK_KEY})
+        lock_conn.close()
+        write_db.close()
+
+def sustainability_scan_job():
+    """
+    Scheduler entry point for the incremental scan
+
+    The scan runs as the CLI in its own process. Spawned pool workers
+    re-import their parent's main module, which inside the API is the
+    application with its vector store.
+    """
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "tools.sustainability_matcher"],
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            logger.error(f"Error in sustainability scan: {result.stderr.strip()[-2000:]}")
+        elif result.stdout.strip():
+            logger.info(f"Sustainability scan completed: {result.stdout.strip()}")
+    except Exception as e:
+        logger.error(f"Error in sustainability scan: {str(e)}")
+
+def schedule_sustainability_scan(scheduler):
+    """Register the nightly incremental scan on the shared scheduler"""
+    scheduler.add_job(
+        sustainability_scan_job,
+        "cron",
+        hour=SCAN_HOUR,
+        id="sustainability_scan",
+        replace_existing=True
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scan texts for eco-friendly keywords")
+    parser.add_argument("--full", action="store_true", help="rescan every document")
+    args = parser.parse_args()
+
+    print(run_sustainability_scan(full=args.full))